@@ -0,0 +1,272 @@
+"""Usage analytics kept in Supabase, read and written through its PostgREST API.
+
+Counts are aggregated by the database rather than by downloading every event row: the
+app reads one row per event from `analytics_counts`, a rollup table a trigger keeps
+current (ROLLUP_SQL, run once in the Supabase SQL editor; a grouped view with the same
+name and columns works too). Until it exists, each known event is counted with a HEAD
+request and `Prefer: count=exact`, which returns the total in Content-Range and no rows.
+
+Counts are cached once per process and shared by every browser session for COUNTS_TTL
+seconds. While one refresh is running, other sessions are served the previous numbers.
+`record` bumps the cached numbers, so a session sees its own events straight away.
+
+Events are written off the request path: `record` only queues them. A background
+thread collects up to BATCH_SIZE events (or whatever arrived within FLUSH_SECONDS),
+appends them to a local SQLite spool and sends everything spooled as one bulk insert,
+deleting rows once Supabase has them. While Supabase is unreachable, events wait in
+the spool, and retries back off up to MAX_BACKOFF. Each project and table gets its
+own spool file under RF_ANALYTICS_SPOOL_DIR, so leftovers are only ever sent to the
+project they were recorded for, by the next process that starts with the same spool.
+Processes sharing a spool claim a batch in a short write transaction, send it with
+the spool unlocked, then delete it; claims left by a process that died mid-send
+expire after CLAIM_SECONDS. Events carry no timestamp of their own, so spooled ones
+are stamped when they reach Supabase.
+mock_supabase.py stands in for Supabase locally.
+"""
+import atexit
+import functools
+import hashlib
+import logging
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+COUNTS_TTL    = float(os.environ.get("RF_COUNTS_TTL", "60"))   # seconds
+RETRY_AFTER   = 15.0   # seconds before retrying when Supabase could not be reached
+TIMEOUT       = 5.0
+BATCH_SIZE    = 50     # events per spool write; a full batch is written without waiting
+FLUSH_SECONDS = 2.0    # longest an event waits in memory
+MAX_BULK      = 500    # rows per insert request when draining the spool
+MAX_BACKOFF   = 300.0  # seconds
+CLAIM_SECONDS = 60.0   # a batch claimed longer ago than this is free to send again
+SPOOL_DIR     = os.environ.get("RF_ANALYTICS_SPOOL_DIR") or tempfile.gettempdir()
+
+log = logging.getLogger(__name__)
+
+
+def spool_path_for(rest: str, table: str) -> str:
+    """The spool file for one project's table, so leftovers never reach another project."""
+    digest = hashlib.sha256(f"{rest}\0{table}".encode()).hexdigest()[:16]
+    return os.path.join(SPOOL_DIR, f"rf_analytics_{digest}.sqlite3")
+
+ROLLUP_SQL = """
+create table if not exists analytics_counts (event text primary key, n bigint not null default 0);
+
+create or replace function analytics_count_event() returns trigger
+language plpgsql security definer as $$
+begin
+  insert into analytics_counts (event, n) values (new.event, 1)
+  on conflict (event) do update set n = analytics_counts.n + 1;
+  return null;
+end $$;
+
+create trigger analytics_count_event after insert on analytics
+  for each row execute function analytics_count_event();
+
+insert into analytics_counts (event, n) select event, count(*) from analytics group by event
+  on conflict (event) do update set n = excluded.n;
+
+grant select on analytics_counts to anon;
+"""
+
+
+SPOOL_TABLE = "events (id INTEGER PRIMARY KEY, event TEXT NOT NULL, claim TEXT, claimed_at REAL)"
+
+
+class Analytics:
+    """Event counts and inserts for one Supabase project."""
+
+    def __init__(self, url: str, key: str, table: str = "analytics", counts_table: str = "analytics_counts",
+                 ttl: float = COUNTS_TTL, spool_path: str | None = None):
+        self.rest         = url.rstrip("/") + "/rest/v1"
+        self.key          = key
+        self.table        = table
+        self.counts_table = counts_table
+        self.ttl          = ttl
+        self._counts   = None
+        self._expires  = 0.0
+        self._rollup   = None    # unknown until tried; False once counts_table turned out missing
+        self._lock     = threading.Lock()   # guards _counts
+        self._fetching = threading.Lock()   # one refresh at a time
+        self.spool_path = spool_path or spool_path_for(self.rest, table)
+        self._queue     = queue.Queue()   # event names, or threading.Events from flush()
+        self._writer    = None
+        self._writer_lock = threading.Lock()
+
+    def headers(self, **extra) -> dict:
+        return {"apikey": self.key, "Authorization": f"Bearer {self.key}",
+                "Content-Type": "application/json", **extra}
+
+    # ── reading ──────────────────────────────────────────────────
+    def counts(self, events: list[str]) -> dict:
+        """{event: total}, at most ttl seconds old; {} until Supabase has answered once.
+
+        events names the events to count one by one when there is no rollup table.
+        """
+        with self._lock:
+            if self._counts is not None and (time.monotonic() < self._expires or self._fetching.locked()):
+                return dict(self._counts)
+        with self._fetching:
+            with self._lock:   # someone else may have refreshed while we waited
+                if self._counts is not None and time.monotonic() < self._expires:
+                    return dict(self._counts)
+            fetched = self._fetch(events)
+            with self._lock:
+                if fetched is not None:
+                    self._counts, self._expires = fetched, time.monotonic() + self.ttl
+                else:
+                    self._counts  = self._counts or {}
+                    self._expires = time.monotonic() + RETRY_AFTER
+                return dict(self._counts)
+
+    def _fetch(self, events: list[str]) -> dict | None:
+        import requests
+        try:
+            if self._rollup is not False:
+                resp = requests.get(f"{self.rest}/{self.counts_table}", params={"select": "event,n"},
+                                    headers=self.headers(), timeout=TIMEOUT)
+                if resp.status_code != 404:
+                    resp.raise_for_status()
+                    self._rollup = True
+                    return {row["event"]: int(row["n"]) for row in resp.json()}
+                self._rollup = False
+            counts = {}
+            for event in events:
+                resp = requests.head(f"{self.rest}/{self.table}", params={"select": "event", "event": f"eq.{event}"},
+                                     headers=self.headers(Prefer="count=exact"), timeout=TIMEOUT)
+                resp.raise_for_status()
+                counts[event] = int(resp.headers.get("Content-Range", "*/0").rsplit("/", 1)[1])
+            return counts
+        except Exception:
+            return None
+
+    # ── writing ──────────────────────────────────────────────────
+    def bump(self, event: str, n: int = 1):
+        with self._lock:
+            if self._counts is not None:
+                self._counts[event] = self._counts.get(event, 0) + n
+
+    def record(self, event: str):
+        """Count an event locally and queue it for the background writer. Never waits on the network."""
+        self.bump(event)
+        self._queue.put(event)
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="analytics-writer", daemon=True)
+                    self._writer.start()
+                    atexit.register(self.flush, 2.0)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything recorded so far has been sent or spooled; False on timeout."""
+        if self._writer is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _gather(self, block: bool) -> tuple[list[str], list]:
+        """(events, flush waiters) taken from the queue.
+
+        Returns once BATCH_SIZE events have arrived, FLUSH_SECONDS after the first one, or
+        at a flush request. The first is waited for indefinitely only when block is set.
+        """
+        events, waiters = [], []
+        try:
+            item = self._queue.get(timeout=None if block else FLUSH_SECONDS)
+        except queue.Empty:
+            return events, waiters
+        deadline = time.monotonic() + FLUSH_SECONDS
+        while True:
+            (waiters if isinstance(item, threading.Event) else events).append(item)
+            if waiters or len(events) >= BATCH_SIZE:
+                return events, waiters
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return events, waiters
+
+    def _open_spool(self) -> sqlite3.Connection:
+        try:
+            os.makedirs(os.path.dirname(self.spool_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.spool_path, timeout=30)
+            db.execute(f"CREATE TABLE IF NOT EXISTS {SPOOL_TABLE}")
+            return db
+        except (OSError, sqlite3.Error):
+            log.exception("analytics spool %s unusable; spooling in memory for this process", self.spool_path)
+            db = sqlite3.connect(":memory:")
+            db.execute(f"CREATE TABLE {SPOOL_TABLE}")
+            return db
+
+    def _write_loop(self):
+        db = self._open_spool()
+        pending  = db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        held     = []   # events the spool could not take yet
+        retry_at = backoff = 0.0
+        while True:
+            events, waiters = self._gather(block=not (pending or held))
+            held += events
+            try:   # an error here must not end the thread: events would pile up in the queue for good
+                if held:
+                    with db:
+                        db.executemany("INSERT INTO events (event) VALUES (?)", [(e,) for e in held])
+                    pending += len(held)
+                    held = []
+                if pending and time.monotonic() >= retry_at:
+                    pending = self._send_spooled(db)
+                    if pending:
+                        backoff  = min(MAX_BACKOFF, backoff * 2 or RETRY_AFTER)
+                        retry_at = time.monotonic() + backoff
+                    else:
+                        backoff = 0.0
+            except Exception:
+                log.exception("analytics writer failed; %d events waiting, will retry", len(held) + pending)
+                backoff  = min(MAX_BACKOFF, backoff * 2 or RETRY_AFTER)
+                retry_at = time.monotonic() + backoff
+            for done in waiters:
+                done.set()
+
+    def _claim(self, db: sqlite3.Connection) -> tuple[str, list[str]]:
+        """(claim token, events) for the oldest unclaimed batch, claimed in one short transaction."""
+        claim, now = uuid.uuid4().hex, time.time()
+        with db:
+            db.execute("UPDATE events SET claim = ?, claimed_at = ? WHERE id IN (SELECT id FROM events "
+                       "WHERE claim IS NULL OR claimed_at < ? ORDER BY id LIMIT ?)",
+                       (claim, now, now - CLAIM_SECONDS, MAX_BULK))
+        rows = db.execute("SELECT event FROM events WHERE claim = ? ORDER BY id", (claim,)).fetchall()
+        return claim, [e for e, in rows]
+
+    def _send_spooled(self, db: sqlite3.Connection) -> int:
+        """Bulk-insert spooled events oldest first; returns how many are still spooled.
+
+        A batch is claimed and committed before it is sent, so other processes sharing
+        the spool can keep writing during the request and never send the same rows.
+        """
+        import requests
+        while True:
+            claim, events = self._claim(db)
+            if not events:
+                return db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+            try:
+                resp = requests.post(f"{self.rest}/{self.table}", json=[{"event": e} for e in events],
+                                     headers=self.headers(Prefer="return=minimal"), timeout=TIMEOUT)
+                keep = resp.status_code >= 500 or resp.status_code in (401, 403, 408, 429)
+            except Exception:
+                keep = True
+            with db:
+                if keep:
+                    db.execute("UPDATE events SET claim = NULL, claimed_at = NULL WHERE claim = ?", (claim,))
+                else:   # sent, or rejected as malformed (other 4xx): retrying would never succeed
+                    db.execute("DELETE FROM events WHERE claim = ?", (claim,))
+            if keep:
+                return db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+@functools.cache
+def analytics(url: str, key: str) -> Analytics:
+    """The process-wide Analytics for a project, shared across Streamlit sessions and reruns."""
+    return Analytics(url, key)
@@ -0,0 +1,316 @@
+"""Async HTTP API for ResumeForge and Reasoning Forge.
+
+    uvicorn api:app --port 8000
+
+POST /analyze       {"resume_text" | "resume_file", "job_description", "goal", "job_title",
+                     "model", "cover_letter", "stream"}
+POST /cover-letter  {"resume_text" | "resume_file", "job_description", "job_title", "model", "stream"}
+POST /chat          {"messages": [{"role", "content"}], "files", "model", "context_budget",
+                     "failover", "hedge", "stream"}
+GET  /health        model cooldowns and cache stats
+
+Files are {"name": "cv.pdf", "data": "<base64>"}; chat files may send {"name", "text"}
+instead. goal is "combined", "gap" or "score" as in resume_core.analyze.
+
+With "stream": true the reply arrives as server-sent events — `data: {"delta": ...}` per
+chunk, then `event: done` carrying the JSON the non-streaming call returns, or
+`event: error`. The SDK calls are blocking, so each one runs in a worker thread and the
+event loop keeps serving other requests; at most RF_API_CONCURRENCY run at once.
+Point RF_LLM_BASE_URL at mock_llm.py to exercise the service without API keys.
+"""
+import asyncio
+import base64
+import binascii
+import io
+import json
+import os
+
+from starlette.applications import Starlette
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+import chat_core
+import resume_core
+from doc_cache import text_cache
+from llm_cache import response_cache
+from llm_router import health, status_of
+from retrieval import ContextIndex
+
+CONCURRENCY = int(os.environ.get("RF_API_CONCURRENCY", "16"))
+
+OPENROUTER_KEY, GEMINI_KEY = resume_core.load_keys()
+
+_slots = asyncio.Semaphore(CONCURRENCY)
+
+
+class BadRequest(Exception):
+    pass
+
+
+# ==============================
+# REQUEST HELPERS
+# ==============================
+async def _body(request) -> dict:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise BadRequest("Body must be JSON.")
+    if not isinstance(body, dict):
+        raise BadRequest("Body must be a JSON object.")
+    return body
+
+
+def _upload(spec: dict):
+    """BytesIO named like the upload, from {"name", "data": base64}."""
+    try:
+        data = base64.b64decode(spec["data"], validate=True)
+    except (KeyError, TypeError, binascii.Error):
+        raise BadRequest("Files need a name and base64 data.")
+    f = io.BytesIO(data)
+    f.name = spec.get("name") or "upload.txt"
+    return f
+
+
+def _resume_text(body: dict) -> str:
+    if body.get("resume_text"):
+        return body["resume_text"]
+    if body.get("resume_file"):
+        f = _upload(body["resume_file"])
+        try:
+            return resume_core.extract_text(f)
+        except Exception as e:
+            raise BadRequest(f"Could not read {f.name}: {e}")
+    raise BadRequest("resume_text or resume_file is required.")
+
+
+def _job_description(body: dict) -> str:
+    job_desc = (body.get("job_description") or "").strip()
+    if not job_desc:
+        raise BadRequest("job_description is required.")
+    return job_desc
+
+
+def _settings(body: dict) -> resume_core.LLMSettings:
+    settings = resume_core.LLMSettings(
+        model=body.get("model") or resume_core.OPENROUTER_MODELS[0],
+        openrouter_key=OPENROUTER_KEY, gemini_key=GEMINI_KEY,
+        failover=_flag(body, "failover", True), use_cache=_flag(body, "cache", True),
+    )
+    if not (GEMINI_KEY if settings.provider == "gemini" else OPENROUTER_KEY):
+        raise BadRequest(f"No API key configured for {settings.provider}.")
+    return settings
+
+
+def _chat_files(files: list) -> ContextIndex:
+    blocks = []
+    for spec in files or []:
+        if "text" in spec:
+            blocks.append((spec.get("name") or "pasted text", str(spec["text"])))
+        else:
+            f = _upload(spec)
+            try:
+                text, ftype = chat_core.extract_text(f)
+            except Exception as e:
+                raise BadRequest(f"Could not read {f.name}: {e}")
+            blocks.append((f"{f.name} ({ftype})", text))
+    return ContextIndex(blocks)
+
+
+def _chat_history(messages) -> list[dict]:
+    if not isinstance(messages, list) or not messages:
+        raise BadRequest("messages must be a non-empty list.")
+    history = []
+    for m in messages:
+        if not isinstance(m, dict) or m.get("role") not in ("user", "assistant") or not isinstance(m.get("content"), str):
+            raise BadRequest("Each message needs role user|assistant and string content.")
+        history.append({"role": m["role"], "content": m["content"]})
+    if history[-1]["role"] != "user":
+        raise BadRequest("The last message must come from the user.")
+    return history
+
+
+def _flag(body: dict, name: str, default: bool) -> bool:
+    """A boolean option; strings such as "false" are rejected rather than read as true."""
+    value = body.get(name)
+    if value is None:
+        return default
+    if not isinstance(value, bool):
+        raise BadRequest(f"{name} must be true or false.")
+    return value
+
+
+def _context_budget(value) -> int:
+    if value in (None, ""):
+        return 6000
+    try:
+        budget = int(value)
+    except (TypeError, ValueError):
+        raise BadRequest("context_budget must be a whole number of tokens.")
+    if budget <= 0:
+        raise BadRequest("context_budget must be positive.")
+    return budget
+
+
+# ==============================
+# RESPONSES
+# ==============================
+def _error(e: Exception) -> JSONResponse:
+    if isinstance(e, BadRequest):
+        return JSONResponse({"error": str(e)}, status_code=400)
+    code = status_of(e)
+    return JSONResponse({"error": str(e), "upstream_status": code}, status_code=429 if code == 429 else 502)
+
+
+def _sse(payload: dict, event: str | None = None) -> str:
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+async def _call(fn, *args, **kwargs):
+    """Run a blocking call in a worker thread, holding one of the concurrency slots."""
+    async with _slots:
+        return await run_in_threadpool(fn, *args, **kwargs)
+
+
+def _event_stream(deltas, finish, cleanup=None) -> StreamingResponse:
+    """SSE response over a blocking iterator of text deltas; await finish(full_text) builds the done event.
+
+    cleanup(), when given, runs once the stream ends, whether it finished, failed or was dropped.
+    """
+    async def events():
+        text = ""
+        try:
+            async with _slots:
+                async for delta in iterate_in_threadpool(deltas):
+                    text += delta
+                    yield _sse({"delta": delta})
+            # finish may wait on other slot holders (the cover letter), so the slot is released first
+            yield _sse(await finish(text), "done")
+        except Exception as e:
+            yield _sse({"error": str(e), "upstream_status": status_of(e)}, "error")
+        finally:
+            if cleanup is not None:
+                cleanup()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ==============================
+# ENDPOINTS
+# ==============================
+async def analyze(request):
+    try:
+        body        = await _body(request)
+        settings    = _settings(body)
+        goal        = body.get("goal") or "score"
+        job_title   = body.get("job_title") or ""
+        job_desc    = _job_description(body)
+        if goal not in resume_core.GOALS:
+            raise BadRequest(f"goal must be one of {sorted(resume_core.GOALS)}.")
+        resume_text = await run_in_threadpool(_resume_text, body)
+        stream, with_cover = _flag(body, "stream", False), _flag(body, "cover_letter", False)
+        if not stream:
+            return JSONResponse(await _call(resume_core.analyze, settings, resume_text, job_desc, goal,
+                                            job_title, with_cover))
+    except Exception as e:
+        return _error(e)
+
+    content = resume_core.format_request(job_desc, resume_text)
+    system_task, add_score = resume_core.analysis_task(goal, job_title)
+    cover = None
+    if with_cover:
+        # Written alongside the streamed analysis, reported in the done event
+        cover = asyncio.ensure_future(_call(resume_core.complete, settings,
+                                            resume_core.cover_letter_task(job_title), content, False))
+
+    async def finish(text):
+        result = resume_core.analysis_result(goal, text.strip(), resume_text)
+        if cover is not None:
+            result["cover_letter"] = await cover
+        return result
+
+    def drop_cover():
+        """The analysis failed or the client left: stop waiting for a cover letter nobody will get."""
+        if cover is None:
+            return
+        if cover.done():
+            cover.cancelled() or cover.exception()   # retrieved, so a failure is not logged as unhandled
+        else:
+            cover.cancel()
+
+    return _event_stream(resume_core.stream_completion(settings, system_task, content, add_score), finish,
+                         drop_cover)
+
+
+async def cover_letter(request):
+    try:
+        body     = await _body(request)
+        settings = _settings(body)
+        job_desc = _job_description(body)
+        stream   = _flag(body, "stream", False)
+        resume_text = await run_in_threadpool(_resume_text, body)
+    except Exception as e:
+        return _error(e)
+
+    task    = resume_core.cover_letter_task(body.get("job_title") or "")
+    content = resume_core.format_request(job_desc, resume_text)
+    if stream:
+        async def finish(text):
+            return {"cover_letter": text.strip()}
+        return _event_stream(resume_core.stream_completion(settings, task, content, False), finish)
+    try:
+        return JSONResponse({"cover_letter": await _call(resume_core.complete, settings, task, content, False)})
+    except Exception as e:
+        return _error(e)
+
+
+async def chat(request):
+    try:
+        body    = await _body(request)
+        history = _chat_history(body.get("messages"))
+        if not OPENROUTER_KEY:
+            raise BadRequest("No API key configured for openrouter.")
+        index   = await run_in_threadpool(_chat_files, body.get("files"))
+        model   = body.get("model") or chat_core.DEFAULT_MODEL
+        options = {
+            "context_budget": _context_budget(body.get("context_budget")),
+            "failover":       _flag(body, "failover", True),
+            "hedge":          _flag(body, "hedge", False),
+        }
+        if not _flag(body, "stream", False):
+            reply, elapsed, tokens, served = await _call(chat_core.chat_reply, OPENROUTER_KEY, history, index,
+                                                         model, **options)
+            return JSONResponse({"reply": reply, "model": served, "tokens": tokens, "elapsed": round(elapsed, 2)})
+    except Exception as e:
+        return _error(e)
+
+    opened = {}
+
+    def deltas():
+        # Opening the stream (and any failover) happens in the worker thread on first pull
+        response, opened["model"], opened["tokens"] = chat_core.open_chat(
+            OPENROUTER_KEY, history, index, model, stream=True, **options)
+        yield from chat_core.iter_deltas(response)
+
+    async def finish(text):
+        return {"reply": text, "model": opened.get("model"), "tokens": opened.get("tokens")}
+
+    return _event_stream(deltas(), finish)
+
+
+async def status(request):
+    return JSONResponse({
+        "models": health.snapshot(),
+        "text_cache": text_cache.stats(),
+        "response_cache": response_cache.stats(),
+    })
+
+
+app = Starlette(routes=[
+    Route("/analyze", analyze, methods=["POST"]),
+    Route("/cover-letter", cover_letter, methods=["POST"]),
+    Route("/chat", chat, methods=["POST"]),
+    Route("/health", status, methods=["GET"]),
+])
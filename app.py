@@ -1,11 +1,18 @@
 import streamlit as st
-import re
 import time as _time
-import requests
-from pypdf import PdfReader
-from docx import Document
-from openai import OpenAI
-import google.generativeai as genai
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from analytics import analytics
+from llm_router import RateLimiter
+from resume_core import (
+    GEMINI_MODEL, LLM_TEMPERATURE,
+    LLMSettings, MarkerParser, analysis_task, cover_letter_task, format_request,
+    complete, stream_completion, scan_markers, apply_bullets,
+    parse_batch_result, read_job_file, split_postings, JOB_DELIMITER,
+    extract_text as _extract_text,
+)
+from resume_export import DOCX_MIME, updated_documents
+from bullet_table import STYLE as BULLET_TABLE_STYLE, row_html, table_html
 
 # ==============================
 # PAGE CONFIG
@@ -255,144 +262,48 @@ GOAL_EVENTS = {
 }
 
 
-def _sb_headers():
-    return {
-        "apikey":        SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type":  "application/json",
-        "Prefer":        "return=minimal",
-    }
+# Legacy goal events from before the rename still count towards the combined total
+COUNTED_EVENTS = [EV_VISIT, EV_RUN, EV_COMBINED, EV_GAP, EV_COVER, "goal_ats", "goal_star", "goal_summary"]
+
+# Process-wide: counts are aggregated by Supabase and cached for every session (see analytics.py)
+ANALYTICS = analytics(SUPABASE_URL, SUPABASE_KEY) if ANALYTICS_ON else None
 
 
 def _fetch_supabase_counts() -> dict:
-    """Pull raw event counts directly from Supabase."""
-    if not ANALYTICS_ON:
-        return {}
-    try:
-        resp = requests.get(
-            f"{SUPABASE_URL}/rest/v1/analytics?select=event",
-            headers={**_sb_headers(), "Prefer": ""},
-            timeout=5
-        )
-        resp.raise_for_status()
-        counts = {}
-        for row in resp.json():
-            e = row.get("event", "")
-            counts[e] = counts.get(e, 0) + 1
-        return counts
-    except Exception:
-        return {}
-
-
-def track(event: str) -> bool:
-    """Write event to Supabase and update local session counts. Returns True on success."""
-    # Always update local state immediately so sidebar reflects it this render
-    if "counts" in st.session_state:
-        st.session_state.counts[event] = st.session_state.counts.get(event, 0) + 1
-
-    if not ANALYTICS_ON:
-        return True
-    try:
-        resp = requests.post(
-            f"{SUPABASE_URL}/rest/v1/analytics",
-            json={"event": event},
-            headers=_sb_headers(),
-            timeout=5
-        )
-        resp.raise_for_status()
-        return True
-    except Exception:
-        return False
+    """Event counts aggregated by Supabase, shared across sessions for a short TTL."""
+    return ANALYTICS.counts(COUNTED_EVENTS) if ANALYTICS_ON else {}
+
 
+def track(event: str):
+    """Count event in the shared totals and queue it for Supabase; never waits on the network."""
+    if ANALYTICS_ON:
+        ANALYTICS.record(event)
 
-# ── Seed local counts from Supabase ONCE per browser session ─────────
-if "counts" not in st.session_state:
-    st.session_state.counts = _fetch_supabase_counts()
 
 # ── Track first visit (once per session) ─────────────────────────────
 import streamlit.components.v1 as components
 
-# Inject JS: checks localStorage, sets ?_v=1 in URL only on genuine new visits (24h window)
-components.html("""
-<script>
-(function() {
-    const KEY  = 'rf_last_visit';
-    const now  = Date.now();
-    const last = parseInt(localStorage.getItem(KEY) || '0');
-    const TTL  = 24 * 60 * 60 * 1000;   // 24-hour cooldown per browser
-
-    if (now - last > TTL) {
-        localStorage.setItem(KEY, now);
-        const url = new URL(window.parent.location.href);
-        if (url.searchParams.get('_v') !== '1') {
-            url.searchParams.set('_v', '1');
-            window.parent.location.replace(url);  // one-time redirect to signal Python
-        }
-    }
-})();
-</script>
-""", height=0, scrolling=False)
-
-# Python only tracks when JS confirmed a fresh visit via query param
+# A browser is a new visitor when it arrives without the visit cookie (24h window).
+# Cookies come with the session's websocket handshake, so Python knows on the very
+# first run — no redirect, no second page load — and the cookie is set client-side.
+VISIT_COOKIE = "rf_visit"
+VISIT_TTL    = 24 * 60 * 60   # seconds
+
 if "visited" not in st.session_state:
     st.session_state.visited = True
-    if st.query_params.get("_v") == "1":
+    if VISIT_COOKIE not in st.context.cookies:
         #track(EV_VISIT)
-        # Strip the param so reruns don't double-count
-        clean = dict(st.query_params)
-        clean.pop("_v", None)
-        st.query_params.update(clean)
+        components.html(
+            f"<script>window.parent.document.cookie = "
+            f"'{VISIT_COOKIE}=1; max-age={VISIT_TTL}; path=/; SameSite=Lax';</script>",
+            height=0, scrolling=False
+        )
 
 
-# ==============================
-# SIDEBAR
-# ==============================
-with st.sidebar:
-    st.markdown("""
-    <div style="padding:1.2rem 0 1rem;">
-        <div style="font-family:'DM Mono',monospace; font-size:0.62rem; letter-spacing:0.22em;
-                    text-transform:uppercase; color:#c9a84c; margin-bottom:0.35rem;">✦ ResumeForge</div>
-        <div style="font-family:'Cormorant Garamond',serif; font-size:1.35rem;
-                    font-weight:300; color:#f0ede6; margin-bottom:0.25rem;">Settings</div>
-        <div style="height:1px; background:rgba(201,168,76,0.2); margin-bottom:1.4rem;"></div>
-    </div>
-    """, unsafe_allow_html=True)
-
-    PROVIDER = st.selectbox(
-        "LLM Engine",
-        [
-            "Gemini · Recommended)",
-            "Nemo via Nvidia",
-            "MiniMax"
-        ]
-    )
-
-    st.markdown("""
-    <div style="margin-top:1.8rem; padding:1.2rem; background:#0b0c0f;
-                border:1px solid rgba(201,168,76,0.18); border-radius:4px;">
-        <div style="font-family:'DM Mono',monospace; font-size:0.6rem; letter-spacing:0.18em;
-                    text-transform:uppercase; color:#c9a84c; margin-bottom:0.8rem;">How it works</div>
-        <div style="font-size:0.8rem; color:#9a958f; line-height:1.8;">
-            <div style="margin-bottom:0.4rem;">&#9312; Upload your resume</div>
-            <div style="margin-bottom:0.4rem;">&#9313; Paste the job description</div>
-            <div style="margin-bottom:0.4rem;">&#9314; Choose your goal</div>
-            <div style="margin-bottom:0.4rem;">&#9315; Add target job title <em style="color:#c9a84c;">(sharpens AI output)</em></div>
-            <div>&#9316; Run analysis &#8594; download</div>
-        </div>
-    </div>
-    <div style="margin-top:1.2rem; padding:1rem; background:rgba(201,168,76,0.06);
-                border:1px solid rgba(201,168,76,0.15); border-radius:4px;">
-        <div style="font-size:0.78rem; color:#9a958f; line-height:1.8;">
-            <span style="color:#c9a84c;">&#10022;</span> Your files are never stored on this website.<br/>
-            <span style="color:#c9a84c;">&#10022;</span> Analysis runs in real-time.<br/>
-            <span style="color:#c9a84c;">&#10022;</span> Cover letter auto-generated on ATS runs.<br/>
-            <span style="color:#c9a84c;">&#10022;</span> Download your edits instantly.
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-
+def render_analytics_card():
+    """The sidebar's Live Analytics card, or a setup hint when Supabase is not configured."""
     if ANALYTICS_ON:
-        counts         = st.session_state.counts   # seeded from Supabase, updated by track()
+        counts         = _fetch_supabase_counts()   # cached process-wide, bumped by track()
         total_visits   = counts.get(EV_VISIT,  0)
         total_runs     = counts.get(EV_RUN,     0)
         cover_count    = counts.get(EV_COVER,   0)
@@ -496,6 +407,73 @@ with st.sidebar:
         """, unsafe_allow_html=True)
 
 
+# ==============================
+# SIDEBAR
+# ==============================
+with st.sidebar:
+    st.markdown("""
+    <div style="padding:1.2rem 0 1rem;">
+        <div style="font-family:'DM Mono',monospace; font-size:0.62rem; letter-spacing:0.22em;
+                    text-transform:uppercase; color:#c9a84c; margin-bottom:0.35rem;">✦ ResumeForge</div>
+        <div style="font-family:'Cormorant Garamond',serif; font-size:1.35rem;
+                    font-weight:300; color:#f0ede6; margin-bottom:0.25rem;">Settings</div>
+        <div style="height:1px; background:rgba(201,168,76,0.2); margin-bottom:1.4rem;"></div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    PROVIDER = st.selectbox(
+        "LLM Engine",
+        [
+            "Gemini · Recommended)",
+            "Nemo via Nvidia",
+            "MiniMax"
+        ]
+    )
+    STREAM_OUTPUT = st.toggle(
+        "Stream output", value=True,
+        help="Show results as the model writes them instead of waiting for the full response."
+    )
+    FAILOVER = st.toggle(
+        "Automatic failover", value=True,
+        help="Retry busy or unavailable models and fall back to the other engines."
+    )
+    USE_CACHE = st.toggle(
+        "Reuse cached responses", value=True,
+        help="Identical resume + job description + goal runs return the earlier result instantly. "
+             "Results are held in server memory only, until the app restarts. "
+             "Turn off to force a fresh generation."
+    )
+
+    st.markdown("""
+    <div style="margin-top:1.8rem; padding:1.2rem; background:#0b0c0f;
+                border:1px solid rgba(201,168,76,0.18); border-radius:4px;">
+        <div style="font-family:'DM Mono',monospace; font-size:0.6rem; letter-spacing:0.18em;
+                    text-transform:uppercase; color:#c9a84c; margin-bottom:0.8rem;">How it works</div>
+        <div style="font-size:0.8rem; color:#9a958f; line-height:1.8;">
+            <div style="margin-bottom:0.4rem;">&#9312; Upload your resume</div>
+            <div style="margin-bottom:0.4rem;">&#9313; Paste the job description</div>
+            <div style="margin-bottom:0.4rem;">&#9314; Choose your goal</div>
+            <div style="margin-bottom:0.4rem;">&#9315; Add target job title <em style="color:#c9a84c;">(sharpens AI output)</em></div>
+            <div>&#9316; Run analysis &#8594; download</div>
+        </div>
+    </div>
+    <div style="margin-top:1.2rem; padding:1rem; background:rgba(201,168,76,0.06);
+                border:1px solid rgba(201,168,76,0.15); border-radius:4px;">
+        <div style="font-size:0.78rem; color:#9a958f; line-height:1.8;">
+            <span style="color:#c9a84c;">&#10022;</span> Your files are never written to disk on this website.<br/>
+            <span style="color:#c9a84c;">&#10022;</span> Analysis runs in real-time.<br/>
+            <span style="color:#c9a84c;">&#10022;</span> Cover letter auto-generated on ATS runs.<br/>
+            <span style="color:#c9a84c;">&#10022;</span> Download your edits instantly.
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Drawn into a placeholder so a finished analysis can redraw it with the new totals
+    analytics_card = st.empty()
+    with analytics_card.container():
+        render_analytics_card()
+
+
 # ==============================
 # CLIENT SETUP
 # ==============================
@@ -505,101 +483,95 @@ model_map = {
     "MiniMax":    "minimax/minimax-m2.5:free"
 }
 
+# Keys are read here, on the script thread, because completions also run in worker threads
+OPENROUTER_KEY = st.secrets.get("OPENROUTER_API_KEY", "")
+GEMINI_KEY     = st.secrets.get("GEMINI_API_KEY", "")
+
 if "Gemini" not in PROVIDER:
-    client = OpenAI(
-        api_key=st.secrets["OPENROUTER_API_KEY"],
-        base_url="https://openrouter.ai/api/v1"
-    )
+    if not OPENROUTER_KEY:
+        st.error("OPENROUTER_API_KEY is missing from secrets.toml.")
+        st.stop()
     MODEL_NAME = model_map.get(PROVIDER)
 else:
-    genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
-    gemini_model = genai.GenerativeModel("gemini-2.5-flash")
+    if not GEMINI_KEY:
+        st.error("GEMINI_API_KEY is missing from secrets.toml.")
+        st.stop()
+    MODEL_NAME = GEMINI_MODEL
+
+LLM = LLMSettings(
+    model=MODEL_NAME, openrouter_key=OPENROUTER_KEY, gemini_key=GEMINI_KEY,
+    failover=FAILOVER, use_cache=USE_CACHE, temperature=LLM_TEMPERATURE,
+)
 
 
 # ==============================
 # HELPERS
 # ==============================
 def extract_text(file):
-    ext = file.name.split(".")[-1].lower()
     try:
-        if ext == "pdf":
-            return "\n".join(page.extract_text() for page in PdfReader(file).pages)
-        elif ext == "docx":
-            return "\n".join(p.text for p in Document(file).paragraphs)
-        return file.read().decode("utf-8")
+        return _extract_text(file)
     except Exception as e:
         st.error(f"File reading error: {e}")
         return ""
 
 
-def inject_job_title(base_task: str, job_title: str) -> str:
-    if not job_title.strip():
-        return base_task
-    return base_task + f"""
+def _complete(system_task, user_content, add_score=True):
+    """Run one completion with the sidebar's settings. Raises on failure so it is safe off the script thread."""
+    return complete(LLM, system_task, user_content, add_score)
+
+
+def _stream(system_task, user_content, add_score=True):
+    return stream_completion(LLM, system_task, user_content, add_score)
 
-TARGET JOB TITLE: "{job_title.strip()}"
 
-Use this target job title to sharpen every part of your response:
-- Mirror the exact terminology, seniority level, and industry language a \
-hiring manager recruiting for this specific role would expect to see
-- Prioritise the skills, action verbs, and quantified achievements that carry \
-the most weight for a "{job_title.strip()}"
-- Rewrite any vague language so it reads as if crafted by — and for — a strong \
-candidate actively pursuing this exact title
-- Calibrate tone to seniority: junior/associate titles should project energy and \
-growth potential; senior/lead/director titles should project authority, scope, and \
-measurable business impact
-"""
+def stream_llm(system_task, user_content, add_score=True, on_text=None, min_interval=0.12):
+    """Stream a completion, calling on_text(text_so_far) as it grows. Returns the full text, or "" on error."""
+    text, last = "", 0.0
+    try:
+        for chunk in _stream(system_task, user_content, add_score):
+            text += chunk
+            now = _time.monotonic()
+            if on_text and now - last >= min_interval:
+                on_text(text)
+                last = now
+    except Exception as e:
+        st.error(f"LLM Error: {e}")
+        return ""
+    if on_text:
+        on_text(text)
+    return text.strip()
 
 
 def call_llm(system_task, user_content, add_score=True):
-    scoring_instruction = (
-        "\n\nCRITICAL: Begin your response with 'MATCH_SCORE: [number]' (0–100) "
-        "based on how well the resume fits the job description, followed by your analysis."
-    ) if add_score else ""
     try:
-        if "Gemini" not in PROVIDER:
-            r = client.chat.completions.create(
-                model=MODEL_NAME, temperature=0.4,
-                messages=[
-                    {"role": "system", "content": system_task + scoring_instruction},
-                    {"role": "user",   "content": user_content}
-                ]
-            )
-            return r.choices[0].message.content.strip()
-        else:
-            r = gemini_model.generate_content(f"{system_task}{scoring_instruction}\n\n{user_content}")
-            return r.text.strip()
+        return _complete(system_task, user_content, add_score)
     except Exception as e:
         st.error(f"LLM Error: {e}")
         return ""
 
 
-def generate_cover_letter(job_desc, resume_text, job_title: str):
-    title_clause  = f" for the **{job_title.strip()}** position" if job_title.strip() else ""
-    title_persona = (
-        f"\n- Write from the perspective of a strong {job_title.strip()} candidate"
-        if job_title.strip() else ""
-    )
-    system_task = f"""You are an expert career coach and professional writer.
-Write a compelling, personalized cover letter{title_clause} based on the candidate's \
-resume and the job description provided.
+def run_llm_tasks(tasks: dict, on_done=None) -> tuple[dict, dict]:
+    """Fire {name: (system_task, user_content, add_score)} completions together.
 
-The cover letter must:
-- Be 3-4 paragraphs, professional but warm in tone
-- Open with a strong hook that references the specific role and company
-- Highlight 2-3 of the candidate's most relevant experiences from their resume \
-that directly match the job requirements
-- Include at least one quantified achievement from the resume
-- Close with a confident call to action
-- NOT use generic filler phrases like "I am writing to express my interest..." \
-or "I am a hard worker"
-- Sound like a real human wrote it, not a template{title_persona}
+    Each task fails independently: returns (results, errors) keyed by task name.
+    on_done(name) is called from the script thread as each task finishes, so it may touch st.*.
+    """
+    results, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max(len(tasks), 1)) as pool:
+        futures = {pool.submit(_complete, *args): name for name, args in tasks.items()}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                results[name] = fut.result()
+            except Exception as e:
+                errors[name] = e
+            if on_done:
+                on_done(name)
+    return results, errors
 
-Output ONLY the cover letter text. Start directly with "Dear Hiring Manager," \
-or a named salutation if available."""
 
-    return call_llm(system_task, f"JOB DESCRIPTION:\n{job_desc}\n\nRESUME:\n{resume_text}", add_score=False)
+def generate_cover_letter(job_desc, resume_text, job_title: str):
+    return call_llm(cover_letter_task(job_title), format_request(job_desc, resume_text), add_score=False)
 
 
 def get_score_color(score):
@@ -614,18 +586,20 @@ def get_score_color(score):
 def make_progress_ui(steps: list):
     container = st.empty()
 
-    def render(current_i):
+    def render(current_i, done=()):
+        # done: extra step indices already finished out of order (concurrent tasks)
         if current_i is None:
             container.empty()
             return
 
-        total   = len(steps) - 1
-        bar_pct = int(current_i / total * 100)
+        total    = len(steps) - 1
+        finished = set(range(current_i)) | set(done)
+        bar_pct  = int(len(finished) / total * 100)
         icon, label = steps[current_i]
 
         dots_html = ""
         for si, (sicon, slabel) in enumerate(steps):
-            if si < current_i:
+            if si in finished:
                 dot_bg, dot_color, text_color, content = "#28A745", "#0b0c0f", "#28A745", "&#10003;"
             elif si == current_i:
                 dot_bg, dot_color, text_color, content = "#c9a84c", "#0b0c0f", "#f0ede6", sicon
@@ -634,7 +608,7 @@ def make_progress_ui(steps: list):
 
             connector = (
                 f"<div style='flex:1; height:2px; margin:0 4px; align-self:center; border-radius:1px;"
-                f"background:{'#28A745' if si < current_i else 'rgba(201,168,76,0.12)'};"
+                f"background:{'#28A745' if si in finished else 'rgba(201,168,76,0.12)'};"
                 f"'></div>"
             ) if si < len(steps) - 1 else ""
 
@@ -677,50 +651,284 @@ def make_progress_ui(steps: list):
     return render
 
 
-def parse_bullet_pairs(text: str) -> list[dict]:
-    """Parse ---BULLET--- blocks into list of {original, rewritten} dicts."""
-    pairs = []
-    blocks = re.findall(r"---BULLET---\s*(.*?)\s*---END---", text, re.DOTALL)
-    for block in blocks:
-        orig_match = re.search(r"ORIGINAL:\s*(.+?)(?=\nREWRITTEN:)", block, re.DOTALL)
-        new_match  = re.search(r"REWRITTEN:\s*(.+?)$",                block, re.DOTALL)
-        if orig_match and new_match:
-            pairs.append({
-                "original":  orig_match.group(1).strip(),
-                "rewritten": new_match.group(1).strip(),
-            })
-    return pairs
-
-
-def parse_combined_result(text: str) -> dict:
-    """Extract original summary, new summary, ATS keywords, and bullet pairs from combined LLM output."""
-    orig_summ_match = re.search(r"---ORIGINAL_SUMMARY---\s*(.*?)\s*---END_ORIGINAL_SUMMARY---", text, re.DOTALL)
-    summary_match   = re.search(r"---SUMMARY---\s*(.*?)\s*---END_SUMMARY---",                   text, re.DOTALL)
-    ats_match       = re.search(r"---ATS_KEYWORDS---\s*(.*?)\s*---END_ATS---",                  text, re.DOTALL)
-
-    original_summary = orig_summ_match.group(1).strip() if orig_summ_match else ""
-    if original_summary.upper() == "NONE":
-        original_summary = ""
-
-    summary  = summary_match.group(1).strip() if summary_match else ""
-    keywords = [k.strip() for k in ats_match.group(1).split(",") if k.strip()] if ats_match else []
-    pairs    = parse_bullet_pairs(text)
-
-    return {
-        "original_summary": original_summary,
-        "summary":          summary,
-        "keywords":         keywords,
-        "pairs":            pairs,
-    }
-
-
-def build_updated_resume(original_text: str, pairs: list[dict]) -> str:
-    """Replace original bullets in resume text with rewritten versions."""
-    updated = original_text
-    for p in pairs:
-        if p["original"] in updated:
-            updated = updated.replace(p["original"], p["rewritten"], 1)
-    return updated
+def make_live_preview(is_combined: bool):
+    """Render a streamed response as it arrives: bullet rows for the combined goal, markdown otherwise."""
+    status = st.empty()
+    if not is_combined:
+        body   = st.empty()
+        reader = MarkerParser()
+
+        def update(text):
+            reader.feed(text)
+            body.markdown(reader.body())
+        return update
+
+    rows   = st.container()
+    reader = MarkerParser()
+    shown  = [0]
+    rows.html(BULLET_TABLE_STYLE)
+
+    def update(text):
+        for pair in reader.feed(text):
+            rows.html(row_html(shown[0], pair["original"], pair["rewritten"]))
+            shown[0] += 1
+        status.markdown(
+            f"<div style='font-family:DM Mono,monospace; font-size:0.62rem; letter-spacing:0.16em;"
+            f"text-transform:uppercase; color:#9a958f; margin-bottom:0.6rem;'>"
+            f"<span style='color:#c9a84c;'>&#10022;</span> &nbsp;Streaming &middot; "
+            f"{shown[0]} bullet{'s' if shown[0] != 1 else ''} rewritten so far</div>",
+            unsafe_allow_html=True)
+    return update
+
+
+# ==============================
+# RESULT SECTIONS
+# ==============================
+# Download buttons don't rerun anything (on_click="ignore"), and Apply Changes is a
+# fragment, so using the results only re-executes the part that changed.
+def render_summary(parsed: dict):
+    """Professional summary before/after, with a download of the new one."""
+    st.markdown("""
+    <div style="font-family:'DM Mono',monospace; font-size:0.6rem; letter-spacing:0.18em;
+                text-transform:uppercase; color:#c9a84c; margin-bottom:0.6rem;
+                display:flex; align-items:center; gap:0.5rem;">
+        <span style="display:inline-block;width:14px;height:1px;background:#c9a84c;"></span>
+        ① Professional Summary
+    </div>
+    """, unsafe_allow_html=True)
+    sh1, sh2 = st.columns(2, gap="large")
+    with sh1:
+        st.markdown("""<div style="font-family:'DM Mono',monospace; font-size:0.6rem;
+            letter-spacing:0.16em; text-transform:uppercase; color:#6a6560;
+            padding:0.5rem 0.8rem; background:#0b0c0f;
+            border:1px solid rgba(255,255,255,0.06);
+            border-radius:4px 4px 0 0; text-align:center;">✗ &nbsp; Before</div>""",
+            unsafe_allow_html=True)
+        st.markdown(
+            f"<div style='background:#0d0e12; border:1px solid rgba(255,255,255,0.07);"
+            f"border-top:none; padding:1.2rem; font-size:0.92rem;"
+            f"color:#f0ede6; line-height:1.85;'>"
+            f"{'<span style=\"color:#4a4845;font-style:italic;\">No existing summary found.</span>' if not parsed['original_summary'] else parsed['original_summary']}"
+            f"</div>", unsafe_allow_html=True)
+    with sh2:
+        st.markdown("""<div style="font-family:'DM Mono',monospace; font-size:0.6rem;
+            letter-spacing:0.16em; text-transform:uppercase; color:#c9a84c;
+            padding:0.5rem 0.8rem; background:#0b0c0f;
+            border:1px solid rgba(201,168,76,0.25);
+            border-radius:4px 4px 0 0; text-align:center;">✦ &nbsp; After</div>""",
+            unsafe_allow_html=True)
+        st.markdown(
+            f"<div style='background:#0d0e12; border:1px solid rgba(201,168,76,0.18);"
+            f"border-top:none; border-left:3px solid #c9a84c;"
+            f"padding:1.2rem; font-size:0.92rem; color:#e8c87a; line-height:1.85;'>"
+            f"<span style='color:#c9a84c;font-size:0.7rem;'>✦</span>&nbsp;{parsed['summary']}</div>",
+            unsafe_allow_html=True)
+    st.markdown("<br/>", unsafe_allow_html=True)
+    sc1, _ = st.columns([1, 4])
+    with sc1:
+        st.download_button("↓  Download Summary", data=parsed["summary"],
+                           file_name="professional_summary.txt", mime="text/plain",
+                           key="dl_summary", on_click="ignore")
+    st.markdown("<br/>", unsafe_allow_html=True)
+
+
+def render_keywords(keywords: list[str]):
+    """Missing ATS keywords as pills."""
+    st.markdown("""
+    <div style="font-family:'DM Mono',monospace; font-size:0.6rem; letter-spacing:0.18em;
+                text-transform:uppercase; color:#c9a84c; margin-bottom:0.6rem;
+                display:flex; align-items:center; gap:0.5rem;">
+        <span style="display:inline-block;width:14px;height:1px;background:#c9a84c;"></span>
+        ② Missing ATS Keywords to Add
+    </div>""", unsafe_allow_html=True)
+    pills_html = "".join([
+        f"<span style='display:inline-block; background:rgba(201,168,76,0.09);"
+        f"border:1px solid rgba(201,168,76,0.28); border-radius:20px;"
+        f"padding:0.25rem 0.8rem; font-family:DM Mono,monospace; font-size:0.7rem;"
+        f"color:#e8c87a; margin:0.2rem;'>{kw}</span>"
+        for kw in keywords
+    ])
+    st.markdown(
+        f"<div style='background:#111318; border:1px solid rgba(201,168,76,0.15);"
+        f"border-radius:6px; padding:1rem 1.2rem; margin-bottom:1.8rem;"
+        f"line-height:2.2;'>{pills_html}</div>", unsafe_allow_html=True)
+
+
+def render_bullet_table(pairs: list[dict]):
+    """Every bullet rewrite, before beside after."""
+    st.markdown(f"""
+    <div style="font-family:'DM Mono',monospace; font-size:0.6rem; letter-spacing:0.18em;
+                text-transform:uppercase; color:#c9a84c; margin-bottom:0.6rem;
+                display:flex; align-items:center; gap:0.5rem;">
+        <span style="display:inline-block;width:14px;height:1px;background:#c9a84c;"></span>
+        ③ Bullet Rewrites — {len(pairs)} total
+    </div>""", unsafe_allow_html=True)
+
+    # One element for the whole table instead of a row of columns per bullet (bullet_table.py)
+    st.html(table_html(pairs))
+
+
+@st.fragment
+def apply_changes(res: dict, pairs: list[dict]):
+    """Apply Changes, the updated resume downloads and the match report; reruns on its own."""
+    st.markdown("<br/>", unsafe_allow_html=True)
+    st.markdown("""
+    <div style="padding:1.2rem 1.5rem; background:rgba(201,168,76,0.06);
+                border:1px solid rgba(201,168,76,0.2); border-radius:6px; margin-bottom:1rem;">
+        <div style="font-family:'DM Mono',monospace; font-size:0.62rem;
+                    letter-spacing:0.14em; text-transform:uppercase;
+                    color:#c9a84c; margin-bottom:0.4rem;">&#10022; Apply All Changes</div>
+        <p style="font-size:0.83rem; color:#9a958f; margin:0; line-height:1.7;">
+            Click <strong style='color:#f0ede6;'>Apply &amp; Download</strong> to merge
+            all rewritten bullets into your original resume and download the updated file.
+        </p>
+    </div>""", unsafe_allow_html=True)
+
+    if "updated_resume" not in st.session_state:
+        st.session_state.updated_resume = None
+
+    ac1, ac2, ac3, ac4, _ = st.columns([1.3, 1.2, 1.2, 1.2, 1.8])
+    with ac1:
+        if st.button("✦  Apply Changes", type="primary", key="apply_bullets"):
+            updated, applied = apply_bullets(res["resume_text"], pairs)
+            st.session_state.updated_resume = updated
+            st.session_state.bullet_report  = applied
+            # Built now rather than on every rerun: the upload's own .docx, or one laid out from the text
+            st.session_state.updated_docs   = updated_documents(
+                res.get("resume_name", ""), res.get("resume_data"), updated, pairs)
+    if st.session_state.updated_resume:
+        docs = st.session_state.get("updated_docs") or {}
+        with ac2:
+            st.download_button("↓  Download .txt",
+                               data=st.session_state.updated_resume,
+                               file_name="resume_updated.txt", mime="text/plain",
+                               key="dl_updated_txt", on_click="ignore")
+        if docs.get("docx"):
+            with ac3:
+                st.download_button("↓  Download .docx", data=docs["docx"],
+                                   file_name="resume_updated.docx",
+                                   mime=DOCX_MIME, key="dl_updated_docx", on_click="ignore")
+        if docs.get("pdf"):
+            with ac4:
+                st.download_button("↓  Download .pdf", data=docs["pdf"],
+                                   file_name="resume_updated.pdf",
+                                   mime="application/pdf", key="dl_updated_pdf", on_click="ignore")
+
+    report = st.session_state.get("bullet_report")
+    if st.session_state.updated_resume and report:
+        found  = [r for r in report if r["status"] != "missing"]
+        approx = [r for r in report if r["status"] == "fuzzy"]
+        st.success(f"✓  {len(found)} of {len(report)} bullets applied"
+                   + (f" · {len(approx)} matched approximately" if approx else "") + ".")
+        unsure = [r for r in report if r["status"] in ("fuzzy", "missing")]
+        if unsure:
+            with st.expander(f"Match report · {len(unsure)} bullet{'s' if len(unsure) != 1 else ''} to check"):
+                for r in unsure:
+                    label = (f"≈ {r['ratio']:.0%} similar" if r["status"] == "fuzzy"
+                             else "not found in the resume — left unchanged")
+                    st.caption(label)
+                    st.text(r["original"])
+
+
+def render_cover_letter(cover_letter_text: str):
+    """The tailored cover letter with .txt/.doc downloads."""
+    st.markdown("<hr/>", unsafe_allow_html=True)
+    st.markdown("""
+    <div style="margin-bottom:1.4rem;">
+        <div style="font-family:'DM Mono',monospace; font-size:0.62rem; letter-spacing:0.2em;
+                    text-transform:uppercase; color:#c9a84c; margin-bottom:0.35rem;
+                    display:flex; align-items:center; gap:0.6rem;">
+            <span style="display:inline-block;width:18px;height:1px;background:#c9a84c;"></span>Bonus
+        </div>
+        <div style="font-family:'Cormorant Garamond',serif; font-size:1.75rem;
+                    font-weight:300; color:#f0ede6; margin-bottom:0.4rem;">
+            Your Tailored Cover Letter
+        </div>
+        <p style="font-family:'DM Sans',sans-serif; font-size:0.85rem; color:#9a958f;
+                  font-weight:300; max-width:560px; line-height:1.7; margin:0;">
+            Written specifically for this role using your resume and the job description.
+            Edit freely before sending.
+        </p>
+    </div>""", unsafe_allow_html=True)
+
+    st.markdown(f'<div class="cover-letter-box">{cover_letter_text}</div>', unsafe_allow_html=True)
+    st.markdown("<br/>", unsafe_allow_html=True)
+
+    cl1, cl2, _ = st.columns([1, 1, 3])
+    with cl1:
+        st.download_button("↓  Download .txt", data=cover_letter_text,
+                           file_name="cover_letter.txt", mime="text/plain",
+                           key="dl_cover_txt", on_click="ignore")
+    with cl2:
+        st.download_button("↓  Download .doc",
+                           data=cover_letter_text.replace("\n", "\r\n"),
+                           file_name="cover_letter.doc",
+                           mime="application/msword", key="dl_cover_doc", on_click="ignore")
+
+    st.markdown("""
+    <div style="margin-top:1rem; padding:0.9rem 1.2rem; background:rgba(201,168,76,0.05);
+                border-left:2px solid rgba(201,168,76,0.4); border-radius:0 4px 4px 0;">
+        <span style="font-family:'DM Mono',monospace; font-size:0.62rem;
+                     letter-spacing:0.14em; text-transform:uppercase; color:#c9a84c;">&#10022; Tip</span>
+        <p style="font-family:'DM Sans',sans-serif; font-size:0.82rem; color:#9a958f;
+                  margin:0.3rem 0 0; line-height:1.7;">
+            Personalise the opening line with the hiring manager's name if you can find it on LinkedIn.
+            A named salutation can increase response rates by up to 20%.
+        </p>
+    </div>""", unsafe_allow_html=True)
+
+
+# ==============================
+# BATCH SCORING HELPERS
+# ==============================
+BATCH_MAX_JOBS  = 100
+BATCH_RPM       = 20      # OpenRouter free-tier request budget per minute
+
+
+def parse_job_batch(upload, pasted: str) -> list[dict]:
+    """Job postings from a CSV/JSONL upload and/or text separated by lines of '---'.
+
+    CSV/JSONL rows need a description column (description / job_description / jd / text);
+    title and url/link columns are used when present.
+    """
+    jobs = []
+    if upload is not None:
+        try:
+            jobs = read_job_file(upload.getvalue().decode("utf-8-sig", errors="replace"), upload.name)
+        except ValueError as e:
+            st.warning(f"Skipped the uploaded postings: {e}.")
+    jobs += split_postings(pasted)
+    return jobs[:BATCH_MAX_JOBS]
+
+
+def run_batch(jobs: list[dict], resume_text: str, job_title: str, concurrency: int, on_done=None) -> list[dict]:
+    """Score resume_text against every job with at most `concurrency` requests in flight.
+
+    Request starts are paced by a shared token bucket so the free tier's per-minute limit
+    isn't blown; 429s that still happen are retried/failed over by the router. Jobs fail
+    independently — a failed one comes back with an "error" and no score.
+    """
+    limiter     = RateLimiter(BATCH_RPM)
+    system_task, add_score = analysis_task("score", job_title)
+
+    def _score(job):
+        limiter.acquire()
+        raw = _complete(system_task, format_request(job["description"], resume_text), add_score)
+        return {**job, **parse_batch_result(raw), "raw": raw, "error": ""}
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {pool.submit(_score, job): job for job in jobs}
+        for fut in as_completed(futures):
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                results.append({**futures[fut], "score": None, "keywords": [], "verdict": "",
+                                "raw": "", "error": str(e)})
+            if on_done:
+                on_done(len(results), len(jobs))
+    results.sort(key=lambda r: -1 if r["score"] is None else r["score"], reverse=True)
+    return results
 
 
 # ==============================
@@ -777,7 +985,7 @@ col1, col2 = st.columns(2, gap="large")
 with col1:
     resume_file = st.file_uploader(
         "Upload Resume", type=["pdf", "docx", "txt"],
-        help="Your file is processed in memory and never stored."
+        help="Your file is processed in memory and never written to disk."
     )
 with col2:
     job_desc = st.text_area(
@@ -790,38 +998,6 @@ st.markdown("<hr/>", unsafe_allow_html=True)
 # ==============================
 # GOAL + JOB TITLE
 # ==============================
-COMBINED_PROMPT = """You are an expert resume coach. Perform a full 3-part resume optimization in one pass.
-
-OUTPUT FORMAT — use these exact markers, in this exact order, no other text:
-
-MATCH_SCORE: [0-100 based on how well the resume fits the job description]
-
----ORIGINAL_SUMMARY---
-[Copy the candidate's existing professional summary or objective statement verbatim from the resume. If none exists, write: NONE]
----END_ORIGINAL_SUMMARY---
-
----SUMMARY---
-[Write a compelling 3-4 sentence professional summary that bridges the candidate's experience to this specific job. Mirror the exact seniority, vocabulary and industry language of the role. Do NOT use generic openers like "Results-driven professional".]
----END_SUMMARY---
-
----ATS_KEYWORDS---
-[List the top 10-15 keywords and phrases extracted from the job description that are missing or underrepresented in the resume. Comma-separated. Include hard skills, tools, certifications, and role-specific terminology.]
----END_ATS---
-
-[Then output every work-experience bullet point as a block below. Include ALL bullets from ALL jobs:]
----BULLET---
-ORIGINAL: [exact original bullet text, copied verbatim from the resume]
-REWRITTEN: [rewritten version — strong action verb, quantified outcome, ATS keywords woven in naturally]
----END---
-
-RULES:
-- Output NOTHING outside these markers — no intro, no section titles, no commentary
-- ORIGINAL must be the exact text from the resume, never paraphrased
-- Weave ATS keywords naturally into the REWRITTEN bullets — never stuff them
-- Cover every bullet from every role, not just a selection"""
-
-GAP_PROMPT = "Compare my resume against the job description. Identify exactly what hard and soft skills I am currently missing, split into Hard Skills and Soft Skills sections. For each missing skill, briefly explain why it matters for this role."
-
 col3, col4 = st.columns([1.2, 1], gap="large")
 with col3:
     selected_strategy = st.selectbox(
@@ -881,49 +1057,91 @@ if run:
     elif not job_desc.strip():
         st.warning("Please paste a job description to match against.")
     else:
-        system_task = inject_job_title(
-            COMBINED_PROMPT if is_combined else GAP_PROMPT,
-            job_title
-        )
-
-        steps_base = [
-            ("📄", "Reading resume"),
-            ("🔍", "Parsing job description"),
-            ("🤖", "Running AI analysis"),
-            ("✅", "Complete"),
-        ]
-        steps_combined = [
-            ("📄", "Reading resume"),
-            ("🔍", "Parsing job description"),
-            ("🤖", "Optimizing resume"),
-            ("✉️", "Generating cover letter"),
-            ("✅", "Complete"),
-        ]
-        steps = steps_combined if is_combined else steps_base
-        total = len(steps) - 1
-
-        render_progress = make_progress_ui(steps)
-
-        render_progress(0)
-        resume_text = extract_text(resume_file)
-
-        render_progress(1)
-        _time.sleep(0.35)
-
-        render_progress(2)
-        result = call_llm(system_task, f"JOB DESCRIPTION:\n{job_desc}\n\nRESUME:\n{resume_text}")
-
-        cover_letter_text = ""
-        if is_combined and result:
-            render_progress(3)
-            cover_letter_text = generate_cover_letter(job_desc, resume_text, job_title)
+        # Progress and the live preview are cleared once the results below take their place
+        run_view = st.empty()
+        with run_view.container():
+            # Same prompt as resume_cli and the API send, so llm_cache entries are shared
+            system_task, add_score = analysis_task("combined" if is_combined else "gap", job_title)
+
+            steps_base = [
+                ("📄", "Reading resume"),
+                ("🔍", "Parsing job description"),
+                ("🤖", "Running AI analysis"),
+                ("✅", "Complete"),
+            ]
+            steps_combined = [
+                ("📄", "Reading resume"),
+                ("🔍", "Parsing job description"),
+                ("🤖", "Optimizing resume"),
+                ("✉️", "Generating cover letter"),
+                ("✅", "Complete"),
+            ]
+            steps = steps_combined if is_combined else steps_base
+            total = len(steps) - 1
+
+            render_progress = make_progress_ui(steps)
+
+            render_progress(0)
+            resume_text = extract_text(resume_file)
+
+            render_progress(1)
+            _time.sleep(0.35)
+
+            render_progress(2)
+            user_content = format_request(job_desc, resume_text)
+
+            cover_letter_text = ""
+            if is_combined and STREAM_OUTPUT:
+                # Cover letter runs in the background while the optimization streams into the page
+                with ThreadPoolExecutor(max_workers=1) as pool:
+                    cover_future = pool.submit(_complete, cover_letter_task(job_title), user_content, False)
+                    live = make_live_preview(is_combined)
+
+                    cover_marked = [False]
+
+                    def _on_text(text):
+                        live(text)
+                        if cover_future.done() and not cover_marked[0]:
+                            cover_marked[0] = True
+                            render_progress(2, done={3})
+
+                    result = stream_llm(system_task, user_content, add_score, on_text=_on_text)
+                    render_progress(3, done={3} if cover_future.done() else ())
+                    try:
+                        cover_letter_text = cover_future.result() if result else ""
+                    except Exception as e:
+                        st.error(f"LLM Error (cover letter): {e}")
+            elif is_combined:
+                # Cover letter doesn't depend on the optimization output — run both at once
+                finished_tasks = set()
+
+                def _on_task_done(name):
+                    finished_tasks.add(name)
+                    if "optimize" in finished_tasks:
+                        render_progress(3, done={3} if "cover" in finished_tasks else ())
+                    else:
+                        render_progress(2, done={3})
+
+                results, errors = run_llm_tasks({
+                    "optimize": (system_task, user_content, add_score),
+                    "cover":    (cover_letter_task(job_title), user_content, False),
+                }, on_done=_on_task_done)
+                for name, err in errors.items():
+                    st.error(f"LLM Error ({'cover letter' if name == 'cover' else 'optimization'}): {err}")
+                result = results.get("optimize", "")
+                if result:
+                    cover_letter_text = results.get("cover", "")
+            elif STREAM_OUTPUT:
+                result = stream_llm(system_task, user_content, add_score, on_text=make_live_preview(is_combined))
+            else:
+                result = call_llm(system_task, user_content, add_score)
 
-        render_progress(total)
-        _time.sleep(0.6)
-        render_progress(None)
+            render_progress(total)
+            _time.sleep(0.6)
+            render_progress(None)
 
         if result:
-            # Track AFTER LLM succeeds, then store + rerun so sidebar refreshes
+            # Track AFTER LLM succeeds; the results render below in this same run
             track(EV_RUN)
             track(EV_COMBINED if is_combined else EV_GAP)
             if cover_letter_text:
@@ -933,16 +1151,18 @@ if run:
                 "result":             result,
                 "cover_letter_text":  cover_letter_text,
                 "resume_text":        resume_text,
+                "resume_name":        resume_file.name,
+                "resume_data":        resume_file.getvalue(),
                 "is_combined":        is_combined,
                 "job_title":          job_title,
                 "provider":           PROVIDER,
             }
             st.session_state.updated_resume = None
-            # Brief pause so Supabase finishes committing before we rerun
-            _time.sleep(0.8)
-            # Re-seed counts so sidebar shows updated numbers immediately after rerun
-            st.session_state.counts = _fetch_supabase_counts()
-            st.rerun()
+            st.session_state.updated_docs   = {}
+            st.session_state.bullet_report  = None
+            run_view.empty()
+            with analytics_card.container():
+                render_analytics_card()
 
 # ── Display stored results (persists across reruns) ───────────────────
 if st.session_state.get("analysis_result"):
@@ -956,11 +1176,12 @@ if st.session_state.get("analysis_result"):
     job_title    = res["job_title"]
     provider     = res["provider"]
 
-    score_match = re.search(r"MATCH_SCORE:\s*(\d+)", result)
-    if score_match:
-        score_val    = int(score_match.group(1))
+    # One pass over the response gives the score, the text to display and every section
+    markers      = scan_markers(result)
+    display_text = markers.body()
+    if markers.score is not None:
+        score_val    = markers.score
         color        = get_score_color(score_val)
-        display_text = result.replace(score_match.group(0), "").strip()
         score_label  = (
             "Strong Match" if score_val >= 80
             else "Partial Match" if score_val >= 50
@@ -998,8 +1219,6 @@ if st.session_state.get("analysis_result"):
                 </div>
             </div>
             """, unsafe_allow_html=True)
-    else:
-        display_text = result
     # ── Application Recommendation Banner ───────────────────────────
     if score_val >= 70:
         rec_bg      = "rgba(40,167,69,0.08)"
@@ -1090,7 +1309,7 @@ if st.session_state.get("analysis_result"):
 
     # ── COMBINED OPTIMIZATION UI ─────────────────────────────────────
     if is_combined:
-        parsed = parse_combined_result(display_text)
+        parsed = markers.combined()
 
         # Header
         st.markdown(f"""
@@ -1114,147 +1333,16 @@ if st.session_state.get("analysis_result"):
 
         # ① Summary Before / After
         if parsed["summary"]:
-            st.markdown("""
-            <div style="font-family:'DM Mono',monospace; font-size:0.6rem; letter-spacing:0.18em;
-                        text-transform:uppercase; color:#c9a84c; margin-bottom:0.6rem;
-                        display:flex; align-items:center; gap:0.5rem;">
-                <span style="display:inline-block;width:14px;height:1px;background:#c9a84c;"></span>
-                ① Professional Summary
-            </div>
-            """, unsafe_allow_html=True)
-            sh1, sh2 = st.columns(2, gap="large")
-            with sh1:
-                st.markdown("""<div style="font-family:'DM Mono',monospace; font-size:0.6rem;
-                    letter-spacing:0.16em; text-transform:uppercase; color:#6a6560;
-                    padding:0.5rem 0.8rem; background:#0b0c0f;
-                    border:1px solid rgba(255,255,255,0.06);
-                    border-radius:4px 4px 0 0; text-align:center;">✗ &nbsp; Before</div>""",
-                    unsafe_allow_html=True)
-                st.markdown(
-                    f"<div style='background:#0d0e12; border:1px solid rgba(255,255,255,0.07);"
-                    f"border-top:none; padding:1.2rem; font-size:0.92rem;"
-                    f"color:#f0ede6; line-height:1.85;'>"
-                    f"{'<span style=\"color:#4a4845;font-style:italic;\">No existing summary found.</span>' if not parsed['original_summary'] else parsed['original_summary']}"
-                    f"</div>", unsafe_allow_html=True)
-            with sh2:
-                st.markdown("""<div style="font-family:'DM Mono',monospace; font-size:0.6rem;
-                    letter-spacing:0.16em; text-transform:uppercase; color:#c9a84c;
-                    padding:0.5rem 0.8rem; background:#0b0c0f;
-                    border:1px solid rgba(201,168,76,0.25);
-                    border-radius:4px 4px 0 0; text-align:center;">✦ &nbsp; After</div>""",
-                    unsafe_allow_html=True)
-                st.markdown(
-                    f"<div style='background:#0d0e12; border:1px solid rgba(201,168,76,0.18);"
-                    f"border-top:none; border-left:3px solid #c9a84c;"
-                    f"padding:1.2rem; font-size:0.92rem; color:#e8c87a; line-height:1.85;'>"
-                    f"<span style='color:#c9a84c;font-size:0.7rem;'>✦</span>&nbsp;{parsed['summary']}</div>",
-                    unsafe_allow_html=True)
-            st.markdown("<br/>", unsafe_allow_html=True)
-            sc1, _ = st.columns([1, 4])
-            with sc1:
-                st.download_button("↓  Download Summary", data=parsed["summary"],
-                                   file_name="professional_summary.txt", mime="text/plain",
-                                   key="dl_summary")
-            st.markdown("<br/>", unsafe_allow_html=True)
+            render_summary(parsed)
 
         # ② ATS Keywords
         if parsed["keywords"]:
-            st.markdown("""
-            <div style="font-family:'DM Mono',monospace; font-size:0.6rem; letter-spacing:0.18em;
-                        text-transform:uppercase; color:#c9a84c; margin-bottom:0.6rem;
-                        display:flex; align-items:center; gap:0.5rem;">
-                <span style="display:inline-block;width:14px;height:1px;background:#c9a84c;"></span>
-                ② Missing ATS Keywords to Add
-            </div>""", unsafe_allow_html=True)
-            pills_html = "".join([
-                f"<span style='display:inline-block; background:rgba(201,168,76,0.09);"
-                f"border:1px solid rgba(201,168,76,0.28); border-radius:20px;"
-                f"padding:0.25rem 0.8rem; font-family:DM Mono,monospace; font-size:0.7rem;"
-                f"color:#e8c87a; margin:0.2rem;'>{kw}</span>"
-                for kw in parsed["keywords"]
-            ])
-            st.markdown(
-                f"<div style='background:#111318; border:1px solid rgba(201,168,76,0.15);"
-                f"border-radius:6px; padding:1rem 1.2rem; margin-bottom:1.8rem;"
-                f"line-height:2.2;'>{pills_html}</div>", unsafe_allow_html=True)
+            render_keywords(parsed["keywords"])
 
         # ③ Bullet Before/After
         if parsed["pairs"]:
-            st.markdown(f"""
-            <div style="font-family:'DM Mono',monospace; font-size:0.6rem; letter-spacing:0.18em;
-                        text-transform:uppercase; color:#c9a84c; margin-bottom:0.6rem;
-                        display:flex; align-items:center; gap:0.5rem;">
-                <span style="display:inline-block;width:14px;height:1px;background:#c9a84c;"></span>
-                ③ Bullet Rewrites — {len(parsed['pairs'])} total
-            </div>""", unsafe_allow_html=True)
-
-            h1, h2 = st.columns(2, gap="large")
-            with h1:
-                st.markdown("""<div style="font-family:'DM Mono',monospace; font-size:0.6rem;
-                    letter-spacing:0.16em; text-transform:uppercase; color:#6a6560;
-                    padding:0.5rem 0.8rem; background:#0b0c0f;
-                    border:1px solid rgba(255,255,255,0.06);
-                    border-radius:4px 4px 0 0; text-align:center;">✗ &nbsp; Before</div>""",
-                    unsafe_allow_html=True)
-            with h2:
-                st.markdown("""<div style="font-family:'DM Mono',monospace; font-size:0.6rem;
-                    letter-spacing:0.16em; text-transform:uppercase; color:#c9a84c;
-                    padding:0.5rem 0.8rem; background:#0b0c0f;
-                    border:1px solid rgba(201,168,76,0.25);
-                    border-radius:4px 4px 0 0; text-align:center;">✦ &nbsp; After</div>""",
-                    unsafe_allow_html=True)
-
-            for i, pair in enumerate(parsed["pairs"]):
-                c1, c2 = st.columns(2, gap="large")
-                bg_row = "#0d0e12" if i % 2 == 0 else "#111318"
-                with c1:
-                    st.markdown(
-                        f"<div style='background:{bg_row}; border:1px solid rgba(255,255,255,0.07);"
-                        f"border-top:none; padding:0.85rem 1rem; font-size:0.88rem;"
-                        f"color:#f0ede6; line-height:1.7; min-height:60px;'>"
-                        f"<span style='color:#6a6560;font-size:0.75rem;'>—</span>"
-                        f"&nbsp;{pair['original']}</div>", unsafe_allow_html=True)
-                with c2:
-                    st.markdown(
-                        f"<div style='background:{bg_row}; border:1px solid rgba(201,168,76,0.18);"
-                        f"border-top:none; border-left:3px solid #c9a84c;"
-                        f"padding:0.85rem 1rem; font-size:0.88rem;"
-                        f"color:#e8c87a; line-height:1.7; min-height:60px;'>"
-                        f"<span style='color:#c9a84c;font-size:0.7rem;'>✦</span>"
-                        f"&nbsp;{pair['rewritten']}</div>", unsafe_allow_html=True)
-
-            st.markdown("<br/>", unsafe_allow_html=True)
-            st.markdown("""
-            <div style="padding:1.2rem 1.5rem; background:rgba(201,168,76,0.06);
-                        border:1px solid rgba(201,168,76,0.2); border-radius:6px; margin-bottom:1rem;">
-                <div style="font-family:'DM Mono',monospace; font-size:0.62rem;
-                            letter-spacing:0.14em; text-transform:uppercase;
-                            color:#c9a84c; margin-bottom:0.4rem;">&#10022; Apply All Changes</div>
-                <p style="font-size:0.83rem; color:#9a958f; margin:0; line-height:1.7;">
-                    Click <strong style='color:#f0ede6;'>Apply &amp; Download</strong> to merge
-                    all rewritten bullets into your original resume and download the updated file.
-                </p>
-            </div>""", unsafe_allow_html=True)
-
-            if "updated_resume" not in st.session_state:
-                st.session_state.updated_resume = None
-
-            ac1, ac2, ac3, _ = st.columns([1.3, 1.2, 1.2, 3])
-            with ac1:
-                if st.button("✦  Apply Changes", type="primary", key="apply_bullets"):
-                    st.session_state.updated_resume = build_updated_resume(resume_text, parsed["pairs"])
-                    st.success(f"✓  {len(parsed['pairs'])} bullets applied.")
-            if st.session_state.updated_resume:
-                with ac2:
-                    st.download_button("↓  Download .txt",
-                                       data=st.session_state.updated_resume,
-                                       file_name="resume_updated.txt", mime="text/plain",
-                                       key="dl_updated_txt")
-                with ac3:
-                    st.download_button("↓  Download .doc",
-                                       data=st.session_state.updated_resume.replace("\n", "\r\n"),
-                                       file_name="resume_updated.doc",
-                                       mime="application/msword", key="dl_updated_doc")
+            render_bullet_table(parsed["pairs"])
+            apply_changes(res, parsed["pairs"])
 
         elif not parsed["summary"] and not parsed["keywords"]:
             st.markdown(display_text)
@@ -1262,7 +1350,8 @@ if st.session_state.get("analysis_result"):
             dcol1, _ = st.columns([1, 4])
             with dcol1:
                 st.download_button("↓  Download Analysis", data=display_text,
-                                   file_name="resume_analysis.txt", mime="text/plain")
+                                   file_name="resume_analysis.txt", mime="text/plain",
+                                   on_click="ignore")
 
     # ── SKILLS GAP ───────────────────────────────────────────────────
     else:
@@ -1271,50 +1360,82 @@ if st.session_state.get("analysis_result"):
         dcol1, _ = st.columns([1, 4])
         with dcol1:
             st.download_button("↓  Download Analysis", data=display_text,
-                               file_name="skills_gap.txt", mime="text/plain")
+                               file_name="skills_gap.txt", mime="text/plain",
+                               on_click="ignore")
 
     # ── COVER LETTER ─────────────────────────────────────────────────
     if cover_letter_text:
-        st.markdown("<hr/>", unsafe_allow_html=True)
-        st.markdown("""
-        <div style="margin-bottom:1.4rem;">
-            <div style="font-family:'DM Mono',monospace; font-size:0.62rem; letter-spacing:0.2em;
-                        text-transform:uppercase; color:#c9a84c; margin-bottom:0.35rem;
-                        display:flex; align-items:center; gap:0.6rem;">
-                <span style="display:inline-block;width:18px;height:1px;background:#c9a84c;"></span>Bonus
-            </div>
-            <div style="font-family:'Cormorant Garamond',serif; font-size:1.75rem;
-                        font-weight:300; color:#f0ede6; margin-bottom:0.4rem;">
-                Your Tailored Cover Letter
-            </div>
-            <p style="font-family:'DM Sans',sans-serif; font-size:0.85rem; color:#9a958f;
-                      font-weight:300; max-width:560px; line-height:1.7; margin:0;">
-                Written specifically for this role using your resume and the job description.
-                Edit freely before sending.
-            </p>
-        </div>""", unsafe_allow_html=True)
-
-        st.markdown(f'<div class="cover-letter-box">{cover_letter_text}</div>', unsafe_allow_html=True)
-        st.markdown("<br/>", unsafe_allow_html=True)
+        render_cover_letter(cover_letter_text)
 
-        cl1, cl2, _ = st.columns([1, 1, 3])
-        with cl1:
-            st.download_button("↓  Download .txt", data=cover_letter_text,
-                               file_name="cover_letter.txt", mime="text/plain", key="dl_cover_txt")
-        with cl2:
-            st.download_button("↓  Download .doc",
-                               data=cover_letter_text.replace("\n", "\r\n"),
-                               file_name="cover_letter.doc",
-                               mime="application/msword", key="dl_cover_doc")
 
-        st.markdown("""
-        <div style="margin-top:1rem; padding:0.9rem 1.2rem; background:rgba(201,168,76,0.05);
-                    border-left:2px solid rgba(201,168,76,0.4); border-radius:0 4px 4px 0;">
-            <span style="font-family:'DM Mono',monospace; font-size:0.62rem;
-                         letter-spacing:0.14em; text-transform:uppercase; color:#c9a84c;">&#10022; Tip</span>
-            <p style="font-family:'DM Sans',sans-serif; font-size:0.82rem; color:#9a958f;
-                      margin:0.3rem 0 0; line-height:1.7;">
-                Personalise the opening line with the hiring manager's name if you can find it on LinkedIn.
-                A named salutation can increase response rates by up to 20%.
-            </p>
-        </div>""", unsafe_allow_html=True)
+# ==============================
+# BATCH SCORING
+# ==============================
+st.markdown("<hr/>", unsafe_allow_html=True)
+with st.expander("✦  Batch: score this resume against many job descriptions"):
+    st.markdown(
+        "<p style='font-size:0.85rem; color:#9a958f; line-height:1.7;'>"
+        "Upload a CSV or JSONL with a <code>description</code> column (optional <code>title</code>, "
+        "<code>url</code>), or paste several postings separated by a line containing only "
+        f"<code>{JOB_DELIMITER}</code>. Uses the resume uploaded above.</p>",
+        unsafe_allow_html=True)
+    bcol1, bcol2 = st.columns([1, 1], gap="large")
+    with bcol1:
+        batch_file = st.file_uploader("Job Descriptions File", type=["csv", "jsonl", "ndjson"], key="batch_file")
+        batch_concurrency = st.slider("Parallel requests", 1, 8, 4, key="batch_concurrency")
+    with bcol2:
+        batch_pasted = st.text_area("Or Paste Postings", height=180, key="batch_pasted",
+                                    placeholder=f"First posting...\n{JOB_DELIMITER}\nSecond posting...")
+    run_batch_btn = st.button("✦  Score All", key="run_batch")
+
+    if run_batch_btn:
+        jobs = parse_job_batch(batch_file, batch_pasted)
+        if not resume_file:
+            st.warning("Please upload a resume to get started.")
+        elif not jobs:
+            st.warning("Add at least one job description to score against.")
+        else:
+            batch_resume = extract_text(resume_file)
+            bar = st.progress(0.0, text=f"Scoring 0 / {len(jobs)} postings")
+            results = run_batch(
+                jobs, batch_resume, job_title, batch_concurrency,
+                on_done=lambda n, total: bar.progress(n / total, text=f"Scoring {n} / {total} postings")
+            )
+            bar.empty()
+            st.session_state.batch_results = results
+
+if st.session_state.get("batch_results"):
+    results = st.session_state.batch_results
+    failed  = sum(1 for r in results if r["error"])
+    if failed:
+        st.warning(f"{failed} of {len(results)} postings could not be scored.")
+    st.dataframe(
+        [{
+            "Rank":  i + 1,
+            "Job":   r["title"],
+            "Score": r["score"],
+            "Top missing keywords": ", ".join(r["keywords"][:5]),
+            "Posting": r["url"] or None,
+        } for i, r in enumerate(results)],
+        hide_index=True, use_container_width=True,
+        column_config={
+            "Score":   st.column_config.ProgressColumn("Score", min_value=0, max_value=100, format="%d%%"),
+            "Posting": st.column_config.LinkColumn("Posting"),
+        },
+    )
+    st.download_button(
+        "↓  Download Results (.jsonl)",
+        data="\n".join(json.dumps({k: r[k] for k in ("title", "url", "score", "keywords", "verdict", "error")})
+                       for r in results),
+        file_name="batch_scores.jsonl", mime="application/json", key="dl_batch",
+        on_click="ignore")
+    for i, r in enumerate(results):
+        status = "error" if r["error"] else "no score" if r["score"] is None else f"{r['score']}%"
+        label  = f"#{i + 1} · {r['title']} — {status}"
+        with st.expander(label):
+            if r["error"]:
+                st.error(r["error"])
+            else:
+                if r["keywords"]:
+                    st.markdown("**Missing keywords:** " + ", ".join(r["keywords"]))
+                st.markdown(r["verdict"])
@@ -1,14 +1,13 @@
 import streamlit as st
 import re
-import time
 import datetime
 import html
-from PIL import Image
-import pytesseract
-from pypdf import PdfReader
-from docx import Document
-import pandas as pd
-from openai import OpenAI
+from doc_cache import file_digest
+from retrieval import ContextIndex
+from token_budget import RollingSummary
+from tables import ingest
+from table_query import MAX_DATASETS, TableTools
+from chat_core import DEFAULT_MODEL, HEDGE_AFTER_SECONDS, chat_reply, extract_text as _extract_text
 
 # ==============================
 # PAGE CONFIG & STYLES
@@ -173,8 +172,14 @@ html, body, [data-testid="stAppViewContainer"], .stApp {
 # SESSION STATE INIT
 # ==============================
 if "messages"      not in st.session_state: st.session_state.messages      = []
-if "file_context"  not in st.session_state: st.session_state.file_context  = ""
+if "file_index"    not in st.session_state: st.session_state.file_index    = ContextIndex([])
+# history_summary: rolling summary of turns that no longer fit the model's context window
+if "history_summary" not in st.session_state: st.session_state.history_summary = RollingSummary()
 if "file_names"    not in st.session_state: st.session_state.file_names    = []
+# file_parts: (content hash, name) -> (label, text), so only new files get extracted
+if "file_parts"    not in st.session_state: st.session_state.file_parts    = {}
+# datasets: spreadsheets ingested into local SQLite, queried by the model through tools
+if "datasets"      not in st.session_state: st.session_state.datasets      = []
 # input_counter: incrementing this generates a brand-new widget key,
 # which clears the box — without ever writing to a widget-bound state key.
 if "input_counter" not in st.session_state: st.session_state.input_counter = 0
@@ -184,28 +189,9 @@ if "saved_input"   not in st.session_state: st.session_state.saved_input   = ""
 # ==============================
 # HELPERS
 # ==============================
-def extract_text(file) -> tuple[str, str]:
-    ext = file.name.split(".")[-1].lower()
+def extract_text(file, on_page=None) -> tuple[str, str]:
     try:
-        if ext == "pdf":
-            reader = PdfReader(file)
-            return "\n".join(p.extract_text() or "" for p in reader.pages), "PDF"
-        elif ext == "docx":
-            doc = Document(file)
-            return "\n".join(p.text for p in doc.paragraphs), "DOCX"
-        elif ext in ["xlsx", "xls"]:
-            xls = pd.ExcelFile(file)
-            sheets = []
-            for name in xls.sheet_names:
-                df = xls.parse(name).dropna(how="all").fillna("")
-                sheets.append(f"[Sheet: {name}]\n{df.to_markdown(index=False)}")
-            return "\n\n".join(sheets), "Excel"
-        elif ext == "csv":
-            return pd.read_csv(file).fillna("").to_markdown(index=False), "CSV"
-        elif ext in ["png", "jpg", "jpeg"]:
-            return pytesseract.image_to_string(Image.open(file)), "Image (OCR)"
-        else:
-            return file.read().decode("utf-8"), "Text"
+        return _extract_text(file, on_page)
     except Exception as e:
         return f"Error: {e}", "Unknown"
 
@@ -234,87 +220,79 @@ def save_input():
     st.session_state.saved_input = st.session_state.get(current_key, "")
 
 
-def build_messages_for_api(file_context: str, history: list) -> list:
-    api_messages = []
-    for i, msg in enumerate(history):
-        content = msg["content"]
-        if i == 0 and msg["role"] == "user" and file_context:
-            content = f"CONTEXT FROM FILES:\n{file_context}\n\n---\n\nUSER: {content}"
-        api_messages.append({"role": msg["role"], "content": content})
-    return api_messages
+def describe_llm_error(e: Exception) -> str:
+    error_str = str(e)
 
+    # ── Parse the raw error code if present ──
+    code = None
+    match = re.search(r"Error code: (\d+)", error_str)
+    if match:
+        code = int(match.group(1))
 
-def get_llm_response(history: list, file_context: str, provider: str) -> tuple[str, float]:
-    try:
-        client = OpenAI(
-            api_key=st.secrets["OPENROUTER_API_KEY"],
-            base_url="https://openrouter.ai/api/v1"
-        )
+    if code == 503 or "no healthy upstream" in error_str:
+        return (
+            "⚠️ **The selected model is temporarily unavailable.**\n\n"
+            "The free-tier provider hosting this model is down or overloaded, please try again after 24 hours "
 
-        if "MiniMax" in provider:
-            model_id = "minimax/minimax-m2.5:free"
-        elif "nemotron-3 by Nvidia" in provider:
-            model_id = "nvidia/nemotron-3-super-120b-a12b:free"
-        elif "OpenAI" in provider:
-            model_id = "openai/gpt-oss-120b:free"
-        else:
-            model_id = "meta-llama/llama-3.1-8b-instruct:free"
-
-        api_messages = build_messages_for_api(file_context, history)
-
-        t0 = time.time()
-        response = client.chat.completions.create(
-            model=model_id,
-            messages=api_messages,
-            extra_headers={
-                "HTTP-Referer": "http://localhost:8501",
-                "X-Title": "Reasoning Forge"
-            }
         )
-        elapsed = time.time() - t0
-        return response.choices[0].message.content, elapsed
+    elif code == 401 or "401" in error_str:
+        return (
+            "🔑 **Authentication error.** Your OpenRouter API key is missing "
+            "or invalid. Check your `secrets.toml` file."
+        )
+    elif code == 429 or "429" in error_str:
+        return (
+            "🚦 **Rate limit hit.** You've sent too many requests too quickly. "
+            "Wait a moment and try again."
+        )
+    elif code == 400 or "400" in error_str:
+        return (
+            "❌ **Bad request.** The message or file content may be too long "
+            "for this model's context window. Try clearing the conversation or "
+            "removing attached files."
+        )
+    return (
+        f"❌ **Unexpected error ({code or 'unknown'}).**\n\n"
+        f"Details: `{error_str}`\n\n"
+        "Try switching models or refreshing the page."
+    )
 
-    except Exception as e:
-        error_str = str(e)
-        elapsed = 0.0
 
-        # ── Parse the raw error code if present ──
-        code = None
-        import re
-        match = re.search(r"Error code: (\d+)", error_str)
-        if match:
-            code = int(match.group(1))
+def resolve_model(provider: str) -> str:
+    if "MiniMax" in provider:
+        return "minimax/minimax-m2.5:free"
+    elif "nemotron-3 by Nvidia" in provider:
+        return "nvidia/nemotron-3-super-120b-a12b:free"
+    elif "OpenAI" in provider:
+        return "openai/gpt-oss-120b:free"
+    return DEFAULT_MODEL
 
-        if code == 503 or "no healthy upstream" in error_str:
-            msg = (
-                "⚠️ **The selected model is temporarily unavailable.**\n\n"
-                "The free-tier provider hosting this model is down or overloaded, please try again after 24 hours "
 
-            )
-        elif code == 401 or "401" in error_str:
-            msg = (
-                "🔑 **Authentication error.** Your OpenRouter API key is missing "
-                "or invalid. Check your `secrets.toml` file."
-            )
-        elif code == 429 or "429" in error_str:
-            msg = (
-                "🚦 **Rate limit hit.** You've sent too many requests too quickly. "
-                "Wait a moment and try again."
-            )
-        elif code == 400 or "400" in error_str:
-            msg = (
-                "❌ **Bad request.** The message or file content may be too long "
-                "for this model's context window. Try clearing the conversation or "
-                "removing attached files."
-            )
-        else:
-            msg = (
-                f"❌ **Unexpected error ({code or 'unknown'}).**\n\n"
-                f"Details: `{error_str}`\n\n"
-                "Try switching models or refreshing the page."
-            )
+def get_llm_response(history: list, file_index: ContextIndex, provider: str, on_text=None,
+                     context_budget: int = 6000, summarize=None,
+                     failover: bool = True, hedge: bool = False,
+                     datasets: list | None = None, on_query=None) -> tuple[str, float, int, str]:
+    """Ask the selected model for the next reply.
 
-        return msg, elapsed
+    Returns (reply, seconds, prompt tokens sent, model that answered). With on_text set the
+    reply is streamed and on_text(reply_so_far) is called as it grows. Busy models are
+    retried, then the next model in FAILOVER_MODELS takes over; with hedge, a request slower
+    than HEDGE_AFTER_SECONDS is raced against the next model. With datasets the model can
+    query the uploaded spreadsheets; on_query(sql) is called for each query it runs.
+    """
+    tokens, model_id, tools = 0, resolve_model(provider), None
+    try:
+        tools = TableTools(datasets) if datasets else None
+        return chat_reply(
+            st.secrets["OPENROUTER_API_KEY"], history, file_index, model_id, on_text,
+            context_budget=context_budget, summarize=summarize, failover=failover, hedge=hedge,
+            tools=tools, on_query=on_query
+        )
+    except Exception as e:
+        return describe_llm_error(e), 0.0, tokens, model_id
+    finally:
+        if tools:
+            tools.close()
 
 
 def build_download_text(history: list, provider: str, file_names: list) -> str:
@@ -335,6 +313,10 @@ def build_download_text(history: list, provider: str, file_names: list) -> str:
         lines.append(f"[{role_label}]")
         if elapsed is not None:
             lines.append(f"  ⏱ Generated in {elapsed_label(elapsed)}")
+        if msg.get("tokens"):
+            lines.append(f"  ↑ {msg['tokens']:,} tokens sent")
+        for sql in msg.get("queries") or []:
+            lines.append(f"  ⌗ {sql}")
         lines.append(msg["content"] + "\n")
         if i < len(history) - 1:
             lines.append("-" * 40)
@@ -350,27 +332,70 @@ with st.sidebar:
         "Reasoning Engine",
         ["MiniMax (Reasoning Expert)", "nemotron-3 by Nvidia (Logic Focused)", "OpenAI"]
     )
+    STREAM_OUTPUT = st.toggle("Stream replies", value=True)
+    FAILOVER = st.toggle("Automatic failover", value=True,
+                         help="Retry busy models and fall back to the other engines when one is down.")
+    HEDGE = st.toggle("Hedge slow requests", value=False,
+                      help=f"If no response starts within {HEDGE_AFTER_SECONDS:.0f}s, also ask the next engine "
+                           "and use whichever answers first.")
+    HISTORY_POLICY = st.selectbox(
+        "Long conversations",
+        ["Summarise older turns", "Sliding window"],
+        help="When the conversation outgrows the model's context window, the first question is kept, "
+             "recent turns are kept, and older turns are either summarised or dropped."
+    )
     st.markdown("---")
     st.markdown("**Attach Context Files**")
-    st.caption("Files are loaded into every conversation turn automatically.")
+    st.caption("Files are loaded into every conversation turn automatically. "
+               "Large files are searched and only the most relevant excerpts are sent.")
     uploaded_files = st.file_uploader(
         "Upload files",
         type=["pdf", "docx", "txt", "png", "jpg", "jpeg", "xlsx", "xls", "csv"],
         accept_multiple_files=True,
         label_visibility="collapsed"
     )
+    CONTEXT_BUDGET = st.slider(
+        "File context budget (tokens)", min_value=1000, max_value=32000, value=6000, step=1000,
+        help="Upper bound on file text sent per turn. Files over it are searched for the relevant parts."
+    )
+    QUERY_TABLES = st.toggle("Compute over spreadsheets", value=True,
+                             help="Let the model run exact queries on uploaded CSV/Excel files "
+                                  "instead of reading a summary of them.")
 
     current_names = [f.name for f in uploaded_files] if uploaded_files else []
     if current_names != st.session_state.file_names:
-        if uploaded_files:
-            combined = ""
-            for f in uploaded_files:
+        # Only the delta is processed: files already seen (by content hash) reuse their block
+        parts, blocks, datasets = {}, [], []
+        for f in uploaded_files or []:
+            key = (file_digest(f), f.name)
+            block = st.session_state.file_parts.get(key)
+            if block is None:
                 f.seek(0)
-                text, ftype = extract_text(f)
-                combined += f"\n\n--- FILE: {f.name} ({ftype}) ---\n{text}\n"
-            st.session_state.file_context = combined
-        else:
-            st.session_state.file_context = ""
+                bar = st.progress(0.0, text=f"Reading {f.name}…") if f.name.lower().endswith(".pdf") else None
+                text, ftype = extract_text(f, on_page=(
+                    lambda page, total: bar.progress((page.number + 1) / total,
+                                                     text=f"Reading {f.name} · page {page.number + 1}/{total}")
+                ) if bar else None)
+                if bar:
+                    bar.empty()
+                block = (f"{f.name} ({ftype})", text)
+                if ftype == "Unknown":   # extraction failed — retry next time instead of keeping the error
+                    blocks.append(block)
+                    continue
+            parts[key] = block
+            blocks.append(block)
+            if f.name.lower().endswith((".csv", ".xlsx", ".xls")):
+                if len(datasets) >= MAX_DATASETS:
+                    st.warning(f"{f.name}: only {MAX_DATASETS} spreadsheets can be queried at once; "
+                               "its text is still used, but it can't be queried.")
+                    continue
+                try:
+                    datasets.append(ingest(f.getvalue(), f.name))   # already built during extraction
+                except Exception as e:   # its text is still in the context, just not queryable
+                    st.warning(f"{f.name} could not be loaded as a table, so it can't be queried: {e}")
+        st.session_state.file_parts = parts
+        st.session_state.file_index = ContextIndex(blocks)
+        st.session_state.datasets   = datasets
         st.session_state.file_names = current_names
 
     if uploaded_files:
@@ -382,6 +407,7 @@ with st.sidebar:
     if st.button("🗑 Clear Conversation"):
         st.session_state.messages     = []
         st.session_state.saved_input  = ""
+        st.session_state.history_summary = RollingSummary()
         st.session_state.input_counter += 1   # reset the text box too
         st.rerun()
 
@@ -428,13 +454,21 @@ for msg in st.session_state.messages:
 
         if elapsed is not None:
             bar_px = min(int(elapsed * 8), 140)
+            tokens = msg.get("tokens")
+            served = msg.get("model")
             st.markdown(
                 f"<div class='timing-badge'>"
                 f"<span class='timing-bar' style='width:{bar_px}px'></span>"
                 f"⏱ Generated in {elapsed_label(elapsed)}"
+                f"{f' · ↑ {tokens:,} tokens sent' if tokens else ''}"
+                f"{f' · answered by {served} (failover)' if served else ''}"
                 f"</div>",
                 unsafe_allow_html=True
             )
+        if msg.get("queries"):
+            with st.expander(f"⌗ {len(msg['queries'])} spreadsheet quer{'y' if len(msg['queries']) == 1 else 'ies'}"):
+                for sql in msg["queries"]:
+                    st.code(sql, language="sql")
 
 if st.session_state.messages:
     st.markdown("<hr class='turn-divider'>", unsafe_allow_html=True)
@@ -466,15 +500,55 @@ if send:
             "role": "user", "content": query, "elapsed": None
         })
 
-        with st.spinner(f"{PROVIDER} is thinking..."):
-            reply, elapsed = get_llm_response(
+        summarize = st.session_state.history_summary if "Summarise" in HISTORY_POLICY else None
+        datasets  = st.session_state.datasets if QUERY_TABLES else None
+        queries   = []
+
+        if STREAM_OUTPUT:
+            st.markdown("<p class='bubble-label label-user'>You</p>", unsafe_allow_html=True)
+            st.markdown(f"<div class='bubble-user'>{html.escape(query)}</div>", unsafe_allow_html=True)
+            st.markdown("<p class='bubble-label label-ai'>✦ Reasoning Forge</p>", unsafe_allow_html=True)
+            live = st.empty()
+            live.markdown(f"<div class='bubble-ai'>{format_for_display(f'{PROVIDER} is thinking...')}</div>",
+                          unsafe_allow_html=True)
+
+            def _show(partial):
+                if "<think>" in partial and "</think>" not in partial:
+                    return   # still reasoning — keep the placeholder up
+                text = partial.split("</think>")[-1].strip()
+                if text:
+                    live.markdown(f"<div class='bubble-ai'>{format_for_display(text)}</div>", unsafe_allow_html=True)
+
+            reply, elapsed, tokens, model_used = get_llm_response(
                 st.session_state.messages,
-                st.session_state.file_context,
-                PROVIDER
+                st.session_state.file_index,
+                PROVIDER,
+                on_text=_show,
+                context_budget=CONTEXT_BUDGET,
+                summarize=summarize,
+                failover=FAILOVER,
+                hedge=HEDGE,
+                datasets=datasets,
+                on_query=queries.append
             )
+        else:
+            with st.spinner(f"{PROVIDER} is thinking..."):
+                reply, elapsed, tokens, model_used = get_llm_response(
+                    st.session_state.messages,
+                    st.session_state.file_index,
+                    PROVIDER,
+                    context_budget=CONTEXT_BUDGET,
+                    summarize=summarize,
+                    failover=FAILOVER,
+                    hedge=HEDGE,
+                    datasets=datasets,
+                    on_query=queries.append
+                )
 
         st.session_state.messages.append({
-            "role": "assistant", "content": reply, "elapsed": elapsed
+            "role": "assistant", "content": reply, "elapsed": elapsed, "tokens": tokens,
+            "model": model_used if model_used != resolve_model(PROVIDER) else None,
+            "queries": queries
         })
 
         # Clear input: reset saved text and generate a new widget key
@@ -0,0 +1,140 @@
+"""Microbenchmark: the single-pass MarkerParser against the regex parsers it replaced.
+
+    python bench_parser.py                 # 60 bullets, whole responses and streamed
+    python bench_parser.py --bullets 200 --chunk 24
+
+Responses are synthetic but follow COMBINED_PROMPT's format. "whole" parses a finished
+response (score, summaries, keywords, bullets); "streamed" feeds it in --chunk sized
+pieces the way the live preview does, then parses the final text. Both parsers must
+agree on every response, and on one missing its END_ORIGINAL_SUMMARY closer, before
+anything is timed.
+"""
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+
+from resume_core import MarkerParser, scan_markers
+
+
+# ==============================
+# PREVIOUS REGEX PARSERS
+# ==============================
+def regex_score(text):
+    match = re.search(r"MATCH_SCORE:\s*(\d+)", text)
+    return int(match.group(1)) if match else None
+
+
+def regex_pairs(text):
+    pairs = []
+    for block in re.findall(r"---BULLET---\s*(.*?)\s*---END---", text, re.DOTALL):
+        orig_match = re.search(r"ORIGINAL:\s*(.+?)(?=\nREWRITTEN:)", block, re.DOTALL)
+        new_match  = re.search(r"REWRITTEN:\s*(.+?)$",                block, re.DOTALL)
+        if orig_match and new_match:
+            pairs.append({"original": orig_match.group(1).strip(), "rewritten": new_match.group(1).strip()})
+    return pairs
+
+
+def regex_combined(text):
+    orig_summ_match = re.search(r"---ORIGINAL_SUMMARY---\s*(.*?)\s*---END_ORIGINAL_SUMMARY---", text, re.DOTALL)
+    summary_match   = re.search(r"---SUMMARY---\s*(.*?)\s*---END_SUMMARY---",                   text, re.DOTALL)
+    ats_match       = re.search(r"---ATS_KEYWORDS---\s*(.*?)\s*---END_ATS---",                  text, re.DOTALL)
+    original_summary = orig_summ_match.group(1).strip() if orig_summ_match else ""
+    return {
+        "original_summary": "" if original_summary.upper() == "NONE" else original_summary,
+        "summary":          summary_match.group(1).strip() if summary_match else "",
+        "keywords":         [k.strip() for k in ats_match.group(1).split(",") if k.strip()] if ats_match else [],
+        "pairs":            regex_pairs(text),
+    }
+
+
+def regex_stream(text, chunk):
+    """The old BulletStream: find/slice closed blocks on every update, then a full parse."""
+    pos, seen = 0, 0
+    for end in range(chunk, len(text) + chunk, chunk):
+        partial = text[:end]
+        while True:
+            start = partial.find("---BULLET---", pos)
+            close = partial.find("---END---", start) if start >= 0 else -1
+            if close < 0:
+                break
+            pos = close + len("---END---")
+            seen += len(regex_pairs(partial[start:pos]))
+    return regex_score(text), regex_combined(text)
+
+
+def marker_stream(text, chunk):
+    parser = MarkerParser()
+    for end in range(chunk, len(text) + chunk, chunk):
+        parser.feed(text[:end], final=end >= len(text))
+    return parser.score, parser.combined()
+
+
+# ==============================
+# BENCHMARK
+# ==============================
+WORDS = ("led migrated reduced latency pipeline stakeholders revenue kubernetes python analytics "
+         "cross-functional delivered automated dashboards 35% quarterly onboarding").split()
+
+
+def response(bullets: int, rng: random.Random) -> str:
+    def sentence(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+    parts = [f"MATCH_SCORE: {rng.randint(0, 100)}", "",
+             "---ORIGINAL_SUMMARY---", sentence(30), "---END_ORIGINAL_SUMMARY---", "",
+             "---SUMMARY---", " ".join(sentence(18) for _ in range(3)), "---END_SUMMARY---", "",
+             "---ATS_KEYWORDS---", ", ".join(rng.sample(WORDS, 12)), "---END_ATS---", ""]
+    for _ in range(bullets):
+        parts += ["---BULLET---", f"ORIGINAL: {sentence(16)}", f"REWRITTEN: {sentence(24)}", "---END---", ""]
+    return "\n".join(parts)
+
+
+def timed(fn, repeat: int) -> float:
+    """Median microseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(samples)
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    p.add_argument("--bullets", type=int, default=60)
+    p.add_argument("--responses", type=int, default=20)
+    p.add_argument("--chunk", type=int, default=40, help="characters per streamed update")
+    p.add_argument("--repeat", type=int, default=7)
+    args = p.parse_args(argv)
+
+    rng   = random.Random(0)
+    texts = [response(args.bullets, rng) for _ in range(args.responses)]
+    # A response whose model skipped a closer must still parse the way the regexes did
+    malformed = texts[0].replace("---END_ORIGINAL_SUMMARY---", "", 1)
+    for text in texts + [malformed]:
+        parser = scan_markers(text)
+        if (parser.score, parser.combined()) != (regex_score(text), regex_combined(text)):
+            print("MarkerParser and the regex parsers disagree", file=sys.stderr)
+            return 1
+
+    size = statistics.mean(map(len, texts))
+    print(f"{args.responses} responses, {args.bullets} bullets, {size / 1024:.1f} KiB each\n")
+    print(f"{'case':<10}{'regex µs':>12}{'marker µs':>12}{'speed-up':>10}")
+    cases = [
+        ("whole",    lambda: [(regex_score(t), regex_combined(t)) for t in texts],
+                     lambda: [(p.score, p.combined()) for p in map(scan_markers, texts)]),
+        ("streamed", lambda: [regex_stream(t, args.chunk) for t in texts],
+                     lambda: [marker_stream(t, args.chunk) for t in texts]),
+    ]
+    for name, old, new in cases:
+        before = timed(old, args.repeat) / len(texts)
+        after  = timed(new, args.repeat) / len(texts)
+        print(f"{name:<10}{before:>12.0f}{after:>12.0f}{before / after:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Benchmark: the bullet table as one st.html block against the per-row widgets it replaced.
+
+    python bench_render.py                       # 20, 60 and 200 bullets
+    python bench_render.py --bullets 60 --repeat 15
+
+Each case runs a script that draws only the bullet table, headless in Streamlit's
+AppTest, and records what the script sends to the browser: "deltas" is the number of
+element messages, "KiB" their serialised size, and "run ms" the median script run.
+"widgets" is the old layout (st.columns(2) and two st.markdown calls per bullet),
+"html" builds bullet_table.table_html from scratch on every run and "html cached"
+reuses the cached string as reruns do. "build µs" is table_html alone, uncached.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+import bullet_table
+
+# AppTest keeps the messages a run produced only until it parses them; keep a copy
+_SENT = []
+_run  = LocalScriptRunner.run
+
+
+def _recording_run(self, *args, **kwargs):
+    tree = _run(self, *args, **kwargs)
+    _SENT[:] = [msg for msg in self.forward_msgs() if msg.HasField("delta")]
+    return tree
+
+
+LocalScriptRunner.run = _recording_run
+
+
+# ==============================
+# SCRIPTS
+# ==============================
+def widgets_script(pairs):
+    """The layout before bullet_table.py: a row of columns per bullet."""
+    import streamlit as st
+
+    h1, h2 = st.columns(2, gap="large")
+    with h1:
+        st.markdown("""<div style="font-family:'DM Mono',monospace; font-size:0.6rem;
+            letter-spacing:0.16em; text-transform:uppercase; color:#6a6560;
+            padding:0.5rem 0.8rem; background:#0b0c0f;
+            border:1px solid rgba(255,255,255,0.06);
+            border-radius:4px 4px 0 0; text-align:center;">✗ &nbsp; Before</div>""",
+            unsafe_allow_html=True)
+    with h2:
+        st.markdown("""<div style="font-family:'DM Mono',monospace; font-size:0.6rem;
+            letter-spacing:0.16em; text-transform:uppercase; color:#c9a84c;
+            padding:0.5rem 0.8rem; background:#0b0c0f;
+            border:1px solid rgba(201,168,76,0.25);
+            border-radius:4px 4px 0 0; text-align:center;">✦ &nbsp; After</div>""",
+            unsafe_allow_html=True)
+
+    for i, pair in enumerate(pairs):
+        c1, c2 = st.columns(2, gap="large")
+        bg_row = "#0d0e12" if i % 2 == 0 else "#111318"
+        with c1:
+            st.markdown(
+                f"<div style='background:{bg_row}; border:1px solid rgba(255,255,255,0.07);"
+                f"border-top:none; padding:0.85rem 1rem; font-size:0.88rem;"
+                f"color:#f0ede6; line-height:1.7; min-height:60px;'>"
+                f"<span style='color:#6a6560;font-size:0.75rem;'>—</span>"
+                f"&nbsp;{pair['original']}</div>", unsafe_allow_html=True)
+        with c2:
+            st.markdown(
+                f"<div style='background:{bg_row}; border:1px solid rgba(201,168,76,0.18);"
+                f"border-top:none; border-left:3px solid #c9a84c;"
+                f"padding:0.85rem 1rem; font-size:0.88rem;"
+                f"color:#e8c87a; line-height:1.7; min-height:60px;'>"
+                f"<span style='color:#c9a84c;font-size:0.7rem;'>✦</span>"
+                f"&nbsp;{pair['rewritten']}</div>", unsafe_allow_html=True)
+
+
+def html_script(pairs, cached):
+    import streamlit as st
+    from bullet_table import _table, table_html
+
+    if not cached:
+        _table.cache_clear()
+    st.html(table_html(pairs))
+
+
+# ==============================
+# BENCHMARK
+# ==============================
+WORDS = ("led migrated reduced latency pipeline stakeholders revenue kubernetes python analytics "
+         "cross-functional delivered automated dashboards 35% quarterly onboarding").split()
+
+
+def make_pairs(n: int, rng: random.Random) -> list[dict]:
+    def sentence(words):
+        return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+    return [{"original": sentence(16), "rewritten": sentence(24)} for _ in range(n)]
+
+
+def measure(script, repeat: int, **kwargs) -> tuple[int, int, float]:
+    """(deltas, payload bytes, median run ms) over `repeat` reruns of one app."""
+    at = AppTest.from_function(script, kwargs=kwargs, default_timeout=60)
+    at.run()   # first run compiles the script; not timed
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - t0) * 1e3)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+    return len(_SENT), sum(msg.ByteSize() for msg in _SENT), statistics.median(samples)
+
+
+def build_us(pairs: list[dict], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        bullet_table._table.cache_clear()
+        t0 = time.perf_counter()
+        bullet_table.table_html(pairs)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(samples)
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    p.add_argument("--bullets", default="20,60,200", help="comma-separated table sizes")
+    p.add_argument("--repeat", type=int, default=9)
+    args = p.parse_args(argv)
+
+    rng = random.Random(0)
+    print(f"{'bullets':>7}  {'case':<12}{'deltas':>8}{'KiB':>9}{'run ms':>9}{'build µs':>10}")
+    for n in map(int, args.bullets.split(",")):
+        pairs = make_pairs(n, rng)
+        cases = [
+            ("widgets",     widgets_script, {"pairs": pairs},                  ""),
+            ("html",        html_script,    {"pairs": pairs, "cached": False}, f"{build_us(pairs, args.repeat):.0f}"),
+            ("html cached", html_script,    {"pairs": pairs, "cached": True},  ""),
+        ]
+        for name, script, kwargs, build in cases:
+            deltas, size, ms = measure(script, args.repeat, **kwargs)
+            print(f"{n:>7}  {name:<12}{deltas:>8}{size / 1024:>9.1f}{ms:>9.1f}{build:>10}")
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Startup import benchmark: what each entry module costs to import, and what it drags in.
+
+    python bench_startup.py                # table of import times
+    python bench_startup.py --check        # exit 1 on a regression
+
+Every measurement runs in a fresh interpreter with `-X importtime`, so nothing is
+shared between samples. A regression is either a heavy dependency (SDKs, parsers,
+pandas) showing up in sys.modules right after import — it should load on first use —
+or the median import time going over --max-ms.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Loaded on first use only; none of these may appear after importing an entry module.
+HEAVY = ["google.generativeai", "openai", "httpx", "pypdf", "docx", "pandas", "PIL", "pytesseract", "tiktoken",
+         "fpdf"]
+
+MODULES = ["analytics", "doc_cache", "llm_cache", "llm_clients", "llm_router", "retrieval", "token_budget", "pdf_pages",
+           "ocr", "tables", "table_query", "resume_core", "resume_export", "bullet_table", "chat_core", "api"]
+
+_PROBE = "import sys, json, {module}; print(json.dumps([m for m in {heavy!r} if m in sys.modules]))"
+
+
+def _import_us(stderr: str, module: str) -> int:
+    """Cumulative microseconds for `module` from -X importtime output."""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = [p.strip() for p in line.split(":", 1)[1].split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    return 0
+
+
+def measure(module: str) -> tuple[float, list[str]]:
+    """(import milliseconds, heavy modules loaded) for one fresh-interpreter import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, heavy=HEAVY)],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    return _import_us(proc.stderr, module) / 1000, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    p.add_argument("modules", nargs="*", default=MODULES)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--max-ms", type=float, default=250.0, help="per-module median budget for --check")
+    p.add_argument("--deps", action="store_true", help="also time each heavy dependency on its own")
+    p.add_argument("--check", action="store_true")
+    args = p.parse_args(argv)
+
+    failures = []
+    print(f"{'module':<22}{'median ms':>10}{'min ms':>9}  eager heavy imports")
+    for module in args.modules:
+        try:
+            samples = [measure(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{module:<22}{'—':>10}{'—':>9}  {e}")
+            failures.append(str(e).replace(":\n", ": "))
+            continue
+        times, loaded = [t for t, _ in samples], samples[-1][1]
+        median = statistics.median(times)
+        print(f"{module:<22}{median:>10.1f}{min(times):>9.1f}  {', '.join(loaded) or '-'}")
+        if loaded:
+            failures.append(f"{module} imports {', '.join(loaded)} at startup")
+        if median > args.max_ms:
+            failures.append(f"{module} takes {median:.0f} ms to import (budget {args.max_ms:.0f} ms)")
+
+    if args.deps:
+        print(f"\n{'deferred dependency':<22}{'median ms':>10}")
+        for dep in HEAVY:
+            try:
+                median = statistics.median(measure(dep)[0] for _ in range(args.repeat))
+            except RuntimeError:
+                print(f"{dep:<22}{'not installed':>10}")
+                continue
+            print(f"{dep:<22}{median:>10.1f}")
+
+    if args.check and failures:
+        print("\n" + "\n".join(failures), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""The bullet rewrites table (before beside after) as one block of HTML.
+
+Laid out with Streamlit widgets, the table cost st.columns(2) plus two st.markdown
+calls per rewrite: 60 bullets were 180+ elements, each its own delta over the
+websocket on every rerun, and each cell repeated the same inline styles. table_html
+builds the whole table as one string for a single st.html element, styled by shared
+classes in one <style> block.
+
+Long tables are virtualised in CSS. Every row has `content-visibility: auto`, so the
+browser skips layout and paint for rows outside the viewport. Past SCROLL_AFTER rows
+the table scrolls inside a box SCROLL_HEIGHT tall instead of stretching the page.
+st.html drops scripts, so there is no JavaScript windowing; all rows stay in the DOM.
+
+table_html is cached per set of pairs, so reruns reuse the string they built before.
+bench_render.py compares it with the per-row widgets it replaced.
+"""
+import functools
+import html
+
+SCROLL_AFTER  = 30        # rows before the table gets its own scroll box
+SCROLL_HEIGHT = "70vh"
+
+CSS = """
+.bt-table  { font-family:'DM Sans',sans-serif; font-size:0.88rem; line-height:1.7; }
+.bt-scroll { max-height:%s; overflow-y:auto; overscroll-behavior:contain;
+             border-bottom:1px solid rgba(201,168,76,0.18); }
+.bt-row    { display:grid; grid-template-columns:1fr 1fr; column-gap:2.5rem;
+             content-visibility:auto; contain-intrinsic-size:auto 96px; }
+.bt-head   { content-visibility:visible; }
+.bt-scroll .bt-head { position:sticky; top:0; z-index:1; }
+.bt-head div { font-family:'DM Mono',monospace; font-size:0.6rem; letter-spacing:0.16em;
+               text-transform:uppercase; padding:0.5rem 0.8rem; background:#0b0c0f;
+               border-radius:4px 4px 0 0; text-align:center; }
+.bt-head .bt-was { color:#6a6560; border:1px solid rgba(255,255,255,0.06); }
+.bt-head .bt-now { color:#c9a84c; border:1px solid rgba(201,168,76,0.25); }
+.bt-cell   { background:#0d0e12; padding:0.85rem 1rem; min-height:60px; }
+.bt-odd .bt-cell { background:#111318; }
+.bt-cell.bt-was  { color:#f0ede6; border:1px solid rgba(255,255,255,0.07); border-top:none; }
+.bt-cell.bt-now  { color:#e8c87a; border:1px solid rgba(201,168,76,0.18); border-top:none;
+                   border-left:3px solid #c9a84c; }
+.bt-was .bt-mark { color:#6a6560; font-size:0.75rem; }
+.bt-now .bt-mark { color:#c9a84c; font-size:0.7rem; }
+""" % SCROLL_HEIGHT
+
+STYLE = f"<style>{CSS}</style>"
+HEAD  = ("<div class='bt-row bt-head'><div class='bt-was'>✗ &nbsp; Before</div>"
+         "<div class='bt-now'>✦ &nbsp; After</div></div>")
+
+
+def row_html(i: int, original: str, rewritten: str) -> str:
+    """One before/after row; rows alternate background by index. Needs STYLE on the page."""
+    return (f"<div class='bt-row{' bt-odd' if i % 2 else ''}'>"
+            f"<div class='bt-cell bt-was'><span class='bt-mark'>—</span>&nbsp;{html.escape(original, quote=False)}</div>"
+            f"<div class='bt-cell bt-now'><span class='bt-mark'>✦</span>&nbsp;{html.escape(rewritten, quote=False)}</div>"
+            f"</div>")
+
+
+@functools.lru_cache(maxsize=32)
+def _table(pairs: tuple[tuple[str, str], ...]) -> str:
+    rows = "".join(row_html(i, original, rewritten) for i, (original, rewritten) in enumerate(pairs))
+    scroll = " bt-scroll" if len(pairs) > SCROLL_AFTER else ""
+    return f"{STYLE}<div class='bt-table{scroll}'>{HEAD}{rows}</div>"
+
+
+def table_html(pairs: list[dict]) -> str:
+    """The whole table, with its styles, for st.html; the same pairs give the cached string."""
+    return _table(tuple((p["original"], p["rewritten"]) for p in pairs))
@@ -0,0 +1,225 @@
+"""Reasoning Forge chat without the Streamlit UI.
+
+File extraction, context packing and the model call live here so app2.py and the HTTP
+service (api.py) answer the same question the same way. Functions raise on failure;
+turning errors into chat messages is the caller's business. Parsers (pypdf, python-docx,
+pandas, Pillow/pytesseract) are imported by the branch that needs them, so a text-only
+chat never pays for them. Images and scanned PDF pages go through ocr.py, spreadsheets
+through tables.py.
+"""
+import os
+import time
+
+from doc_cache import text_cache
+from pdf_pages import extract_pdf_text
+from ocr import ocr_image
+from tables import ingest
+from llm_clients import OPENROUTER_BASE_URL, openai_client
+from retrieval import ContextIndex
+from token_budget import fit_messages, prompt_budget
+from llm_router import route, status_of
+from table_query import TableTools
+
+# Failover order when the selected engine is overloaded
+FAILOVER_MODELS = [
+    "minimax/minimax-m2.5:free",
+    "nvidia/nemotron-3-super-120b-a12b:free",
+    "openai/gpt-oss-120b:free",
+    "meta-llama/llama-3.1-8b-instruct:free",
+]
+DEFAULT_MODEL       = "meta-llama/llama-3.1-8b-instruct:free"
+HEDGE_AFTER_SECONDS = 12.0
+EXTRA_HEADERS = {
+    "HTTP-Referer": "http://localhost:8501",
+    "X-Title": "Reasoning Forge"
+}
+PDF_MAX_PAGES = int(os.environ.get("RF_PDF_MAX_PAGES", "0")) or None   # None reads every page
+TABLE_SUMMARY_TOKENS = 1500   # per spreadsheet, split across its sheets
+MAX_TOOL_STEPS       = 6      # query rounds before the model must answer
+TABLE_TOOLS_NOTE = (
+    "The user's spreadsheets are loaded as tables you can query:\n{tables}\n"
+    "For any figure that depends on the data (counts, totals, averages, rankings, lookups) call "
+    "query_table or run_sql and answer from the returned rows. The file context only shows "
+    "summaries and samples, so never compute from it."
+)
+
+
+# ==============================
+# FILE EXTRACTION
+# ==============================
+EXTRACTOR_VERSION = "4"   # bump when the parsing below changes so cached text is re-extracted
+
+
+def _extract_text_uncached(file, on_page=None) -> tuple[str, str]:
+    ext = file.name.split(".")[-1].lower()
+    if ext == "pdf":
+        text, scanned = extract_pdf_text(file.getvalue(), PDF_MAX_PAGES, on_page, ocr=True)
+        if scanned:
+            listed = ", ".join(str(n + 1) for n in scanned[:20]) + (" …" if len(scanned) > 20 else "")
+            text += f"\n\n[No readable text on page(s) {listed}, even after OCR.]"
+        return text, "PDF"
+    elif ext == "docx":
+        from docx import Document
+        doc = Document(file)
+        return "\n".join(p.text for p in doc.paragraphs), "DOCX"
+    elif ext in ["xlsx", "xls", "csv"]:
+        # Spreadsheets are summarised; the rows themselves stay in the local table store
+        return ingest(file.getvalue(), file.name).summary(TABLE_SUMMARY_TOKENS), "CSV" if ext == "csv" else "Excel"
+    elif ext in ["png", "jpg", "jpeg"]:
+        return ocr_image(file.getvalue()), "Image (OCR)"
+    else:
+        return file.read().decode("utf-8"), "Text"
+
+
+def extract_text(file, on_page=None) -> tuple[str, str]:
+    """(text, file type label) for an upload, cached by content. Raises on failure.
+
+    on_page(page, pages_to_read) reports progress through PDFs that are not cached yet.
+    """
+    text, ftype = text_cache.get_or_extract(
+        file, lambda buf: _extract_text_uncached(buf, on_page), "reasoningforge",
+        f"{EXTRACTOR_VERSION}:{PDF_MAX_PAGES or 'all'}"
+    )
+    return text, ftype
+
+
+# ==============================
+# CHAT
+# ==============================
+def build_messages_for_api(file_index: ContextIndex, history: list, token_budget: int = 6000,
+                           model_id: str | None = None, summarize=None) -> tuple[list, dict]:
+    """Attach file context within token_budget, then fit the history to the model's window.
+
+    Files that fit go in whole on the first user turn. Larger ones are searched per turn
+    and only the most relevant excerpts ride along with the latest question. Returns the
+    messages to send and the token report from fit_messages.
+    """
+    file_context, target = "", None
+    if file_index:
+        user_turns = [i for i, m in enumerate(history) if m["role"] == "user"]
+        if file_index.fits(token_budget):
+            file_context, target = file_index.full_text, user_turns[0] if user_turns else None
+        elif user_turns:
+            query = " ".join(history[i]["content"] for i in user_turns[-2:])
+            file_context, target = file_index.select(query, token_budget), user_turns[-1]
+
+    api_messages = []
+    for i, msg in enumerate(history):
+        content = msg["content"]
+        if i == target and file_context:
+            content = f"CONTEXT FROM FILES:\n{file_context}\n\n---\n\nUSER: {content}"
+        api_messages.append({"role": msg["role"], "content": content})
+    return fit_messages(api_messages, prompt_budget(model_id), summarize)
+
+
+def open_chat(api_key: str, history: list, file_index: ContextIndex, model_id: str, *, stream: bool = False,
+              context_budget: int = 6000, summarize=None, failover: bool = True, hedge: bool = False,
+              base_url: str = OPENROUTER_BASE_URL) -> tuple[object, str, int]:
+    """Send the conversation and return (response, model that answered, prompt tokens sent).
+
+    With stream the response is the provider's chunk iterator (see iter_deltas). Busy
+    models are retried, then the next model in FAILOVER_MODELS takes over; with hedge, a
+    request slower than HEDGE_AFTER_SECONDS is raced against the next model.
+    """
+    client = openai_client(api_key, base_url)
+    models = [model_id] + (FAILOVER_MODELS if failover else [])
+    api_messages, report = build_messages_for_api(file_index, history, context_budget, model_id, summarize)
+
+    def _open(model):
+        return client.chat.completions.create(
+            model=model,
+            messages=api_messages,
+            stream=stream,
+            extra_headers=EXTRA_HEADERS
+        )
+
+    response, model_id = route(_open, models, hedge_after=HEDGE_AFTER_SECONDS if hedge else None)
+    return response, model_id, report["tokens"]
+
+
+def iter_deltas(response):
+    """Text pieces of a streamed chat completion, skipping empty keep-alive chunks."""
+    for chunk in response:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            yield delta
+
+
+def chat_with_tools(api_key: str, history: list, file_index: ContextIndex, model_id: str, tools: TableTools,
+                    on_query=None, *, context_budget: int = 6000, summarize=None, failover: bool = True,
+                    hedge: bool = False, base_url: str = OPENROUTER_BASE_URL) -> tuple[str, str, int]:
+    """Answer with the model free to query the uploaded tables. Returns (reply, model, prompt tokens).
+
+    Each round the model either answers or asks for queries; queries run locally
+    (table_query) and only their result rows go back. on_query(sql) is called for every
+    query that ran. After MAX_TOOL_STEPS rounds the tools are withdrawn so it must answer.
+    """
+    client = openai_client(api_key, base_url)
+    models = [model_id] + (FAILOVER_MODELS if failover else [])
+    api_messages, report = build_messages_for_api(file_index, history, context_budget, model_id, summarize)
+    messages = [{"role": "system", "content": TABLE_TOOLS_NOTE.format(tables=tools.describe())}] + api_messages
+
+    for step in range(MAX_TOOL_STEPS + 1):
+        offer = {"tools": tools.schemas} if step < MAX_TOOL_STEPS else {}
+
+        def _open(model):
+            return client.chat.completions.create(
+                model=model, messages=messages, extra_headers=EXTRA_HEADERS, **offer
+            )
+
+        response, model_id = route(_open, models, hedge_after=HEDGE_AFTER_SECONDS if hedge else None)
+        message = response.choices[0].message
+        # Tool calls made anyway after the tools were withdrawn are ignored: it answers with what it has
+        if not message.tool_calls or step == MAX_TOOL_STEPS:
+            return message.content or "", model_id, report["tokens"]
+
+        messages.append({"role": "assistant", "content": message.content or "", "tool_calls": [
+            {"id": call.id, "type": "function",
+             "function": {"name": call.function.name, "arguments": call.function.arguments}}
+            for call in message.tool_calls
+        ]})
+        for call in message.tool_calls:
+            result, sql = tools.call(call.function.name, call.function.arguments)
+            if on_query and sql:
+                on_query(sql)
+            messages.append({"role": "tool", "tool_call_id": call.id, "content": result})
+
+
+def _tools_unsupported(e: Exception) -> bool:
+    return status_of(e) in (400, 404) and "tool" in str(e).lower()
+
+
+def chat_reply(api_key: str, history: list, file_index: ContextIndex, model_id: str, on_text=None,
+               min_interval: float = 0.12, tools: TableTools | None = None, on_query=None,
+               **options) -> tuple[str, float, int, str]:
+    """Next assistant reply as (reply, seconds, prompt tokens sent, model that answered).
+
+    With on_text set the reply is streamed and on_text(reply_so_far) is called as it grows.
+    With tools the model may query the uploaded tables first (see chat_with_tools); the
+    reply then arrives in one piece. Models without tool support get a plain request.
+    options are passed to open_chat.
+    """
+    t0 = time.time()
+    if tools:
+        try:
+            reply, model_id, tokens = chat_with_tools(api_key, history, file_index, model_id, tools, on_query,
+                                                      **options)
+            if on_text is not None:
+                on_text(reply)
+            return reply, time.time() - t0, tokens, model_id
+        except Exception as e:
+            if not _tools_unsupported(e):
+                raise
+    response, model_id, tokens = open_chat(api_key, history, file_index, model_id,
+                                           stream=on_text is not None, **options)
+    if on_text is None:
+        return response.choices[0].message.content, time.time() - t0, tokens, model_id
+
+    reply, last = "", 0.0
+    for delta in iter_deltas(response):
+        reply += delta
+        if time.time() - last >= min_interval:
+            on_text(reply)
+            last = time.time()
+    on_text(reply)
+    return reply, time.time() - t0, tokens, model_id
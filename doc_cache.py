@@ -0,0 +1,172 @@
+"""Content-addressed cache for text extracted from uploaded documents.
+
+Entries are keyed by a SHA-256 of (namespace, extractor version, file bytes), so the
+same resume uploaded twice — in another rerun, session or browser — is parsed once.
+An in-memory LRU sits in front of an optional on-disk tier (one JSON file per entry)
+that is trimmed oldest-first once it grows past its size budget.
+
+The module is Streamlit-free so it can be imported from any entry point; the process-wide
+instance is `text_cache`, configured through RF_TEXT_CACHE_DIR / RF_TEXT_CACHE_MB.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def file_bytes(file) -> bytes:
+    """Raw bytes of an uploaded file without disturbing its read position."""
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    pos = file.tell()
+    file.seek(0)
+    data = file.read()
+    file.seek(pos)
+    return data
+
+
+def file_digest(file) -> str:
+    """SHA-256 of an uploaded file's bytes — its identity independent of name or upload."""
+    return hashlib.sha256(file_bytes(file)).hexdigest()
+
+
+def content_key(data: bytes, namespace: str, version: str) -> str:
+    h = hashlib.sha256()
+    h.update(f"{namespace}\0{version}\0".encode())
+    h.update(data)
+    return h.hexdigest()
+
+
+class TextCache:
+    """Two-tier LRU cache of JSON-serialisable extraction results."""
+
+    def __init__(self, max_entries: int = 128, max_memory_bytes: int = 64 * 1024 * 1024,
+                 disk_dir: str | None = None, max_disk_bytes: int = 256 * 1024 * 1024):
+        self.max_entries      = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir         = disk_dir
+        self.max_disk_bytes   = max_disk_bytes
+        self._mem   = OrderedDict()    # key -> (value, approx size)
+        self._bytes = 0
+        self._lock  = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    # ── memory tier ──────────────────────────────────────────────────
+    def _remember(self, key, value, size):
+        if key in self._mem:
+            self._bytes -= self._mem.pop(key)[1]
+        self._mem[key] = (value, size)
+        self._bytes += size
+        while self._mem and (len(self._mem) > self.max_entries or self._bytes > self.max_memory_bytes):
+            _, (_, old_size) = self._mem.popitem(last=False)
+            self._bytes -= old_size
+            self._stats["evictions"] += 1
+
+    # ── disk tier ────────────────────────────────────────────────────
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), encoding="utf-8") as fh:
+                payload = fh.read()
+            os.utime(self._path(key))  # bump mtime so eviction is least-recently-used
+            return payload
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key, payload):
+        if not self.disk_dir:
+            return
+        tmp = self._path(key) + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(payload)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        try:
+            entries = [e for e in os.scandir(self.disk_dir) if e.name.endswith(".json")]
+        except OSError:
+            return
+        stats = sorted((st.st_mtime, st.st_size, e.path) for e, st in ((e, e.stat()) for e in entries))
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in stats:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self._stats["disk_evictions"] += 1
+            except OSError:
+                pass
+
+    # ── public API ───────────────────────────────────────────────────
+    def get(self, key):
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._mem[key][0]
+            payload = self._disk_get(key)
+            if payload is not None:
+                value = json.loads(payload)
+                self._remember(key, value, len(payload))
+                self._stats["disk_hits"] += 1
+                return value
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key, value):
+        payload = json.dumps(value)
+        with self._lock:
+            self._remember(key, value, len(payload))
+            self._disk_put(key, payload)
+
+    def get_or_extract(self, file, extract, namespace: str, version: str):
+        """Return the cached result for this file's bytes, or run extract(buffer) and store it.
+
+        extract receives a fresh BytesIO named like the upload. Exceptions propagate and
+        nothing is cached, so a failed parse is retried on the next run.
+        """
+        data = file_bytes(file)
+        ext  = getattr(file, "name", "").split(".")[-1].lower()
+        key  = content_key(data, f"{namespace}:{ext}", version)
+        hit  = self.get(key)
+        if hit is not None:
+            return hit
+        buf = io.BytesIO(data)
+        buf.name = getattr(file, "name", "")
+        value = extract(buf)
+        self.put(key, value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries":      len(self._mem),
+                "memory_bytes": self._bytes,
+                "hit_rate":     (self._stats["hits"] + self._stats["disk_hits"]) / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            self._bytes = 0
+
+
+text_cache = TextCache(
+    disk_dir=os.environ.get("RF_TEXT_CACHE_DIR") or None,
+    max_disk_bytes=int(os.environ.get("RF_TEXT_CACHE_MB", "256")) * 1024 * 1024,
+)
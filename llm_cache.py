@@ -0,0 +1,101 @@
+"""SQLite-backed cache of LLM completions for identical requests.
+
+A response is keyed by a SHA-256 of (provider, model, temperature, system task, user
+content) and lives for `ttl_seconds`. Once the table holds more than `max_entries`
+rows the least recently used ones are dropped.
+
+Responses quote the uploaded resume, so by default the cache is kept in memory only
+and is gone when the process exits. Setting RF_LLM_CACHE_PATH to a file opts in to a
+disk cache that survives restarts and keeps responses for RF_LLM_CACHE_TTL seconds
+(7 days by default).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def request_key(provider: str, model: str, temperature, system_task: str, user_content: str) -> str:
+    raw = json.dumps([provider, model, temperature, system_task, user_content], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 2000):
+        self.path        = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock  = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        self._db    = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+        self._db.commit()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            response, created = row
+            if now - created > self.ttl_seconds:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self._stats["hits"] += 1
+            return response
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+            overflow = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)", (overflow,)
+                )
+                self._stats["evictions"] += overflow
+            self._db.commit()
+
+    def get_or_call(self, key: str, call) -> str:
+        """Return the cached response for key, or call() and store a non-empty result."""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        response = call()
+        if response:
+            self.put(key, response)
+        return response
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {**self._stats, "entries": entries}
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+
+response_cache = ResponseCache(
+    os.environ.get("RF_LLM_CACHE_PATH") or ":memory:",
+    ttl_seconds=float(os.environ.get("RF_LLM_CACHE_TTL", 7 * 24 * 3600)),
+)
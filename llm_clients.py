@@ -0,0 +1,69 @@
+"""Process-wide registry of LLM clients.
+
+Streamlit re-executes the app script on every interaction, so building an `OpenAI(...)`
+client there means a fresh connection pool and TLS handshake per turn. Clients created
+here live for the life of the server process, keyed by provider, base URL and key, and
+share keep-alive connections across reruns and sessions.
+
+Pool size and timeouts come from RF_LLM_POOL_SIZE, RF_LLM_CONNECT_TIMEOUT and
+RF_LLM_READ_TIMEOUT, or can be passed explicitly on first use. RF_LLM_BASE_URL points the
+OpenAI-compatible clients somewhere other than OpenRouter, e.g. a local mock server.
+
+The SDKs are imported on first use, so a process that only ever talks to OpenRouter
+never loads google.generativeai and vice versa.
+"""
+import os
+import threading
+
+OPENROUTER_BASE_URL = os.environ.get("RF_LLM_BASE_URL", "https://openrouter.ai/api/v1")
+
+POOL_SIZE       = int(os.environ.get("RF_LLM_POOL_SIZE", "20"))
+CONNECT_TIMEOUT = float(os.environ.get("RF_LLM_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT    = float(os.environ.get("RF_LLM_READ_TIMEOUT", "180"))
+
+_lock    = threading.Lock()
+_clients = {}
+_gemini_key = None
+
+
+def openai_client(api_key: str, base_url: str = OPENROUTER_BASE_URL, *,
+                  pool_size: int | None = None, connect_timeout: float | None = None,
+                  read_timeout: float | None = None):
+    """Shared OpenAI-compatible client for (base_url, api_key); created on first use."""
+    key = ("openai", base_url, api_key)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            import httpx
+            from openai import OpenAI
+            size = pool_size or POOL_SIZE
+            http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+                timeout=httpx.Timeout(read_timeout or READ_TIMEOUT, connect=connect_timeout or CONNECT_TIMEOUT),
+            )
+            client = _clients[key] = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+        return client
+
+
+def gemini_model(api_key: str, model_name: str):
+    """Shared GenerativeModel; genai.configure runs only when the API key changes."""
+    global _gemini_key
+    key = ("gemini", model_name, api_key)
+    with _lock:
+        model = _clients.get(key)
+        if model is None:
+            import google.generativeai as genai
+            if _gemini_key != api_key:
+                genai.configure(api_key=api_key)
+                _gemini_key = api_key
+            model = _clients[key] = genai.GenerativeModel(model_name)
+        return model
+
+
+def close_all():
+    """Close pooled HTTP connections (for tests and CLI shutdown)."""
+    with _lock:
+        for key, client in list(_clients.items()):
+            if key[0] == "openai":
+                client.close()
+        _clients.clear()
@@ -0,0 +1,184 @@
+"""Failover routing across LLM models with retries, hedging and per-model health.
+
+`route(call, models)` tries each model in order. Transient failures (429, 5xx, "no healthy
+upstream", timeouts) are retried with jittered exponential backoff, then the model is put
+on a cooldown and the next one is tried. Errors that belong to one model or provider
+(a 404 for a retired model, a 400 another provider would accept, a 402 or 403 on one
+key) skip straight to the next model. Models still cooling down are skipped unless
+nothing else is left. With `hedge_after` set, a request that has not come back within
+that many seconds is raced against the next healthy model and the first success wins.
+
+`call(model_id)` does the actual request; for streams it should return once the response
+has started (headers received), so failover never happens after text has been shown.
+Health is process-wide, so one session's 503s spare every other session the wait.
+"""
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 520, 522, 524, 529}
+FAILOVER_STATUS  = {400, 401, 402, 403, 404, 413, 422}   # not worth retrying, but another model may succeed
+COOLDOWN_SECONDS = 120.0
+
+
+class AllModelsFailed(Exception):
+    """Every candidate model failed. str() carries the last error so callers can classify it."""
+
+    def __init__(self, errors: list[tuple[str, Exception]]):
+        self.errors = errors
+        super().__init__(str(errors[-1][1]) if errors else "No models available")
+
+
+def status_of(e: Exception) -> int | None:
+    for attr in ("status_code", "code"):
+        code = getattr(e, attr, None)
+        if isinstance(code, int):
+            return code
+    match = re.search(r"Error code: (\d+)", str(e))
+    return int(match.group(1)) if match else None
+
+
+def is_retryable(e: Exception) -> bool:
+    code = status_of(e)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    name = type(e).__name__
+    return "Timeout" in name or "Connection" in name or "no healthy upstream" in str(e)
+
+
+def should_fail_over(e: Exception) -> bool:
+    """Whether the next model is worth trying after e: transient, or specific to one model or provider."""
+    return is_retryable(e) or status_of(e) in FAILOVER_STATUS
+
+
+class ModelHealth:
+    def __init__(self):
+        self._lock  = threading.Lock()
+        self._state = {}   # model -> {"failures", "cooldown_until", "last_error", "latency"}
+
+    def _entry(self, model):
+        return self._state.setdefault(model, {"failures": 0, "cooldown_until": 0.0, "last_error": "", "latency": None})
+
+    def available(self, model) -> bool:
+        with self._lock:
+            return self._entry(model)["cooldown_until"] <= time.time()
+
+    def success(self, model, latency: float):
+        with self._lock:
+            e = self._entry(model)
+            e["failures"], e["cooldown_until"] = 0, 0.0
+            e["latency"] = latency if e["latency"] is None else 0.7 * e["latency"] + 0.3 * latency
+
+    def failure(self, model, error: Exception, cooldown: float = COOLDOWN_SECONDS):
+        with self._lock:
+            e = self._entry(model)
+            e["failures"] += 1
+            e["last_error"] = str(error)[:200]
+            # Back off harder on models that keep failing
+            e["cooldown_until"] = time.time() + cooldown * min(e["failures"], 5)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {m: dict(e) for m, e in self._state.items()}
+
+
+health = ModelHealth()
+_pool  = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+
+def _close(result):
+    close = getattr(result, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception:
+            pass
+
+
+def _attempt(call, model, retries, base_delay):
+    """Call one model, retrying transient errors with full-jitter backoff."""
+    for n in range(retries + 1):
+        t0 = time.time()
+        try:
+            result = call(model)
+            health.success(model, time.time() - t0)
+            return result
+        except Exception as e:
+            if not is_retryable(e) or n == retries:
+                if is_retryable(e):
+                    health.failure(model, e)
+                raise
+            time.sleep(random.uniform(0, base_delay * 2 ** n))
+
+
+def _hedged(call, primary, backup, retries, base_delay, hedge_after):
+    """Race backup against primary once primary is slower than hedge_after. Returns (result, model)."""
+    futures = {_pool.submit(_attempt, call, primary, retries, base_delay): primary}
+    done, _ = wait(futures, timeout=hedge_after)
+    if not done:
+        futures[_pool.submit(_attempt, call, backup, retries, base_delay)] = backup
+    errors, pending = [], set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            try:
+                result = fut.result()
+            except Exception as e:
+                errors.append((futures[fut], e))
+                continue
+            for loser in pending:   # release the slower request's connection when it lands
+                loser.add_done_callback(lambda f: f.exception() or _close(f.result()))
+            return result, futures[fut]
+    raise AllModelsFailed(errors)
+
+
+def route(call, models: list[str], *, retries: int = 1, base_delay: float = 0.6,
+          hedge_after: float | None = None) -> tuple[object, str]:
+    """Run call(model) against models in failover order. Returns (result, model that served it)."""
+    models = list(dict.fromkeys(m for m in models if m))
+    healthy = [m for m in models if health.available(m)] or models
+    errors = []
+    i = 0
+    while i < len(healthy):
+        model = healthy[i]
+        try:
+            if hedge_after is not None and i + 1 < len(healthy):
+                result, served = _hedged(call, model, healthy[i + 1], retries, base_delay, hedge_after)
+                return result, served
+            return _attempt(call, model, retries, base_delay), model
+        except AllModelsFailed as e:
+            errors.extend(e.errors)
+            if any(not should_fail_over(err) for _, err in e.errors):
+                raise AllModelsFailed(errors)
+            i += len(e.errors)   # the backup only ran if the primary was still going at hedge_after
+        except Exception as e:
+            errors.append((model, e))
+            if not should_fail_over(e):
+                raise
+            i += 1
+    raise AllModelsFailed(errors)
+
+
+class RateLimiter:
+    """Token bucket shared by concurrent workers: at most `per_minute` request starts per minute."""
+
+    def __init__(self, per_minute: float, burst: int | None = None):
+        self.rate   = per_minute / 60.0
+        self.burst  = burst or max(1, int(per_minute // 6))
+        self.tokens = float(self.burst)
+        self.stamp  = time.monotonic()
+        self._lock  = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp  = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate
+            time.sleep(wait_for)
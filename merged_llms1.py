@@ -1,10 +1,9 @@
 import streamlit as st
 import time
 import re
-from pypdf import PdfReader
-from docx import Document
-from openai import OpenAI
-import google.generativeai as genai
+from doc_cache import text_cache
+from pdf_pages import extract_pdf_text
+from llm_clients import openai_client, gemini_model as shared_gemini_model
 
 # ==============================
 # CONFIG & THEME
@@ -43,29 +42,31 @@ model_map = {
 }
 
 if "Gemini" not in PROVIDER:
-    client = OpenAI(
-        api_key=st.secrets["OPENROUTER_API_KEY"], 
-        base_url="https://openrouter.ai/api/v1"
-    )
+    client = openai_client(st.secrets["OPENROUTER_API_KEY"])
     # Set the MODEL_NAME based on the selection
     MODEL_NAME = model_map.get(PROVIDER)
 else:
     # Your Gemini logic (gemini-via google)
-    genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
-    #gemini_model = genai.GenerativeModel("gemini-3-flash")
-    gemini_model = genai.GenerativeModel("gemini-2.5-flash")
+    #gemini_model = shared_gemini_model(st.secrets["GEMINI_API_KEY"], "gemini-3-flash")
+    gemini_model = shared_gemini_model(st.secrets["GEMINI_API_KEY"], "gemini-2.5-flash")
 
 # ==============================
 # HELPERS
 # ==============================
-def extract_text(file):
+EXTRACTOR_VERSION = "2"
+
+def _extract_text_uncached(file):
     ext = file.name.split(".")[-1].lower()
+    if ext == "pdf":
+        return extract_pdf_text(file.getvalue())[0]
+    elif ext == "docx":
+        from docx import Document   # parsers load on first use of their file type
+        return "\n".join(p.text for p in Document(file).paragraphs)
+    return file.read().decode("utf-8")
+
+def extract_text(file):
     try:
-        if ext == "pdf":
-            return "\n".join(page.extract_text() for page in PdfReader(file).pages)
-        elif ext == "docx":
-            return "\n".join(p.text for p in Document(file).paragraphs)
-        return file.read().decode("utf-8")
+        return text_cache.get_or_extract(file, _extract_text_uncached, "architect", EXTRACTOR_VERSION)
     except Exception as e:
         st.error(f"File reading error: {e}")
         return ""
@@ -0,0 +1,104 @@
+"""Local stand-in for an OpenAI-compatible chat completions endpoint.
+
+    uvicorn mock_llm:app --port 9000
+    RF_LLM_BASE_URL=http://127.0.0.1:9000/v1 OPENROUTER_API_KEY=test uvicorn api:app
+
+Replies are canned but shaped like the real thing: ResumeForge prompts get the marker
+format its parsers expect, anything else gets an echo of the last user message. Both
+plain and streamed (SSE) responses are supported. MOCK_LLM_DELAY adds seconds of latency
+per chunk and MOCK_LLM_FAIL_RATE answers that share of requests with a 503, to exercise
+concurrency, retries and failover without spending API quota.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+DELAY     = float(os.environ.get("MOCK_LLM_DELAY", "0.02"))
+FAIL_RATE = float(os.environ.get("MOCK_LLM_FAIL_RATE", "0"))
+
+COMBINED_REPLY = """MATCH_SCORE: 72
+
+---ORIGINAL_SUMMARY---
+NONE
+---END_ORIGINAL_SUMMARY---
+
+---SUMMARY---
+Engineer with a record of shipping reliable services, ready to bring that experience to this role.
+---END_SUMMARY---
+
+---ATS_KEYWORDS---
+Python, asyncio, PostgreSQL, CI/CD, observability
+---END_ATS---
+
+---BULLET---
+ORIGINAL: Worked on backend services
+REWRITTEN: Built and operated Python backend services handling 2M requests/day
+---END---"""
+
+SCORE_REPLY = """MATCH_SCORE: 64
+
+---ATS_KEYWORDS---
+Kubernetes, Terraform, gRPC
+---END_ATS---
+
+---VERDICT---
+Strong backend fit; little evidence of infrastructure-as-code.
+---END_VERDICT---"""
+
+
+def reply_for(messages: list[dict]) -> str:
+    prompt = "\n".join(m.get("content") or "" for m in messages)
+    if "---BULLET---" in prompt:
+        return COMBINED_REPLY
+    if "---VERDICT---" in prompt:
+        return SCORE_REPLY
+    if "MATCH_SCORE" in prompt:
+        return "MATCH_SCORE: 58\n\n**Hard Skills**\n- Kubernetes\n\n**Soft Skills**\n- Stakeholder management"
+    last = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    return f"Mock reply to: {last[-200:]}"
+
+
+def _chunk(cid, model, delta: dict, finish=None) -> str:
+    payload = {"id": cid, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+               "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def completions(request):
+    body  = await request.json()
+    model = body.get("model", "mock")
+    if random.random() < FAIL_RATE:
+        return JSONResponse({"error": {"message": "no healthy upstream", "code": 503}}, status_code=503)
+
+    text = reply_for(body.get("messages", []))
+    cid  = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    if not body.get("stream"):
+        await asyncio.sleep(DELAY * 5)
+        return JSONResponse({
+            "id": cid, "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    async def events():
+        yield _chunk(cid, model, {"role": "assistant", "content": ""})
+        for i in range(0, len(text), 24):
+            await asyncio.sleep(DELAY)
+            yield _chunk(cid, model, {"content": text[i:i + 24]})
+        yield _chunk(cid, model, {}, "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+app = Starlette(routes=[
+    Route("/v1/chat/completions", completions, methods=["POST"]),
+    Route("/chat/completions", completions, methods=["POST"]),
+])
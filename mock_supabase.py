@@ -0,0 +1,83 @@
+"""Local stand-in for the slice of Supabase's PostgREST API the analytics use.
+
+    uvicorn mock_supabase:app --port 9100
+    # .streamlit/secrets.toml:  [supabase]  url = "http://127.0.0.1:9100"  key = "test"
+
+Serves /rest/v1/analytics (GET, HEAD with `Prefer: count=exact`, POST of one row or
+a list, `event=eq.x` filters) and /rest/v1/analytics_counts, the grouped rollup. Set
+MOCK_SUPABASE_ROLLUP=0 to leave the rollup out (a 404, as before ROLLUP_SQL is run),
+MOCK_SUPABASE_SEED=N to start with N random events, and MOCK_SUPABASE_DELAY for
+seconds of latency per request. Data is kept in memory.
+"""
+import asyncio
+import datetime
+import os
+import random
+from collections import Counter
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+ROLLUP = os.environ.get("MOCK_SUPABASE_ROLLUP", "1") != "0"
+DELAY  = float(os.environ.get("MOCK_SUPABASE_DELAY", "0"))
+SEED   = int(os.environ.get("MOCK_SUPABASE_SEED", "0"))
+
+EVENTS = ["visit", "run", "goal_combined", "goal_gap", "cover_letter_generated"]
+
+rows: list[dict] = []
+
+
+def _insert(event: str):
+    rows.append({"id": len(rows) + 1, "event": event,
+                 "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat()})
+
+
+for _ in range(SEED):
+    _insert(random.choice(EVENTS))
+
+
+def _filtered(params) -> list[dict]:
+    found = rows
+    for column, condition in params.items():
+        if column in ("select", "limit", "offset", "order"):
+            continue
+        op, _, value = condition.partition(".")
+        if op != "eq":
+            raise ValueError(f"operator {op!r} is not supported by the mock")
+        found = [r for r in found if str(r.get(column)) == value]
+    return found
+
+
+async def analytics(request):
+    await asyncio.sleep(DELAY)
+    if request.method == "POST":
+        body = await request.json()
+        for row in body if isinstance(body, list) else [body]:
+            _insert(row["event"])
+        return Response(status_code=201)
+    try:
+        found = _filtered(request.query_params)
+    except ValueError as e:
+        return JSONResponse({"code": "PGRST100", "message": str(e)}, status_code=400)
+    headers = {}
+    if "count=exact" in request.headers.get("prefer", ""):
+        headers["Content-Range"] = f"0-{len(found) - 1}/{len(found)}" if found else f"*/{len(found)}"
+    if request.method == "HEAD":
+        return Response(headers=headers)
+    columns = [c for c in request.query_params.get("select", "*").split(",") if c != "*"]
+    return JSONResponse([{c: r.get(c) for c in columns} if columns else r for r in found], headers=headers)
+
+
+async def analytics_counts(request):
+    await asyncio.sleep(DELAY)
+    if not ROLLUP:
+        return JSONResponse({"code": "PGRST205", "message": "Could not find the table 'public.analytics_counts'"},
+                            status_code=404)
+    return JSONResponse([{"event": e, "n": n} for e, n in Counter(r["event"] for r in rows).items()])
+
+
+app = Starlette(routes=[
+    Route("/rest/v1/analytics", analytics, methods=["GET", "HEAD", "POST"]),
+    Route("/rest/v1/analytics_counts", analytics_counts, methods=["GET"]),
+])
@@ -0,0 +1,171 @@
+"""OCR for image uploads and scanned PDF pages.
+
+Tesseract is most accurate around 300 DPI on clean black-on-white input, and slowest on
+the 12-megapixel phone photos people actually upload. `prepare` therefore rescales each
+image towards TARGET_DPI (capped at MAX_SIDE pixels), converts it to greyscale and
+binarises it with an Otsu threshold before recognition.
+
+Scanned PDF pages have no text layer, but they carry the scan itself as an embedded
+image; `pdf_page_images` pulls the largest image off each page together with its real
+DPI (pixel width over the page's printed width), so nothing has to be rendered.
+
+Recognition fans out across the process pool shared with pdf_pages. Results are cached
+by a hash of the image bytes, and `ocr_images` stops waiting once a document's time
+budget is spent — pages still running are cached when they land, for the next upload.
+"""
+import hashlib
+import io
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from doc_cache import text_cache
+from pdf_pages import process_pool
+
+OCR_VERSION   = "1"    # bump when preprocessing or Tesseract settings change
+TARGET_DPI    = 300
+MAX_SIDE      = 4200   # px; an A4 page at 360 DPI
+SMALL_SIDE    = 1000   # px; images below this with no DPI info are upscaled 2x
+OCR_LANG      = os.environ.get("RF_OCR_LANG", "eng")
+OCR_BUDGET    = float(os.environ.get("RF_OCR_BUDGET", "30"))   # seconds per document
+
+
+def _otsu(histogram: list[int]) -> int:
+    """Grey level that best separates ink from paper (maximum between-class variance)."""
+    total   = sum(histogram)
+    sum_all = sum(i * h for i, h in enumerate(histogram))
+    sum_bg = weight_bg = 0
+    best, threshold = -1.0, 127
+    for t, count in enumerate(histogram):
+        weight_bg += count
+        if not weight_bg:
+            continue
+        weight_fg = total - weight_bg
+        if not weight_fg:
+            break
+        sum_bg += t * count
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if between > best:
+            best, threshold = between, t
+    return threshold
+
+
+def prepare(image, dpi: float | None = None):
+    """Greyscale, rescale towards TARGET_DPI and binarise an image for Tesseract."""
+    from PIL import Image, ImageOps
+    image = ImageOps.exif_transpose(image).convert("L")
+    dpi = dpi or (image.info.get("dpi") or (None,))[0]
+    side = max(image.size)
+    if dpi:
+        scale = TARGET_DPI / float(dpi)
+    else:
+        scale = 2.0 if side < SMALL_SIDE else 1.0
+    scale = min(scale, MAX_SIDE / side)
+    if abs(scale - 1) > 0.1:
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                             Image.LANCZOS)
+    image = ImageOps.autocontrast(image)
+    threshold = _otsu(image.histogram())
+    return image.point(lambda p: 255 if p > threshold else 0)
+
+
+def _recognise(data: bytes, dpi: float | None) -> str:
+    """Worker: OCR one encoded image. Runs in a pool process."""
+    from PIL import Image
+    import pytesseract
+    return pytesseract.image_to_string(prepare(Image.open(io.BytesIO(data)), dpi), lang=OCR_LANG)
+
+
+def _key(data: bytes) -> str:
+    h = hashlib.sha256(f"ocr\0{OCR_VERSION}\0{OCR_LANG}\0".encode())
+    h.update(data)
+    return h.hexdigest()
+
+
+def ocr_images(images: dict, budget: float | None = None) -> dict:
+    """OCR {id: (image bytes, dpi or None)} within budget seconds; returns {id: text}.
+
+    Images not finished in time are left out of the result. Any error from Tesseract
+    (e.g. the binary is missing) is raised once every in-time result has been cached.
+    """
+    budget  = OCR_BUDGET if budget is None else budget
+    results = {}
+    pending = {}
+    for ident, (data, dpi) in images.items():
+        key = _key(data)
+        hit = text_cache.get(key)
+        if hit is not None:
+            results[ident] = hit
+        else:
+            pending.setdefault(key, (data, dpi, []))[2].append(ident)
+    if not pending:
+        return results
+
+    pool     = process_pool()
+    futures  = {pool.submit(_recognise, data, dpi): (key, idents) for key, (data, dpi, idents) in pending.items()}
+    deadline = time.monotonic() + budget
+    error    = None
+
+    def _store(fut):
+        if not fut.cancelled() and fut.exception() is None:
+            text_cache.put(futures[fut][0], fut.result())
+
+    for fut in futures:
+        fut.add_done_callback(_store)
+    waiting = set(futures)
+    while waiting:
+        done, waiting = wait(waiting, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for fut in done:
+            if fut.exception() is not None:
+                error = error or fut.exception()
+                continue
+            for ident in futures[fut][1]:
+                results[ident] = fut.result()
+    for fut in waiting:   # over budget: drop what has not started, let running ones finish into the cache
+        fut.cancel()
+    if error is not None and not results:
+        raise error
+    return results
+
+
+def ocr_image(data: bytes, budget: float | None = None) -> str:
+    """Text of one uploaded image; raises if it cannot be read in time."""
+    text = ocr_images({0: (data, None)}, budget).get(0)
+    if text is None:
+        raise TimeoutError(f"OCR did not finish within {budget or OCR_BUDGET:.0f}s")
+    return text
+
+
+def pdf_page_images(data: bytes, numbers: list[int]) -> dict:
+    """{page number: (image bytes, dpi)} for the largest embedded image on each page."""
+    from pypdf import PdfReader
+    reader = PdfReader(io.BytesIO(data))
+    images = {}
+    for n in numbers:
+        page = reader.pages[n]
+        try:
+            candidates = list(page.images)
+        except Exception:   # unsupported image filter; leave the page to the caller's note
+            continue
+        if not candidates:
+            continue
+        best = max(candidates, key=lambda im: im.image.width * im.image.height if im.image else 0)
+        if best.image is None:
+            continue
+        width_inches = float(page.mediabox.width) / 72
+        images[n] = (best.data, best.image.width / width_inches if width_inches else None)
+    return images
+
+
+def ocr_pdf_pages(data: bytes, numbers: list[int], budget: float | None = None) -> dict:
+    """{page number: text} for the scanned pages of a PDF that could be read within budget."""
+    if not numbers:
+        return {}
+    started = time.monotonic()
+    images  = pdf_page_images(data, numbers)
+    budget  = OCR_BUDGET if budget is None else budget
+    return ocr_images(images, max(0.0, budget - (time.monotonic() - started)))
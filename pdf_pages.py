@@ -0,0 +1,150 @@
+"""Page-level PDF text extraction: parallel, cached per page, streamed in page order.
+
+`iter_pages(data)` yields one `Page` per page as soon as it and every page before it are
+ready, so callers can show progress or start work on the opening pages while the rest
+are still being parsed. Long documents are split into page ranges and parsed across a
+process pool (pypdf is pure Python, so threads would serialise on the GIL); short ones
+are parsed in-process, where a pool would cost more than it saves.
+
+Every page is cached under (document hash, page number), so re-running with a higher
+page cap, or re-uploading the same PDF, only parses pages not seen before. Pages with
+(almost) no extractable text are flagged `needs_ocr` — usually scans or image-only pages.
+"""
+import hashlib
+import io
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from doc_cache import TextCache
+
+PAGE_VERSION       = "1"   # bump when the per-page parsing changes
+MIN_PAGE_CHARS     = 16    # fewer extractable characters than this and the page is treated as scanned
+PARALLEL_MIN_PAGES = 12    # below this many uncached pages, parse in-process
+MIN_BATCH_PAGES    = 4
+WORKERS = int(os.environ.get("RF_PDF_WORKERS", "0")) or max(1, min(4, os.cpu_count() or 1))
+
+_cache_dir = os.environ.get("RF_TEXT_CACHE_DIR")
+page_cache = TextCache(
+    max_entries=8192,
+    disk_dir=os.path.join(_cache_dir, "pages") if _cache_dir else None,
+    max_disk_bytes=int(os.environ.get("RF_TEXT_CACHE_MB", "256")) * 1024 * 1024,
+)
+
+_pool      = None
+_pool_lock = threading.Lock()
+
+
+@dataclass
+class Page:
+    number:    int    # 0-based
+    text:      str
+    needs_ocr: bool
+    total:     int    # pages in the whole document, not just those read
+
+
+def process_pool() -> ProcessPoolExecutor:
+    """Process pool shared by page extraction and OCR, started on first use.
+
+    spawn rather than fork: the Streamlit server is multi-threaded, and forking it
+    can deadlock a child on a lock some other thread held.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _extract_pages(data: bytes, numbers: list[int]) -> list[str]:
+    """Worker: text of the given pages. Runs in a pool process."""
+    from pypdf import PdfReader
+    reader = PdfReader(io.BytesIO(data))
+    return [reader.pages[n].extract_text() or "" for n in numbers]
+
+
+def _page_key(doc: str, number: int) -> str:
+    return hashlib.sha256(f"pdfpage\0{PAGE_VERSION}\0{doc}\0{number}".encode()).hexdigest()
+
+
+def _batches(numbers: list[int], workers: int) -> list[list[int]]:
+    """Split page numbers into ordered batches, about two per worker.
+
+    Every batch re-parses the document's structure in its worker, so batches stay few
+    and large rather than one per page.
+    """
+    size = max(MIN_BATCH_PAGES, math.ceil(len(numbers) / (workers * 2)))
+    return [numbers[i:i + size] for i in range(0, len(numbers), size)]
+
+
+def iter_pages(data: bytes, max_pages: int | None = None, workers: int | None = None):
+    """Yield a Page for each of the first max_pages pages (all by default), in order."""
+    from pypdf import PdfReader
+    reader  = PdfReader(io.BytesIO(data))
+    limit   = min(len(reader.pages), max_pages or len(reader.pages))
+    doc     = hashlib.sha256(data).hexdigest()
+    keys    = [_page_key(doc, n) for n in range(limit)]
+    texts   = [page_cache.get(k) for k in keys]
+    missing = [n for n, t in enumerate(texts) if t is None]
+    workers = workers or WORKERS
+
+    def _page(n, text):
+        if texts[n] is None:
+            texts[n] = text
+            page_cache.put(keys[n], text)
+        return Page(n, text, len(text.strip()) < MIN_PAGE_CHARS, len(reader.pages))
+
+    if len(missing) < PARALLEL_MIN_PAGES or workers <= 1:
+        for n in range(limit):
+            yield _page(n, texts[n] if texts[n] is not None else reader.pages[n].extract_text() or "")
+        return
+
+    pool    = process_pool()
+    batches = _batches(missing, workers)
+    futures = [pool.submit(_extract_pages, data, batch) for batch in batches]
+    owner   = {n: k for k, batch in enumerate(batches) for n in batch}
+    try:
+        for n in range(limit):
+            if texts[n] is None:
+                k = owner[n]
+                for i, text in zip(batches[k], futures[k].result()):
+                    texts[i] = text
+                    page_cache.put(keys[i], text)
+            yield _page(n, texts[n])
+    finally:
+        for fut in futures:   # no-op for finished batches; drops queued ones if the caller stopped early
+            fut.cancel()
+
+
+def extract_pdf_text(data: bytes, max_pages: int | None = None, on_page=None,
+                     ocr: bool = False, ocr_budget: float | None = None) -> tuple[str, list[int]]:
+    """(text of the first max_pages pages, numbers of pages still without text).
+
+    on_page(page, pages_to_read) is called as each page arrives. With ocr, text-less
+    pages are run through ocr.ocr_pdf_pages within ocr_budget seconds. When the cap cuts
+    the document short, a closing note says how many pages were read.
+    """
+    parts, scanned, total = [], [], 0
+    for page in iter_pages(data, max_pages):
+        total = page.total
+        parts.append(page.text)
+        if page.needs_ocr:
+            scanned.append(page.number)
+        if on_page:
+            on_page(page, min(total, max_pages or total))
+    if ocr and scanned:
+        from ocr import ocr_pdf_pages
+        try:
+            recognised = ocr_pdf_pages(data, scanned, ocr_budget)
+        except Exception:   # Tesseract missing or failing: keep the text layer we have
+            recognised = {}
+        for n, page_text in recognised.items():
+            parts[n] = page_text
+        scanned = [n for n in scanned if len(recognised.get(n, "").strip()) < MIN_PAGE_CHARS]
+    text = "\n".join(parts)
+    if max_pages and total > max_pages:
+        text += f"\n\n[Only the first {max_pages} of {total} pages were read.]"
+    return text, scanned
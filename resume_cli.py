@@ -0,0 +1,138 @@
+"""Headless ResumeForge: analyse every resume in a folder against every job description.
+
+    python resume_cli.py --resumes resumes/ --jobs jobs/ --out results.jsonl --goal score
+
+--jobs may be a folder of .txt/.md postings (one per file, or several separated by '---'),
+or a single .csv/.jsonl file with a description column. Each (resume, job) pair becomes
+one JSON line in --out, written as soon as it finishes. Re-running with the same --out
+skips pairs that already succeeded, so an interrupted run picks up where it stopped;
+failed pairs are retried.
+
+API keys come from OPENROUTER_API_KEY / GEMINI_API_KEY or .streamlit/secrets.toml.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from llm_clients import close_all
+from llm_router import RateLimiter
+from resume_core import (
+    GEMINI_MODEL, OPENROUTER_MODELS, GOALS, LLMSettings, analyze, extract_text, load_keys, read_job_file,
+)
+
+RESUME_SUFFIXES = {".pdf", ".docx", ".txt"}
+JOB_SUFFIXES    = {".txt", ".md", ".csv", ".jsonl", ".ndjson"}
+
+
+def load_resumes(folder: str) -> dict[str, str]:
+    resumes = {}
+    for path in sorted(Path(folder).iterdir()):
+        if path.suffix.lower() not in RESUME_SUFFIXES:
+            continue
+        try:
+            with open(path, "rb") as f:
+                text = extract_text(f)
+        except Exception as e:
+            print(f"skip {path.name}: {e}", file=sys.stderr)
+            continue
+        if text.strip():
+            resumes[path.name] = text
+    return resumes
+
+
+def load_jobs(source: str) -> dict[str, dict]:
+    """Jobs keyed by a stable id (file name, plus #n when a file holds several postings)."""
+    paths = [Path(source)] if Path(source).is_file() else sorted(Path(source).iterdir())
+    jobs = {}
+    for path in paths:
+        if path.suffix.lower() not in JOB_SUFFIXES:
+            continue
+        found = read_job_file(path.read_text(encoding="utf-8-sig", errors="replace"), path.name)
+        for n, job in enumerate(found, 1):
+            jobs[path.name if len(found) == 1 else f"{path.name}#{n}"] = job
+    return jobs
+
+
+def completed_pairs(out_path: str) -> set[tuple[str, str]]:
+    """Pairs already written without an error by a previous run."""
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:   # last line of a run that was killed mid-write
+                continue
+            if not row.get("error"):
+                done.add((row["resume"], row["job"]))
+    return done
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    p.add_argument("--resumes", required=True, help="folder of .pdf/.docx/.txt resumes")
+    p.add_argument("--jobs", required=True, help="folder of postings, or one .csv/.jsonl file")
+    p.add_argument("--out", default="results.jsonl")
+    p.add_argument("--goal", choices=sorted(GOALS), default="score")
+    p.add_argument("--model", default=OPENROUTER_MODELS[0],
+                   help=f"model id, e.g. {GEMINI_MODEL} or an OpenRouter id")
+    p.add_argument("--job-title", default="")
+    p.add_argument("--cover-letter", action="store_true")
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--rpm", type=float, default=20, help="request starts per minute across all workers")
+    p.add_argument("--no-failover", action="store_true")
+    p.add_argument("--no-cache", action="store_true")
+    args = p.parse_args(argv)
+
+    openrouter_key, gemini_key = load_keys()
+    settings = LLMSettings(model=args.model, openrouter_key=openrouter_key, gemini_key=gemini_key,
+                           failover=not args.no_failover, use_cache=not args.no_cache)
+    if not (gemini_key if settings.provider == "gemini" else openrouter_key):
+        print(f"No API key for {settings.provider}.", file=sys.stderr)
+        return 2
+
+    resumes = load_resumes(args.resumes)
+    jobs    = load_jobs(args.jobs)
+    done    = completed_pairs(args.out)
+    pending = [(r, j) for r in resumes for j in jobs if (r, j) not in done]
+    print(f"{len(resumes)} resumes x {len(jobs)} jobs: {len(done)} done, {len(pending)} to run", file=sys.stderr)
+
+    limiter = RateLimiter(args.rpm)
+    calls   = 2 if args.cover_letter else 1
+
+    def _run(resume_name, job_id):
+        for _ in range(calls):
+            limiter.acquire()
+        job = jobs[job_id]
+        t0  = time.time()
+        try:
+            result = analyze(settings, resumes[resume_name], job["description"], args.goal,
+                             args.job_title, args.cover_letter)
+            error  = ""
+        except Exception as e:
+            result, error = {}, str(e)
+        return {"resume": resume_name, "job": job_id, "title": job["title"], "url": job["url"],
+                **result, "elapsed": round(time.time() - t0, 2), "error": error}
+
+    failed = 0
+    with open(args.out, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [pool.submit(_run, r, j) for r, j in pending]
+        for n, fut in enumerate(as_completed(futures), 1):
+            row = fut.result()
+            failed += bool(row["error"])
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+            status = row["error"][:80] if row["error"] else f"score {row.get('score')}"
+            print(f"[{n}/{len(pending)}] {row['resume']} x {row['job']}: {status}", file=sys.stderr)
+
+    close_all()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,660 @@
+"""ResumeForge pipeline without the Streamlit UI.
+
+Everything needed to turn (resume, job description) into an analysis lives here so the
+Streamlit app, the batch CLI (resume_cli.py) and any other entry point share one
+implementation: text extraction, prompts, LLM calls with caching and failover, and the
+parsers for the structured output format.
+"""
+import bisect
+import csv
+import difflib
+import io
+import json
+import os
+import re
+import tomllib
+from dataclasses import dataclass
+
+from doc_cache import text_cache
+from pdf_pages import extract_pdf_text
+from llm_cache import response_cache, request_key
+from llm_clients import OPENROUTER_BASE_URL, openai_client, gemini_model
+from llm_router import route
+
+GEMINI_MODEL      = "gemini-2.5-flash"
+OPENROUTER_MODELS = [
+    "google/gemma-4-31b-it:free",
+    "nvidia/nemotron-3-super-120b-a12b:free",
+    "minimax/minimax-m2.5:free",
+]
+LLM_TEMPERATURE   = 0.4
+
+
+# ==============================
+# PROMPTS
+# ==============================
+COMBINED_PROMPT = """You are an expert resume coach. Perform a full 3-part resume optimization in one pass.
+
+OUTPUT FORMAT — use these exact markers, in this exact order, no other text:
+
+MATCH_SCORE: [0-100 based on how well the resume fits the job description]
+
+---ORIGINAL_SUMMARY---
+[Copy the candidate's existing professional summary or objective statement verbatim from the resume. If none exists, write: NONE]
+---END_ORIGINAL_SUMMARY---
+
+---SUMMARY---
+[Write a compelling 3-4 sentence professional summary that bridges the candidate's experience to this specific job. Mirror the exact seniority, vocabulary and industry language of the role. Do NOT use generic openers like "Results-driven professional".]
+---END_SUMMARY---
+
+---ATS_KEYWORDS---
+[List the top 10-15 keywords and phrases extracted from the job description that are missing or underrepresented in the resume. Comma-separated. Include hard skills, tools, certifications, and role-specific terminology.]
+---END_ATS---
+
+[Then output every work-experience bullet point as a block below. Include ALL bullets from ALL jobs:]
+---BULLET---
+ORIGINAL: [exact original bullet text, copied verbatim from the resume]
+REWRITTEN: [rewritten version — strong action verb, quantified outcome, ATS keywords woven in naturally]
+---END---
+
+RULES:
+- Output NOTHING outside these markers — no intro, no section titles, no commentary
+- ORIGINAL must be the exact text from the resume, never paraphrased
+- Weave ATS keywords naturally into the REWRITTEN bullets — never stuff them
+- Cover every bullet from every role, not just a selection"""
+
+GAP_PROMPT = "Compare my resume against the job description. Identify exactly what hard and soft skills I am currently missing, split into Hard Skills and Soft Skills sections. For each missing skill, briefly explain why it matters for this role."
+
+BATCH_PROMPT = """You are an expert resume screener. Score how well the resume fits the job description.
+
+OUTPUT FORMAT — use these exact markers, no other text:
+
+MATCH_SCORE: [0-100 based on how well the resume fits the job description]
+
+---ATS_KEYWORDS---
+[The 5-8 most important keywords or skills from the job description that are missing from the resume. Comma-separated.]
+---END_ATS---
+
+---VERDICT---
+[2-3 sentences: the strongest points of fit and the biggest gaps.]
+---END_VERDICT---"""
+
+
+def inject_job_title(base_task: str, job_title: str) -> str:
+    if not job_title.strip():
+        return base_task
+    return base_task + f"""
+
+TARGET JOB TITLE: "{job_title.strip()}"
+
+Use this target job title to sharpen every part of your response:
+- Mirror the exact terminology, seniority level, and industry language a \
+hiring manager recruiting for this specific role would expect to see
+- Prioritise the skills, action verbs, and quantified achievements that carry \
+the most weight for a "{job_title.strip()}"
+- Rewrite any vague language so it reads as if crafted by — and for — a strong \
+candidate actively pursuing this exact title
+- Calibrate tone to seniority: junior/associate titles should project energy and \
+growth potential; senior/lead/director titles should project authority, scope, and \
+measurable business impact
+"""
+
+
+SCORING_INSTRUCTION = (
+    "\n\nCRITICAL: Begin your response with 'MATCH_SCORE: [number]' (0–100) "
+    "based on how well the resume fits the job description, followed by your analysis."
+)
+
+
+def with_scoring(system_task: str, add_score: bool) -> str:
+    return system_task + (SCORING_INSTRUCTION if add_score else "")
+
+
+def format_request(job_desc: str, resume_text: str) -> str:
+    return f"JOB DESCRIPTION:\n{job_desc}\n\nRESUME:\n{resume_text}"
+
+
+def cover_letter_task(job_title: str) -> str:
+    title_clause  = f" for the **{job_title.strip()}** position" if job_title.strip() else ""
+    title_persona = (
+        f"\n- Write from the perspective of a strong {job_title.strip()} candidate"
+        if job_title.strip() else ""
+    )
+    return f"""You are an expert career coach and professional writer.
+Write a compelling, personalized cover letter{title_clause} based on the candidate's \
+resume and the job description provided.
+
+The cover letter must:
+- Be 3-4 paragraphs, professional but warm in tone
+- Open with a strong hook that references the specific role and company
+- Highlight 2-3 of the candidate's most relevant experiences from their resume \
+that directly match the job requirements
+- Include at least one quantified achievement from the resume
+- Close with a confident call to action
+- NOT use generic filler phrases like "I am writing to express my interest..." \
+or "I am a hard worker"
+- Sound like a real human wrote it, not a template{title_persona}
+
+Output ONLY the cover letter text. Start directly with "Dear Hiring Manager," \
+or a named salutation if available."""
+
+
+
+# ==============================
+# TEXT EXTRACTION
+# ==============================
+EXTRACTOR_VERSION = "3"   # bump when the parsing below changes so cached text is re-extracted
+
+
+def _extract_text_uncached(file):
+    ext = file.name.split(".")[-1].lower()
+    if ext == "pdf":
+        return extract_pdf_text(file.getvalue(), ocr=True)[0]   # scanned CVs fall back to OCR
+    elif ext == "docx":
+        from docx import Document   # parsers load on first use of their file type
+        return "\n".join(p.text for p in Document(file).paragraphs)
+    return file.read().decode("utf-8")
+
+
+def extract_text(file) -> str:
+    """Text of a PDF/DOCX/TXT file object (upload or open(..., "rb")), cached by content. Raises on failure."""
+    return text_cache.get_or_extract(file, _extract_text_uncached, "resumeforge", EXTRACTOR_VERSION)
+
+
+# ==============================
+# LLM CALLS
+# ==============================
+def load_keys(secrets_path: str = ".streamlit/secrets.toml") -> tuple[str, str]:
+    """(openrouter_key, gemini_key) from the environment, falling back to the Streamlit secrets file."""
+    secrets = {}
+    if os.path.exists(secrets_path):
+        with open(secrets_path, "rb") as f:
+            secrets = tomllib.load(f)
+    return (os.environ.get("OPENROUTER_API_KEY") or secrets.get("OPENROUTER_API_KEY", ""),
+            os.environ.get("GEMINI_API_KEY") or secrets.get("GEMINI_API_KEY", ""))
+
+
+@dataclass
+class LLMSettings:
+    """Which model to call and how. Keys are passed in so nothing here reads Streamlit secrets."""
+    model:          str
+    openrouter_key: str = ""
+    gemini_key:     str = ""
+    failover:       bool = True
+    use_cache:      bool = True
+    temperature:    float = LLM_TEMPERATURE
+    base_url:       str = OPENROUTER_BASE_URL   # any OpenAI-compatible server, e.g. a local mock
+
+    @property
+    def provider(self) -> str:
+        return "gemini" if self.model.startswith("gemini") else "openrouter"
+
+    def model_chain(self) -> list[str]:
+        """Selected model first, then every other configured model as failover targets."""
+        if not self.failover:
+            return [self.model]
+        chain = [self.model]
+        if self.openrouter_key:
+            chain += OPENROUTER_MODELS
+        if self.gemini_key:
+            chain.append(GEMINI_MODEL)
+        return chain
+
+    def cache_key(self, system_task: str, user_content: str, model: str | None = None) -> str | None:
+        """Key for a response from model (default: the selected one); None with caching off."""
+        if not self.use_cache:
+            return None
+        model    = model or self.model
+        provider = "gemini" if model.startswith("gemini") else "openrouter"
+        temperature = None if provider == "gemini" else self.temperature
+        return request_key(provider, model, temperature, system_task, user_content)
+
+
+def open_completion(settings: LLMSettings, model: str, system_task: str, user_content: str, stream=False):
+    """Start one request on model. Clients are process-wide (llm_clients) so calls reuse pooled connections."""
+    if model.startswith("gemini"):
+        return gemini_model(settings.gemini_key, model).generate_content(
+            f"{system_task}\n\n{user_content}", stream=stream)
+    return openai_client(settings.openrouter_key, settings.base_url).chat.completions.create(
+        model=model, temperature=settings.temperature, stream=stream,
+        messages=[
+            {"role": "system", "content": system_task},
+            {"role": "user",   "content": user_content}
+        ]
+    )
+
+
+def complete(settings: LLMSettings, system_task: str, user_content: str, add_score=True) -> str:
+    """Run one completion with caching and failover. Raises on failure; safe to call from worker threads.
+
+    A response is cached under the model that produced it, so a failover answer is never
+    served later as the selected model's.
+    """
+    system_task = with_scoring(system_task, add_score)
+    key = settings.cache_key(system_task, user_content)
+    if key:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+
+    r, model = route(lambda m: open_completion(settings, m, system_task, user_content), settings.model_chain())
+    text = r.text.strip() if model.startswith("gemini") else r.choices[0].message.content.strip()
+    if key and text:
+        response_cache.put(settings.cache_key(system_task, user_content, model), text)
+    return text
+
+
+def stream_completion(settings: LLMSettings, system_task: str, user_content: str, add_score=True):
+    """Yield the completion in chunks as the provider produces them. Cached responses arrive in one piece."""
+    system_task = with_scoring(system_task, add_score)
+    key = settings.cache_key(system_task, user_content)
+    if key:
+        cached = response_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
+    # Failover only happens while opening the stream, never after text has been shown
+    stream, model = route(
+        lambda m: open_completion(settings, m, system_task, user_content, stream=True), settings.model_chain())
+    if model.startswith("gemini"):
+        for chunk in stream:
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+    else:
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+
+    text = "".join(parts).strip()
+    if key and text:
+        response_cache.put(settings.cache_key(system_task, user_content, model), text)
+
+
+# ==============================
+# OUTPUT PARSING
+# ==============================
+# One pattern for every marker, so a response is parsed in a single left-to-right scan.
+_MARKER = re.compile(
+    r"MATCH_SCORE:\s*(\d+)"
+    r"|---(ORIGINAL_SUMMARY|SUMMARY|ATS_KEYWORDS|VERDICT|BULLET"
+    r"|END_ORIGINAL_SUMMARY|END_SUMMARY|END_ATS|END_VERDICT|END)---"
+)
+_CLOSERS = {
+    "ORIGINAL_SUMMARY": "END_ORIGINAL_SUMMARY",
+    "SUMMARY":          "END_SUMMARY",
+    "ATS_KEYWORDS":     "END_ATS",
+    "VERDICT":          "END_VERDICT",
+    "BULLET":           "END",
+}
+_MARKER_TAIL = 64   # chars re-scanned on the next feed, in case a marker was cut mid-stream
+
+
+def _bullet_pair(block: str) -> dict | None:
+    start = block.find("ORIGINAL:")
+    split = block.find("\nREWRITTEN:", start) if start >= 0 else -1
+    if split < 0:
+        return None
+    original  = block[start + len("ORIGINAL:"):split].strip()
+    rewritten = block[split + len("\nREWRITTEN:"):].strip()
+    return {"original": original, "rewritten": rewritten} if original and rewritten else None
+
+
+class MarkerParser:
+    """State machine over the marker output format (score, summaries, ATS keywords, bullets).
+
+    feed(text) takes the whole response so far and only scans what it has not seen, so
+    the same parser serves a finished response and one that is still streaming.
+    Sections keep their first occurrence. An opening marker always starts a new section:
+    one left open because the model skipped its closer is dropped, not allowed to
+    swallow the rest of the response.
+    """
+
+    def __init__(self):
+        self.text     = ""
+        self.score    = None
+        self.score_at = None    # (start, end) of the MATCH_SCORE marker that was taken
+        self.sections = {}      # opening marker -> stripped content
+        self.pairs    = []
+        self._pos     = 0       # where the next scan starts
+        self._open    = None    # (opening marker, content start) of the section being read
+
+    def feed(self, text: str, final: bool = False) -> list[dict]:
+        """Scan text (the whole response so far); returns bullet pairs whose block closed in it.
+
+        Pass final=True with the complete response so a score at its very end is taken.
+        """
+        self.text, new, resume = text, [], self._pos
+        for m in _MARKER.finditer(text, self._pos):
+            if m.group(1) is not None:
+                if m.end() == len(text) and not final:   # more digits may still arrive
+                    break
+                if self.score is None:
+                    self.score, self.score_at = int(m.group(1)), m.span()
+            elif m.group(2) in _CLOSERS:   # an opener; a section still open lost its closer and is dropped
+                self._open = (m.group(2), m.end())
+            elif self._open is not None and m.group(2) == _CLOSERS[self._open[0]]:
+                name, start = self._open
+                content, self._open = text[start:m.start()].strip(), None
+                if name == "BULLET":
+                    pair = _bullet_pair(content)
+                    if pair:
+                        self.pairs.append(pair)
+                        new.append(pair)
+                else:
+                    self.sections.setdefault(name, content)
+            resume = m.end()
+        self._pos = resume if final else max(resume, len(text) - _MARKER_TAIL)
+        return new
+
+    def section(self, name: str) -> str:
+        return self.sections.get(name, "")
+
+    def body(self) -> str:
+        """The text read so far without its MATCH_SCORE marker, for display."""
+        if self.score_at is None:
+            return self.text.strip()
+        start, end = self.score_at
+        return (self.text[:start] + self.text[end:]).strip()
+
+    def keywords(self) -> list[str]:
+        return [k.strip() for k in self.section("ATS_KEYWORDS").split(",") if k.strip()]
+
+    def combined(self) -> dict:
+        original_summary = self.section("ORIGINAL_SUMMARY")
+        return {
+            "original_summary": "" if original_summary.upper() == "NONE" else original_summary,
+            "summary":          self.section("SUMMARY"),
+            "keywords":         self.keywords(),
+            "pairs":            list(self.pairs),
+        }
+
+    def batch(self) -> dict:
+        return {
+            "score":    min(self.score, 100) if self.score is not None else None,
+            "keywords": self.keywords(),
+            "verdict":  self.sections.get("VERDICT", self.text.strip()),
+        }
+
+
+def scan_markers(text: str) -> MarkerParser:
+    """A parser that has read the complete response text."""
+    parser = MarkerParser()
+    parser.feed(text, final=True)
+    return parser
+
+
+def parse_score(text: str) -> int | None:
+    return scan_markers(text).score
+
+
+def parse_bullet_pairs(text: str) -> list[dict]:
+    """Parse ---BULLET--- blocks into list of {original, rewritten} dicts."""
+    return scan_markers(text).pairs
+
+
+def parse_combined_result(text: str) -> dict:
+    """Extract original summary, new summary, ATS keywords, and bullet pairs from combined LLM output."""
+    return scan_markers(text).combined()
+
+
+def parse_batch_result(text: str) -> dict:
+    return scan_markers(text).batch()
+
+
+# ==============================
+# APPLYING REWRITES
+# ==============================
+FUZZY_MIN_RATIO = 0.85   # similarity a line window needs to stand in for a bullet not found verbatim
+FUZZY_MAX_LINES = 3      # bullets wrapped over more lines than this are only matched exactly
+_ANCHOR_CHARS   = 16
+
+# Differences PDF extraction introduces that should not stop a match: whitespace and line
+# breaks, hyphens (including words split across lines) and soft hyphens, curly quotes.
+_HYPHENS = re.compile(r"(?<=\w)-\s*(?=\w)|\u00ad")
+_SPACES  = re.compile(r"\s+")
+_LOOSE   = re.compile(r"(?<=\w)-\s*(?=\w)|\u00ad|[^\S ]\s*| \s+")   # both in one pass; lone spaces are left alone
+_QUOTES  = [("\u2018", "'"), ("\u2019", "'"), ("\u201c", '"'), ("\u201d", '"')]
+_LEADING = re.compile(r"^[\s\u2022\u25aa\u25e6\u00b7\u25cf\u25a0\u27a2\u25ba*\-\u2013\u2014]+")
+_WORD_START = re.compile(r"(?:^|(?<= ))\S")
+
+
+def _plain_quotes(text: str) -> str:
+    for curly, plain in _QUOTES:
+        text = text.replace(curly, plain)
+    return text
+
+
+def _loose(text: str) -> str:
+    return _SPACES.sub(" ", _HYPHENS.sub("", _plain_quotes(text))).strip()
+
+
+def _normalize(text: str) -> tuple[str, list[int], list[int]]:
+    """_loose(text) before stripping, with breakpoints mapping it back to raw offsets.
+
+    Normalized offset i sits at raw offset raw[k] + (i - norm[k]) for the last k with
+    norm[k] <= i. Only line breaks, runs of spaces and hyphens add breakpoints.
+    """
+    text = _plain_quotes(text)
+    pieces, norm, raw, last, n = [], [0], [0], 0, 0
+    for m in _LOOSE.finditer(text):
+        pieces.append(text[last:m.start()])
+        n += m.start() - last
+        if m.group()[0].isspace():
+            pieces.append(" ")
+            norm.append(n)
+            raw.append(m.start())
+            n += 1
+        norm.append(n)
+        raw.append(m.end())
+        last = m.end()
+    pieces.append(text[last:])
+    return "".join(pieces), norm, raw
+
+
+def _claim(claimed: list, start: int, end: int) -> bool:
+    """Reserve raw span [start, end) unless it overlaps one already applied."""
+    i = bisect.bisect_left(claimed, (start, end))
+    if (i and claimed[i - 1][1] > start) or (i < len(claimed) and claimed[i][0] < end):
+        return False
+    claimed.insert(i, (start, end))
+    return True
+
+
+def _line_windows(text: str) -> list[tuple[int, int, str]]:
+    """(raw start, raw end, normalized text) for every run of 1..FUZZY_MAX_LINES non-blank lines."""
+    lines, pos = [], 0
+    for line in text.splitlines(keepends=True):
+        body = line.rstrip("\r\n")
+        lead = _LEADING.match(body)
+        lead = lead.end() if lead else 0
+        if body.strip():
+            lines.append((pos + lead, pos + len(body)))
+        pos += len(line)
+    windows = []
+    for i in range(len(lines)):
+        for j in range(i, min(i + FUZZY_MAX_LINES, len(lines))):
+            start, end = lines[i][0], lines[j][1]
+            windows.append((start, end, _loose(text[start:end])))
+    return windows
+
+
+def match_bullets(original_text: str, pairs: list[dict]) -> tuple[list[tuple[int, int, str]], list[dict]]:
+    """(sorted (start, end, rewritten) spans of original_text to replace, a report per pair).
+
+    The resume is normalized and indexed by word start once; each ORIGINAL is looked up
+    by its opening characters and confirmed, falling back to a normalized substring
+    search and then to the most similar window of lines. Matches are taken against the
+    original text only and never overlap. Each report entry is
+    {"original", "status": exact | normalized | fuzzy | missing, "ratio"}.
+    """
+    norm, norm_marks, raw_marks = _normalize(original_text)
+    index = {}
+    for m in _WORD_START.finditer(norm):
+        index.setdefault(norm[m.start():m.start() + _ANCHOR_CHARS], []).append(m.start())
+
+    def _raw(i):
+        k = bisect.bisect_right(norm_marks, i) - 1
+        return raw_marks[k] + i - norm_marks[k]
+
+    claimed, edits, report, missed = [], {}, [], []
+    for k, p in enumerate(pairs):
+        needle = _loose(_LEADING.sub("", p["original"]))
+        report.append({"original": p["original"], "status": "missing", "ratio": 0.0})
+        if not needle:
+            continue
+        if len(needle) >= _ANCHOR_CHARS:
+            starts = [s for s in index.get(needle[:_ANCHOR_CHARS], []) if norm.startswith(needle, s)]
+        else:
+            starts = [m.start() for m in re.finditer(re.escape(needle), norm)]
+        if not starts:   # not at a word start in the normalized text
+            found = norm.find(needle)
+            starts = [found] if found >= 0 else []
+        for s in starts:
+            start, end = _raw(s), _raw(s + len(needle) - 1) + 1
+            if _claim(claimed, start, end):
+                edits[start] = (end, p["rewritten"])
+                exact = original_text[start:end] == _LEADING.sub("", p["original"]).strip()
+                report[k].update(status="exact" if exact else "normalized", ratio=1.0)
+                break
+        else:
+            missed.append((k, needle))
+
+    if missed:
+        windows = _line_windows(original_text)
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        for k, needle in missed:
+            matcher.set_seq2(needle)
+            best = None
+            for start, end, window in windows:
+                matcher.set_seq1(window)
+                if matcher.real_quick_ratio() < FUZZY_MIN_RATIO or matcher.quick_ratio() < FUZZY_MIN_RATIO:
+                    continue
+                ratio = matcher.ratio()
+                if ratio >= FUZZY_MIN_RATIO and (best is None or ratio > best[0]):
+                    best = (ratio, start, end)
+            if best and _claim(claimed, best[1], best[2]):
+                edits[best[1]] = (best[2], pairs[k]["rewritten"])
+                report[k].update(status="fuzzy", ratio=round(best[0], 3))
+
+    return [(start, *edits[start]) for start in sorted(edits)], report
+
+
+def apply_bullets(original_text: str, pairs: list[dict]) -> tuple[str, list[dict]]:
+    """Resume text with every bullet rewritten that match_bullets found, spliced in one pass, and its report."""
+    spans, report = match_bullets(original_text, pairs)
+    out, pos = [], 0
+    for start, end, rewritten in spans:
+        out += [original_text[pos:start], rewritten]
+        pos = end
+    out.append(original_text[pos:])
+    return "".join(out), report
+
+
+def build_updated_resume(original_text: str, pairs: list[dict]) -> str:
+    """Replace original bullets in resume text with rewritten versions."""
+    return apply_bullets(original_text, pairs)[0]
+
+
+# ==============================
+# JOB DESCRIPTIONS
+# ==============================
+JOB_DELIMITER = "---"
+
+
+def jobs_from_rows(rows: list[dict]) -> list[dict]:
+    """Normalise CSV/JSONL rows into {title, description, url}; rows without a description are skipped.
+
+    The description may be in a description / job_description / jd / text column.
+    """
+    jobs = []
+    for row in rows:
+        fields = {str(k).strip().lower(): ("" if v is None else str(v)) for k, v in row.items() if k}
+        desc = next((fields[k] for k in ("description", "job_description", "jd", "text") if fields.get(k)), "")
+        if desc.strip():
+            jobs.append({
+                "title": (fields.get("title") or fields.get("job_title") or desc.strip().splitlines()[0])[:80],
+                "description": desc.strip(),
+                "url": fields.get("url") or fields.get("link") or "",
+            })
+    return jobs
+
+
+def read_job_file(raw: str, name: str) -> list[dict]:
+    """Jobs from the text of a .csv, .jsonl/.ndjson, or plain-text file of '---'-separated postings.
+
+    Raises ValueError naming the line when a JSONL line is not a JSON object.
+    """
+    lower = name.lower()
+    if lower.endswith((".jsonl", ".ndjson")):
+        rows = []
+        for n, line in enumerate(raw.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{name} line {n} is not valid JSON ({e.msg})") from None
+            if not isinstance(row, dict):
+                raise ValueError(f"{name} line {n} is not a JSON object")
+            rows.append(row)
+        return jobs_from_rows(rows)
+    if lower.endswith(".csv"):
+        return jobs_from_rows(list(csv.DictReader(io.StringIO(raw))))
+    return split_postings(raw)
+
+
+def split_postings(text: str) -> list[dict]:
+    """Postings pasted one after another, separated by a line containing only '---'."""
+    return [
+        {"title": block.strip().splitlines()[0][:80], "description": block.strip(), "url": ""}
+        for block in re.split(rf"^\s*{re.escape(JOB_DELIMITER)}\s*$", text or "", flags=re.MULTILINE)
+        if block.strip()
+    ]
+
+
+# ==============================
+# PIPELINE
+# ==============================
+GOALS = {
+    "combined": COMBINED_PROMPT,
+    "gap":      GAP_PROMPT,
+    "score":    BATCH_PROMPT,
+}
+
+
+def analysis_task(goal: str, job_title: str = "") -> tuple[str, bool]:
+    """(system task, add_score) for a goal — the request analyze() and its streaming callers send."""
+    return inject_job_title(GOALS[goal], job_title), goal == "gap"
+
+
+def analysis_result(goal: str, raw: str, resume_text: str) -> dict:
+    """JSON-serialisable result of one goal from the model's raw output."""
+    markers = scan_markers(raw)
+    result  = {"goal": goal, "score": markers.score, "raw": raw}
+    if goal == "combined":
+        parsed = markers.combined()
+        updated, applied = apply_bullets(resume_text, parsed["pairs"])
+        result.update(parsed, updated_resume=updated, applied=applied)
+    elif goal == "score":
+        result.update(markers.batch())
+    return result
+
+
+def analyze(settings: LLMSettings, resume_text: str, job_desc: str, goal: str = "score",
+            job_title: str = "", cover_letter: bool = False) -> dict:
+    """Run one goal for one (resume, job) pair and return a JSON-serialisable result.
+
+    goal is "combined" (full optimization), "gap" (skills gap) or "score" (compact
+    MATCH_SCORE + missing keywords). The cover letter, when requested, is a second call.
+    """
+    content = format_request(job_desc, resume_text)
+    system_task, add_score = analysis_task(goal, job_title)
+    result = analysis_result(goal, complete(settings, system_task, content, add_score), resume_text)
+    if cover_letter:
+        result["cover_letter"] = complete(settings, cover_letter_task(job_title), content, add_score=False)
+    return result
@@ -0,0 +1,165 @@
+"""The rewritten resume as a real document instead of plain text.
+
+A .docx upload is edited in place: its paragraphs are matched against the rewritten
+bullets with resume_core.match_bullets, and only the runs a bullet covers are
+rewritten, so fonts, styles, numbering, tables and spacing survive. PDF and text
+uploads have no layout that can be edited; their updated text is laid out afresh as a
+.docx (python-docx) and a PDF (fpdf2), with the name, section headings and bullets
+recognised from the text. Everything is built in memory and returned as bytes.
+"""
+import bisect
+import io
+import re
+
+from resume_core import match_bullets
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+_BULLET  = re.compile(r"^\s*[•▪◦·●■➢►*\-–—]\s+")
+_HEADING_CHARS = 40
+_PDF_CHARS = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"',
+                            "–": "-", "—": "-", "•": "·", "…": "..."})
+
+
+# ==============================
+# DOCX, EDITED IN PLACE
+# ==============================
+def _paragraphs(container, seen: set):
+    """Body paragraphs, then those in table cells (nested too), each once."""
+    for p in container.paragraphs:
+        if id(p._p) not in seen:   # merged cells repeat the same paragraphs
+            seen.add(id(p._p))
+            yield p
+    for table in container.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                yield from _paragraphs(cell, seen)
+
+
+def _replace(paragraph, start: int, end: int, text: str):
+    """Replace characters [start, end) of a paragraph's run text, keeping the first run's formatting."""
+    pos, first = 0, True
+    for run in paragraph.runs:
+        run_start, pos = pos, pos + len(run.text)
+        if pos <= start or run_start >= end:
+            continue
+        before = run.text[:max(0, start - run_start)]
+        after  = run.text[end - run_start:] if pos > end else ""
+        run.text = before + text + after if first else after
+        first = False
+
+
+def rewrite_docx(data: bytes, pairs: list[dict]) -> tuple[bytes, list[dict]]:
+    """(the .docx with each found bullet rewritten in place, match report as in match_bullets)."""
+    from docx import Document
+    doc = Document(io.BytesIO(data))
+    paragraphs = list(_paragraphs(doc, set()))
+    texts  = ["".join(run.text for run in p.runs) for p in paragraphs]
+    starts = []
+    pos = 0
+    for text in texts:
+        starts.append(pos)
+        pos += len(text) + 1
+    spans, report = match_bullets("\n".join(texts), pairs)
+    for start, end, rewritten in spans:
+        i = bisect.bisect_right(starts, start) - 1
+        while i < len(paragraphs) and starts[i] < end:   # a match can run over a paragraph break
+            local = max(start, starts[i]) - starts[i], min(end, starts[i] + len(texts[i])) - starts[i]
+            _replace(paragraphs[i], *local, rewritten if starts[i] <= start else "")
+            i += 1
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue(), report
+
+
+# ==============================
+# RENDERED FROM TEXT
+# ==============================
+def _blocks(text: str):
+    """(kind, text) per non-blank line; kind is title, heading, bullet or text."""
+    first = True
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        bullet = _BULLET.match(line)
+        if first:
+            yield "title", stripped
+        elif bullet:
+            yield "bullet", line[bullet.end():].strip()
+        elif len(stripped) <= _HEADING_CHARS and (stripped.isupper() or stripped.endswith(":")):
+            yield "heading", stripped.rstrip(":")
+        else:
+            yield "text", stripped
+        first = False
+
+
+def render_docx(text: str) -> bytes:
+    """A plain, well-structured .docx of resume text."""
+    from docx import Document
+    from docx.shared import Pt
+    doc = Document()
+    doc.styles["Normal"].font.size = Pt(10.5)
+    for kind, line in _blocks(text):
+        if kind == "title":
+            doc.add_heading(line, level=1)
+        elif kind == "heading":
+            doc.add_heading(line, level=2)
+        elif kind == "bullet":
+            doc.add_paragraph(line, style="List Bullet")
+        else:
+            doc.add_paragraph(line)
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def render_pdf(text: str) -> bytes:
+    """A simple one-column PDF of resume text, in the built-in Helvetica (Latin-1 only)."""
+    from fpdf import FPDF
+    pdf = FPDF(format="letter")
+    pdf.set_margins(20, 18)
+    pdf.set_auto_page_break(True, margin=18)
+    pdf.add_page()
+    for kind, line in _blocks(text):
+        line = line.translate(_PDF_CHARS).encode("latin-1", "replace").decode("latin-1")
+        if kind == "title":
+            pdf.set_font("Helvetica", "B", 16)
+            pdf.multi_cell(0, 8, line, new_x="LMARGIN", new_y="NEXT")
+            pdf.ln(2)
+        elif kind == "heading":
+            pdf.ln(3)
+            pdf.set_font("Helvetica", "B", 11)
+            pdf.multi_cell(0, 6, line.upper(), new_x="LMARGIN", new_y="NEXT")
+            pdf.line(pdf.l_margin, pdf.get_y(), pdf.w - pdf.r_margin, pdf.get_y())
+            pdf.ln(1.5)
+        elif kind == "bullet":
+            pdf.set_font("Helvetica", "", 10)
+            pdf.cell(5, 5, "·")
+            pdf.multi_cell(0, 5, line, new_x="LMARGIN", new_y="NEXT")
+        else:
+            pdf.set_font("Helvetica", "", 10)
+            pdf.multi_cell(0, 5, line, new_x="LMARGIN", new_y="NEXT")
+    return bytes(pdf.output())
+
+
+def updated_documents(filename: str, data: bytes | None, updated_text: str, pairs: list[dict]) -> dict:
+    """{"docx": bytes, "pdf": bytes} for the updated resume; keys are left out when they cannot be built.
+
+    A .docx upload is rewritten in place (rendered from updated_text if it cannot be
+    opened); anything else is rendered from updated_text in both formats.
+    """
+    docs = {}
+    if data and filename.lower().endswith(".docx"):
+        try:
+            docs["docx"] = rewrite_docx(data, pairs)[0]
+        except Exception:   # not a readable .docx after all
+            pass
+    else:
+        try:
+            docs["pdf"] = render_pdf(updated_text)
+        except Exception:   # fpdf2 missing, or it could not lay the text out: .docx and .txt only
+            pass
+    if "docx" not in docs:
+        docs["docx"] = render_docx(updated_text)
+    return docs
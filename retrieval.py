@@ -0,0 +1,110 @@
+"""Lexical retrieval over attached files for Reasoning Forge.
+
+Files are split into line-aligned chunks and indexed with BM25. For each turn only the
+chunks most relevant to the user's question are sent, packed under a token budget, so
+large spreadsheets and long PDFs no longer have to fit in the model's context whole.
+Small attachments that already fit the budget are passed through unchanged.
+"""
+import math
+import re
+from collections import Counter
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_STOP = frozenset(
+    "a an and are as at be by for from has have how i in is it its me my of on or "
+    "that the this to was what when where which who why with you your".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English prose)."""
+    return len(text) // 4 + 1
+
+
+def terms(text: str) -> list[str]:
+    return [t for t in _WORD.findall(text.lower()) if t not in _STOP]
+
+
+def chunk_text(text: str, source: str, max_chars: int = 1500, overlap_lines: int = 2) -> list[dict]:
+    """Pack lines into chunks of at most ~max_chars, carrying a few lines of overlap."""
+    lines, chunks, current, size = text.splitlines(), [], [], 0
+    for line in lines:
+        if size + len(line) > max_chars and current:
+            chunks.append(current)
+            current = current[-overlap_lines:] if overlap_lines else []
+            size = sum(len(l) + 1 for l in current)
+        # A single over-long line (e.g. a minified table row) is hard-split
+        while len(line) > max_chars:
+            chunks.append(current + [line[:max_chars]])
+            line, current, size = line[max_chars:], [], 0
+        current.append(line)
+        size += len(line) + 1
+    if any(l.strip() for l in current):
+        chunks.append(current)
+    return [
+        {"source": source, "order": i, "text": "\n".join(c).strip()}
+        for i, c in enumerate(chunks) if any(l.strip() for l in c)
+    ]
+
+
+class BM25:
+    def __init__(self, docs: list[list[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.tf    = [Counter(d) for d in docs]
+        self.lens  = [len(d) for d in docs]
+        self.avgdl = (sum(self.lens) / len(docs)) if docs else 0.0
+        df = Counter(t for d in self.tf for t in d)
+        n  = len(docs)
+        self.idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def scores(self, query: list[str]) -> list[float]:
+        q = Counter(query)
+        out = []
+        for tf, dl in zip(self.tf, self.lens):
+            norm = self.k1 * (1 - self.b + self.b * dl / (self.avgdl or 1))
+            s = 0.0
+            for t, qn in q.items():
+                f = tf.get(t)
+                if f:
+                    s += qn * self.idf[t] * f * (self.k1 + 1) / (f + norm)
+            out.append(s)
+        return out
+
+
+class ContextIndex:
+    """Chunked BM25 index over [(source label, text)] blocks."""
+
+    def __init__(self, blocks: list[tuple[str, str]], chunk_chars: int = 1500):
+        self.blocks = blocks
+        self.full_text = "".join(f"\n\n--- FILE: {label} ---\n{text}\n" for label, text in blocks)
+        self.chunks = [c for label, text in blocks for c in chunk_text(text, label, chunk_chars)]
+        self.bm25 = BM25([terms(c["text"]) for c in self.chunks])
+
+    def __bool__(self):
+        return bool(self.blocks)
+
+    def fits(self, token_budget: int) -> bool:
+        return estimate_tokens(self.full_text) <= token_budget
+
+    def select(self, query: str, token_budget: int = 6000, top_k: int = 12) -> str:
+        """Context for this query: everything if it fits the budget, else the best chunks that do."""
+        if self.fits(token_budget):
+            return self.full_text
+        scores = self.bm25.scores(terms(query))
+        ranked = sorted(range(len(self.chunks)), key=lambda i: scores[i], reverse=True)
+        picked, used = [], 0
+        for i in ranked[:top_k]:
+            if scores[i] <= 0 and picked:
+                break
+            cost = estimate_tokens(self.chunks[i]["text"]) + 12
+            if used + cost > token_budget:
+                continue
+            picked.append(i)
+            used += cost
+        # Present excerpts in document order so neighbouring chunks read naturally
+        picked.sort()
+        return "".join(
+            f"\n\n--- FILE: {self.chunks[i]['source']} (excerpt {self.chunks[i]['order'] + 1}) ---\n"
+            f"{self.chunks[i]['text']}\n"
+            for i in picked
+        )
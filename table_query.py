@@ -0,0 +1,239 @@
+"""Tools that let the model compute over uploaded spreadsheets instead of reading them.
+
+The tables ingested by tables.py are exposed to the model as two OpenAI-style function
+tools: `query_table`, a structured filter / group / aggregate request compiled here into
+parameterised SQL, and `run_sql` for anything that does not fit that shape (read-only
+SELECT only). Both run against the local SQLite copies; the model only ever sees the
+few result rows it asked for.
+
+Every dataset is attached read-only to one in-memory connection under a view named
+after its table, and an authorizer rejects anything but reading (no ATTACH, PRAGMA or
+writes). Queries are cut off after QUERY_SECONDS and results after MAX_RESULT_ROWS.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+from tables import Dataset, identifier, quote
+
+MAX_RESULT_ROWS = 50
+MAX_DATASETS    = 10      # SQLite attaches at most 10 databases to one connection
+QUERY_SECONDS   = 5.0
+AGGREGATES = {"count", "count_distinct", "sum", "avg", "min", "max"}
+OPERATORS  = {"=", "!=", "<", "<=", ">", ">=", "contains", "starts_with", "in", "is_null", "not_null"}
+
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+_EXAMPLES = {   # shown to the model when it sends a list entry that is not an object
+    "filters":    '[{"column": "region", "op": "=", "value": "north"}]',
+    "aggregates": '[{"fn": "sum", "column": "amount"}]',
+}
+
+
+class QueryError(Exception):
+    """A query the model can fix: unknown table or column, bad operator, SQL error."""
+
+
+def _authorize(action, *_):
+    return sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+
+
+def _objects(spec: dict, key: str) -> list[dict]:
+    """spec[key] as a list of objects; QueryError when the model sent anything else."""
+    items = spec.get(key) or []
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise QueryError(f"{key} must be a list of objects, e.g. {_EXAMPLES[key]}")
+    return items
+
+
+class TableTools:
+    """Query tools over the tables of one or more datasets."""
+
+    def __init__(self, datasets: list[Dataset]):
+        if len(datasets) > MAX_DATASETS:
+            raise ValueError(f"At most {MAX_DATASETS} spreadsheets can be queried at once.")
+        self.tables = {}        # view name -> (Table, dataset)
+        self._lock  = threading.Lock()
+        self._db    = sqlite3.connect(":memory:", uri=True, check_same_thread=False)
+        taken = set()
+        try:
+            for i, ds in enumerate(datasets):
+                self._db.execute(f"ATTACH DATABASE ? AS d{i}", (f"file:{ds.path}?mode=ro",))
+                for t in ds.tables:
+                    view = identifier(t.name, taken)
+                    self._db.execute(f"CREATE TEMP VIEW {quote(view)} AS SELECT * FROM d{i}.{quote(t.name)}")
+                    self.tables[view] = (t, ds)
+        except Exception:
+            self._db.close()
+            raise
+        self._db.set_authorizer(_authorize)
+
+    def __bool__(self):
+        return bool(self.tables)
+
+    def close(self):
+        self._db.close()
+
+    # ── schema for the model ─────────────────────────────────────
+    def describe(self) -> str:
+        lines = []
+        for view, (t, ds) in self.tables.items():
+            cols = ", ".join(f"{c['name']} ({c['type']})" for c in t.columns)
+            lines.append(f"- {view}: {t.rows:,} rows from {ds.filename} [{t.label}]; columns: {cols}")
+        return "\n".join(lines)
+
+    @property
+    def schemas(self) -> list[dict]:
+        names = list(self.tables)
+        return [
+            {"type": "function", "function": {
+                "name": "query_table",
+                "description": "Filter, group and aggregate one uploaded table and return the result rows. "
+                               "Use it for every count, total, average, ranking or lookup instead of estimating.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "table":   {"type": "string", "enum": names},
+                        "filters": {"type": "array", "items": {
+                            "type": "object",
+                            "properties": {
+                                "column": {"type": "string"},
+                                "op":     {"type": "string", "enum": sorted(OPERATORS)},
+                                "value":  {"description": "Compared value; a list for 'in'."},
+                            },
+                            "required": ["column", "op"],
+                        }},
+                        "group_by":   {"type": "array", "items": {"type": "string"}},
+                        "aggregates": {"type": "array", "items": {
+                            "type": "object",
+                            "properties": {
+                                "fn":     {"type": "string", "enum": sorted(AGGREGATES)},
+                                "column": {"type": "string", "description": "Omit for count(*)."},
+                            },
+                            "required": ["fn"],
+                        }},
+                        "columns":  {"type": "array", "items": {"type": "string"},
+                                     "description": "Columns to return when not aggregating."},
+                        "order_by": {"type": "string", "description": "A column or aggregate alias like sum_amount."},
+                        "descending": {"type": "boolean"},
+                        "limit":    {"type": "integer"},
+                    },
+                    "required": ["table"],
+                },
+            }},
+            {"type": "function", "function": {
+                "name": "run_sql",
+                "description": "Run one read-only SQLite SELECT over the uploaded tables for queries "
+                               "query_table cannot express (joins, expressions, subqueries).",
+                "parameters": {
+                    "type": "object",
+                    "properties": {"sql": {"type": "string"}},
+                    "required": ["sql"],
+                },
+            }},
+        ]
+
+    # ── execution ────────────────────────────────────────────────
+    def compile(self, spec: dict) -> tuple[str, list]:
+        """Structured query -> (SQL, parameters); raises QueryError on unknown names or malformed specs."""
+        if not isinstance(spec, dict):
+            raise QueryError("Arguments must be a JSON object.")
+        view = spec.get("table")
+        if view not in self.tables:
+            raise QueryError(f"Unknown table {view!r}. Tables: {', '.join(self.tables)}")
+        known = {c["name"] for c in self.tables[view][0].columns}
+
+        def col(name):
+            if name not in known:
+                raise QueryError(f"Unknown column {name!r} in {view}. Columns: {', '.join(sorted(known))}")
+            return quote(name)
+
+        where, params = [], []
+        for f in _objects(spec, "filters"):
+            c, op, value = col(f.get("column")), f.get("op"), f.get("value")
+            if op not in OPERATORS:
+                raise QueryError(f"Unknown operator {op!r}. Use one of {sorted(OPERATORS)}")
+            if op == "is_null":
+                where.append(f"{c} IS NULL")
+            elif op == "not_null":
+                where.append(f"{c} IS NOT NULL")
+            elif op == "contains":
+                where.append(f"{c} LIKE ? ESCAPE '\\'")
+                params.append("%" + str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+            elif op == "starts_with":
+                where.append(f"{c} LIKE ? ESCAPE '\\'")
+                params.append(str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+            elif op == "in":
+                values = value if isinstance(value, list) else [value]
+                where.append(f"{c} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+            else:
+                where.append(f"{c} {op} ?")
+                params.append(value)
+
+        group = [col(g) for g in spec.get("group_by") or []]
+        select, aliases = list(group), set()
+        for a in _objects(spec, "aggregates"):
+            fn, column = a.get("fn"), a.get("column")
+            if fn not in AGGREGATES:
+                raise QueryError(f"Unknown aggregate {fn!r}. Use one of {sorted(AGGREGATES)}")
+            alias = f"{fn}_{column}" if column else fn
+            if fn == "count_distinct":
+                expr = f"COUNT(DISTINCT {col(column)})"
+            else:
+                expr = f"{fn.upper()}({col(column) if column else '*'})"
+            select.append(f"{expr} AS {quote(alias)}")
+            aliases.add(alias)
+        if not select:
+            select = [col(c) for c in spec.get("columns") or []] or ["*"]
+
+        sql = f"SELECT {', '.join(select)} FROM {quote(view)}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if group:
+            sql += " GROUP BY " + ", ".join(group)
+        order = spec.get("order_by")
+        if order:
+            sql += f" ORDER BY {quote(order) if order in aliases else col(order)}"
+            sql += " DESC" if spec.get("descending") else ""
+        limit = min(int(spec.get("limit") or MAX_RESULT_ROWS), MAX_RESULT_ROWS)
+        return f"{sql} LIMIT {limit}", params
+
+    def execute(self, sql: str, params=()) -> dict:
+        """Run a read-only query; {"columns", "rows", "truncated"} with at most MAX_RESULT_ROWS rows."""
+        deadline = time.monotonic() + QUERY_SECONDS
+        with self._lock:
+            self._db.set_progress_handler(lambda: int(time.monotonic() > deadline), 10_000)
+            try:
+                cur  = self._db.execute(sql, params)
+                rows = cur.fetchmany(MAX_RESULT_ROWS + 1)
+            except sqlite3.Error as e:
+                msg = "query took too long" if "interrupted" in str(e) else str(e)
+                raise QueryError(f"SQL error: {msg}")
+            finally:
+                self._db.set_progress_handler(None, 0)
+        columns = [d[0] for d in cur.description or []]
+        return {"columns": columns, "rows": [list(r) for r in rows[:MAX_RESULT_ROWS]],
+                "truncated": len(rows) > MAX_RESULT_ROWS}
+
+    def call(self, name: str, arguments: str) -> tuple[str, str]:
+        """Run one tool call from the model. Returns (result JSON for the model, SQL that ran)."""
+        sql = ""
+        try:
+            args = json.loads(arguments or "{}")
+            if not isinstance(args, dict):
+                raise QueryError("Arguments must be a JSON object.")
+            if name == "query_table":
+                sql, params = self.compile(args)
+                result = self.execute(sql, params)
+                sql = f"{sql}  -- {params}" if params else sql
+            elif name == "run_sql":
+                sql = str(args.get("sql", "")).strip().rstrip(";")
+                if not sql.lower().startswith(("select", "with")):
+                    raise QueryError("Only SELECT statements are allowed.")
+                result = self.execute(sql)
+            else:
+                raise QueryError(f"Unknown tool {name!r}")
+        except (QueryError, ValueError, TypeError) as e:
+            return json.dumps({"error": str(e)}), sql
+        return json.dumps(result, default=str), sql
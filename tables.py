@@ -0,0 +1,336 @@
+"""Memory-bounded ingestion of CSV/Excel uploads into a local SQLite database.
+
+Spreadsheets are not pasted into prompts. `ingest` streams the upload chunk by chunk
+(`pandas.read_csv(chunksize=...)`, openpyxl read-only for .xlsx) into one SQLite file
+per document, computes column statistics with SQL once, and keeps them next to the
+data. `Dataset.summary(token_budget)` then describes every table — schema, column
+stats and evenly spaced sample rows — in as much detail as the budget allows, while
+the full data stays on disk where it can be queried exactly.
+
+Databases are content-addressed (SHA-256 of the upload), live under RF_TABLE_DIR
+(default: <tmp>/rf_tables) and are reused when the same file is uploaded again. They
+hold copies of user data, so each new ingest first removes databases unused for
+RF_TABLE_TTL seconds (default one day), then the least recently used ones until the
+directory fits in RF_TABLE_MB (default 512).
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+
+from retrieval import estimate_tokens
+
+TABLE_VERSION = "1"        # bump when ingestion or stats change
+CHUNK_ROWS    = 50_000
+SAMPLE_ROWS   = 12
+TOP_VALUES    = 3
+MAX_TOP_DISTINCT = 50      # only list frequent values for columns this categorical
+CELL_CHARS    = 40
+TABLE_DIR     = os.environ.get("RF_TABLE_DIR") or os.path.join(tempfile.gettempdir(), "rf_tables")
+TABLE_TTL     = float(os.environ.get("RF_TABLE_TTL", 24 * 3600))
+TABLE_MAX_BYTES = int(os.environ.get("RF_TABLE_MB", "512")) * 1024 * 1024
+
+
+def quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def identifier(name: str, taken: set) -> str:
+    base = re.sub(r"\W+", "_", str(name).strip().lower()).strip("_") or "table"
+    if base[0].isdigit():
+        base = f"t_{base}"
+    ident, n = base, 2
+    while ident in taken:
+        ident, n = f"{base}_{n}", n + 1
+    taken.add(ident)
+    return ident
+
+
+def _column_names(header) -> list[str]:
+    names, seen = [], set()
+    for i, h in enumerate(header):
+        name = str(h).strip() if h is not None and str(h).strip() else f"column_{i + 1}"
+        base, n = name, 2
+        while name in seen:
+            name, n = f"{base}_{n}", n + 1
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+@dataclass
+class Table:
+    name:    str                  # SQLite table name
+    label:   str                  # sheet name or file name, for people
+    rows:    int = 0
+    columns: list = field(default_factory=list)   # [{"name", "type", stats...}]
+
+
+# ==============================
+# CHUNK READERS
+# ==============================
+def _kind(series) -> str:
+    import pandas as pd
+    if pd.api.types.is_bool_dtype(series):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(series):
+        return "number"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+    return "text"
+
+
+def _csv_chunks(data: bytes):
+    import pandas as pd
+    head = data[:65536].decode("utf-8", errors="replace")
+    try:
+        sep = csv.Sniffer().sniff(head, delimiters=",;\t|").delimiter
+    except csv.Error:
+        sep = ","
+    yield from pd.read_csv(io.BytesIO(data), sep=sep, chunksize=CHUNK_ROWS,
+                           encoding_errors="replace", low_memory=True)
+
+
+def _xlsx_sheets(data: bytes):
+    """(sheet name, iterator of DataFrame chunks) per worksheet, read row by row."""
+    import pandas as pd
+    from openpyxl import load_workbook
+    book = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        for sheet in book.worksheets:
+            def chunks(sheet=sheet):
+                rows, header = [], None
+                for values in sheet.iter_rows(values_only=True):
+                    if header is None:
+                        if any(v is not None for v in values):
+                            header = _column_names(values)
+                        continue
+                    if all(v is None for v in values):
+                        continue
+                    rows.append(values[:len(header)])
+                    if len(rows) >= CHUNK_ROWS:
+                        yield pd.DataFrame(rows, columns=header[:max(map(len, rows))])
+                        rows = []
+                if rows:
+                    yield pd.DataFrame(rows, columns=header[:max(map(len, rows))])
+            yield sheet.title, chunks()
+    finally:
+        book.close()
+
+
+def _xls_sheets(data: bytes):
+    """Legacy .xls has no streaming reader; pandas loads each sheet whole."""
+    import pandas as pd
+    for name, df in pd.read_excel(io.BytesIO(data), sheet_name=None).items():
+        yield name, iter([df.dropna(how="all")])
+
+
+# ==============================
+# INGESTION
+# ==============================
+def _load(db: sqlite3.Connection, table: Table, chunks):
+    for chunk in chunks:
+        chunk.columns = _column_names(chunk.columns)
+        if not table.columns:
+            table.columns = [{"name": c, "type": _kind(chunk[c])} for c in chunk.columns]
+        chunk = chunk.reindex(columns=[c["name"] for c in table.columns])
+        chunk.to_sql(table.name, db, if_exists="append", index=False, chunksize=5000)
+        table.rows += len(chunk)
+
+
+def _column_stats(db: sqlite3.Connection, table: Table):
+    if not table.rows:
+        return
+    parts = []
+    for c in table.columns:
+        q = quote(c["name"])
+        parts += [f"COUNT({q})", f"COUNT(DISTINCT {q})", f"MIN({q})", f"MAX({q})",
+                  f"AVG({q})" if c["type"] == "number" else "NULL"]
+    row = db.execute(f"SELECT {', '.join(parts)} FROM {quote(table.name)}").fetchone()
+    for i, c in enumerate(table.columns):
+        count, distinct, low, high, mean = row[i * 5:i * 5 + 5]
+        c.update(nulls=table.rows - count, distinct=distinct, min=low, max=high, mean=mean)
+        if c["type"] != "number" and 0 < distinct <= MAX_TOP_DISTINCT:
+            q = quote(c["name"])
+            c["top"] = db.execute(
+                f"SELECT {q}, COUNT(*) AS n FROM {quote(table.name)} WHERE {q} IS NOT NULL "
+                f"GROUP BY {q} ORDER BY n DESC LIMIT {TOP_VALUES}"
+            ).fetchall()
+
+
+def ingest(data: bytes, filename: str) -> "Dataset":
+    """Dataset for an uploaded .csv/.xlsx/.xls, building its database on first sight."""
+    digest = hashlib.sha256(f"{TABLE_VERSION}\0".encode() + data).hexdigest()
+    path = os.path.join(TABLE_DIR, f"{digest}.sqlite3")
+    if os.path.exists(path):
+        try:
+            os.utime(path)   # mark as recently used for trim_tables
+        except OSError:
+            pass
+        return Dataset.open(path, filename)
+    os.makedirs(TABLE_DIR, exist_ok=True)
+    trim_tables()
+    ext = filename.rsplit(".", 1)[-1].lower()
+    if ext == "csv":
+        sources = [(filename, _csv_chunks(data))]
+    elif ext == "xls":
+        sources = _xls_sheets(data)
+    else:
+        sources = _xlsx_sheets(data)
+
+    # Built under a private name and renamed into place, so readers never see half a database
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    db = sqlite3.connect(tmp)
+    try:
+        tables, taken = [], {"_meta"}
+        for label, chunks in sources:
+            table = Table(identifier(label.rsplit(".", 1)[0] if ext == "csv" else label, taken), label)
+            _load(db, table, chunks)
+            if table.columns:
+                _column_stats(db, table)
+                tables.append(table)
+        db.execute("CREATE TABLE _meta (tables TEXT NOT NULL)")
+        db.execute("INSERT INTO _meta VALUES (?)", (json.dumps([t.__dict__ for t in tables], default=str),))
+        db.commit()
+        db.close()
+        os.replace(tmp, path)
+    except BaseException:
+        db.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return Dataset.open(path, filename)
+
+
+def trim_tables(directory: str = TABLE_DIR, ttl: float = TABLE_TTL, max_bytes: int = TABLE_MAX_BYTES) -> int:
+    """Remove databases unused for `ttl` seconds, then the oldest until under `max_bytes`."""
+    try:
+        entries = [e for e in os.scandir(directory) if e.name.endswith(".sqlite3")]
+        stats = sorted((st.st_mtime, st.st_size, e.path) for e, st in ((e, e.stat()) for e in entries))
+    except OSError:
+        return 0
+    total   = sum(size for _, size, _ in stats)
+    cutoff  = time.time() - ttl
+    removed = 0
+    for mtime, size, path in stats:
+        if mtime >= cutoff and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+# ==============================
+# DATASET
+# ==============================
+def _cell(value) -> str:
+    text = "" if value is None else str(value).replace("|", "\\|").replace("\n", " ")
+    return text if len(text) <= CELL_CHARS else text[:CELL_CHARS - 1] + "…"
+
+
+def _number(value) -> str:
+    if isinstance(value, float):
+        if abs(value) >= 1e4:
+            return f"{value:,.0f}"
+        return f"{value:.4g}" if abs(value) < 1 else f"{value:,.2f}".rstrip("0").rstrip(".")
+    if isinstance(value, int):
+        return f"{value:,}"
+    return _cell(value)
+
+
+def _describe_column(c: dict) -> str:
+    line = f"- {c['name']} ({c['type']})"
+    bits = []
+    if c.get("nulls"):
+        bits.append(f"{c['nulls']:,} empty")
+    if c["type"] == "number" and c.get("min") is not None:
+        bits.append(f"min {_number(c['min'])}, max {_number(c['max'])}, mean {_number(c['mean'])}")
+    elif c.get("distinct") is not None:
+        bits.append(f"{c['distinct']:,} distinct")
+        if c.get("top"):
+            bits.append("top: " + ", ".join(f"{_cell(v)} ({n:,})" for v, n in c["top"]))
+        elif c["type"] != "number" and c.get("min") is not None:
+            bits.append(f"range {_cell(c['min'])} … {_cell(c['max'])}")
+    return line + (": " + "; ".join(bits) if bits else "")
+
+
+def _markdown(columns: list[str], rows: list) -> str:
+    lines = ["| " + " | ".join(_cell(c) for c in columns) + " |", "|" + "---|" * len(columns)]
+    lines += ["| " + " | ".join(_cell(v) for v in row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+class Dataset:
+    """Tables ingested from one upload, backed by a read-only SQLite connection."""
+
+    def __init__(self, path: str, filename: str, tables: list[Table]):
+        self.path     = path
+        self.filename = filename
+        self.tables   = tables
+
+    @classmethod
+    def open(cls, path: str, filename: str) -> "Dataset":
+        with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as db:
+            meta = json.loads(db.execute("SELECT tables FROM _meta").fetchone()[0])
+        return cls(path, filename, [Table(**t) for t in meta])
+
+    def connect(self) -> sqlite3.Connection:
+        """Read-only connection; statements cannot modify the stored data."""
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+
+    def sample(self, table: Table, n: int) -> tuple[list[str], list]:
+        """n rows spread evenly through the table (first and last included)."""
+        columns = [c["name"] for c in table.columns]
+        if n <= 0 or not table.rows:
+            return columns, []
+        step = max(1, (table.rows - 1) // max(1, n - 1))
+        rowids = sorted({1 + i * step for i in range(n - 1)} | {table.rows})
+        marks = ",".join("?" * len(rowids))
+        with self.connect() as db:
+            rows = db.execute(
+                f"SELECT {', '.join(map(quote, columns))} FROM {quote(table.name)} WHERE rowid IN ({marks})", rowids
+            ).fetchall()
+        return columns, rows
+
+    def _describe(self, table: Table, sample_rows: int, max_columns: int) -> str:
+        head = (f"[Table {table.name} from {table.label}] {table.rows:,} rows × {len(table.columns)} columns")
+        cols = [_describe_column(c) for c in table.columns[:max_columns]]
+        if len(table.columns) > max_columns:
+            cols.append(f"- … {len(table.columns) - max_columns} more columns")
+        parts = [head, "Columns:", *cols]
+        if sample_rows:
+            columns, rows = self.sample(table, sample_rows)
+            shown = columns[:max_columns]
+            parts += [f"Sample rows ({len(rows)} of {table.rows:,}, evenly spaced):",
+                      _markdown(shown, [r[:len(shown)] for r in rows])]
+        return "\n".join(parts)
+
+    def summary(self, token_budget: int = 1500) -> str:
+        """Schema, column stats and sample rows for every table, shrunk until it fits token_budget."""
+        if not self.tables:
+            return "(no tabular data found)"
+        share = max(1, token_budget // len(self.tables))
+        blocks = []
+        for table in self.tables:
+            max_columns = len(table.columns)
+            for sample_rows in (SAMPLE_ROWS, 6, 3, 0):
+                text = self._describe(table, sample_rows, max_columns)
+                if estimate_tokens(text) <= share:
+                    break
+            while estimate_tokens(text) > share and max_columns > 5:
+                max_columns //= 2
+                text = self._describe(table, 0, max_columns)
+            blocks.append(text)
+        blocks.append("Only a summary is shown; the complete tables are stored locally.")
+        return "\n\n".join(blocks)
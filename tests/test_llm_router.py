@@ -0,0 +1,43 @@
+"""Which errors make llm_router.route move on to the next model."""
+import pytest
+
+from llm_router import AllModelsFailed, route
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+
+
+def failing(errors):
+    """call() that raises errors[model] for the models listed and answers with the model otherwise."""
+    tried = []
+
+    def call(model):
+        tried.append(model)
+        if model in errors:
+            raise errors[model]
+        return f"answer from {model}"
+    return call, tried
+
+
+@pytest.mark.parametrize("status", [400, 404, 503])
+def test_per_model_and_transient_errors_fail_over(status):
+    call, tried = failing({f"a-{status}": StatusError(status)})
+    assert route(call, [f"a-{status}", f"b-{status}"], base_delay=0) == (f"answer from b-{status}", f"b-{status}")
+    assert tried[-1] == f"b-{status}"
+
+
+def test_other_errors_stop_failover():
+    call, tried = failing({"a-bug": ValueError("bad request body")})
+    with pytest.raises(ValueError):
+        route(call, ["a-bug", "b-bug"])
+    assert tried == ["a-bug"]
+
+
+def test_every_model_failing_raises_all_models_failed():
+    call, _ = failing({"a-gone": StatusError(404), "b-gone": StatusError(404)})
+    with pytest.raises(AllModelsFailed) as info:
+        route(call, ["a-gone", "b-gone"])
+    assert [model for model, _ in info.value.errors] == ["a-gone", "b-gone"]
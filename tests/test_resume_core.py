@@ -0,0 +1,187 @@
+"""Marker parsing, bullet application, job file reading and response caching in resume_core."""
+from types import SimpleNamespace
+
+import pytest
+
+import resume_core
+from llm_cache import ResponseCache
+from resume_core import LLMSettings, MarkerParser, apply_bullets, match_bullets, read_job_file, scan_markers
+
+RESPONSE = """MATCH_SCORE: 78
+
+---ORIGINAL_SUMMARY---
+Data analyst with five years of experience.
+---END_ORIGINAL_SUMMARY---
+
+---SUMMARY---
+Analytics engineer who ships reliable pipelines.
+---END_SUMMARY---
+
+---ATS_KEYWORDS---
+dbt, Airflow, SQL
+---END_ATS---
+
+---BULLET---
+ORIGINAL: Built dashboards for sales
+REWRITTEN: Built 12 sales dashboards used weekly by 40 reps
+---END---
+
+---BULLET---
+ORIGINAL: Maintained ETL jobs
+REWRITTEN: Cut nightly ETL runtime by 35%
+---END---
+"""
+
+
+# ==============================
+# MARKER PARSING
+# ==============================
+def test_complete_response():
+    parser = scan_markers(RESPONSE)
+    parsed = parser.combined()
+    assert parser.score == 78
+    assert parsed["original_summary"] == "Data analyst with five years of experience."
+    assert parsed["summary"] == "Analytics engineer who ships reliable pipelines."
+    assert parsed["keywords"] == ["dbt", "Airflow", "SQL"]
+    assert [p["original"] for p in parsed["pairs"]] == ["Built dashboards for sales", "Maintained ETL jobs"]
+    assert parser.body().startswith("---ORIGINAL_SUMMARY---")
+
+
+def test_missing_closer_does_not_swallow_later_sections():
+    parsed = scan_markers(RESPONSE.replace("---END_ORIGINAL_SUMMARY---", "")).combined()
+    assert parsed["original_summary"] == ""
+    assert parsed["summary"] == "Analytics engineer who ships reliable pipelines."
+    assert parsed["keywords"] == ["dbt", "Airflow", "SQL"]
+    assert len(parsed["pairs"]) == 2
+
+
+def test_missing_bullet_closer_keeps_following_bullets():
+    text = RESPONSE.replace("---END---", "", 1)
+    assert [p["original"] for p in scan_markers(text).combined()["pairs"]] == ["Maintained ETL jobs"]
+
+
+def test_original_summary_none_is_empty():
+    text = RESPONSE.replace("Data analyst with five years of experience.", "NONE")
+    assert scan_markers(text).combined()["original_summary"] == ""
+
+
+def test_bullet_without_rewrite_is_skipped():
+    text = "---BULLET---\nORIGINAL: Led a team\n---END---"
+    assert scan_markers(text).pairs == []
+
+
+def test_streamed_in_small_chunks_matches_whole():
+    parser, seen = MarkerParser(), []
+    for end in range(7, len(RESPONSE) + 7, 7):
+        seen += parser.feed(RESPONSE[:end], final=end >= len(RESPONSE))
+    assert seen == scan_markers(RESPONSE).pairs
+    assert parser.score == 78
+
+
+def test_score_split_across_chunks_waits_for_digits():
+    parser = MarkerParser()
+    parser.feed("MATCH_SCORE: 7")
+    assert parser.score is None
+    parser.feed("MATCH_SCORE: 72\n", final=True)
+    assert parser.score == 72
+
+
+def test_no_score():
+    parser = scan_markers("Just an analysis, no markers.")
+    assert parser.score is None
+    assert parser.body() == "Just an analysis, no markers."
+
+
+# ==============================
+# APPLYING REWRITES
+# ==============================
+RESUME = """EXPERIENCE
+• Built dashboards for sales
+• Maintained ETL jobs
+• Maintained ETL jobs
+"""
+
+
+def test_exact_match_is_replaced_once():
+    updated, report = apply_bullets(RESUME, [{"original": "Maintained ETL jobs", "rewritten": "Cut ETL runtime"}])
+    assert updated.count("Cut ETL runtime") == 1
+    assert updated.count("Maintained ETL jobs") == 1
+    assert report[0]["status"] == "exact"
+
+
+def test_duplicate_bullets_each_get_a_line():
+    pair = {"original": "Maintained ETL jobs", "rewritten": "Cut ETL runtime"}
+    updated, report = apply_bullets(RESUME, [pair, pair])
+    assert updated.count("Cut ETL runtime") == 2
+    assert [r["status"] for r in report] == ["exact", "exact"]
+
+
+def test_curly_quotes_and_hyphenation_match():
+    resume = "• Led the “data-\nplatform” migration\n"
+    updated, report = apply_bullets(resume, [{"original": 'Led the "data-platform" migration',
+                                              "rewritten": "Led the migration"}])
+    assert report[0]["status"] == "normalized"
+    assert "Led the migration" in updated
+
+
+def test_close_paraphrase_is_fuzzy():
+    _, report = match_bullets(RESUME, [{"original": "Built dashboard for the sales", "rewritten": "x"}])
+    assert report[0]["status"] == "fuzzy"
+    assert report[0]["ratio"] >= 0.85
+
+
+def test_unknown_bullet_is_missing_and_text_unchanged():
+    updated, report = apply_bullets(RESUME, [{"original": "Won a Nobel prize in chemistry", "rewritten": "x"}])
+    assert updated == RESUME
+    assert report[0]["status"] == "missing"
+
+
+def test_empty_inputs():
+    assert apply_bullets("", []) == ("", [])
+    assert apply_bullets(RESUME, []) == (RESUME, [])
+
+
+# ==============================
+# JOB FILES
+# ==============================
+def test_jsonl_jobs():
+    raw = '{"title": "Analyst", "description": "SQL all day", "url": "u"}\n\n{"jd": "Python"}\n{"title": "empty"}\n'
+    jobs = read_job_file(raw, "jobs.jsonl")
+    assert [j["title"] for j in jobs] == ["Analyst", "Python"]
+    assert jobs[0]["url"] == "u"
+
+
+@pytest.mark.parametrize("line, problem", [
+    ('{"description": "cut off', "is not valid JSON"),
+    ('["description", "a list"]', "is not a JSON object"),
+    ('"just a string"', "is not a JSON object"),
+])
+def test_bad_jsonl_line_names_the_line(line, problem):
+    raw = '{"description": "fine"}\n\n' + line + "\n"
+    with pytest.raises(ValueError, match=f"jobs.jsonl line 3 {problem}"):
+        read_job_file(raw, "jobs.jsonl")
+
+
+# ==============================
+# CACHING
+# ==============================
+class NotFound(Exception):
+    status_code = 404
+
+
+def test_failover_answer_is_cached_under_the_model_that_gave_it(monkeypatch):
+    cache = ResponseCache(":memory:")
+    monkeypatch.setattr(resume_core, "response_cache", cache)
+    monkeypatch.setattr(LLMSettings, "model_chain", lambda self: ["retired/model", "backup/model"])
+
+    def open_completion(settings, model, system_task, user_content, stream=False):
+        if model == "retired/model":
+            raise NotFound("model not found")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"from {model}"))])
+    monkeypatch.setattr(resume_core, "open_completion", open_completion)
+
+    settings = LLMSettings(model="retired/model", openrouter_key="k")
+    assert resume_core.complete(settings, "task", "resume", add_score=False) == "from backup/model"
+    system_task = resume_core.with_scoring("task", False)
+    assert cache.get(settings.cache_key(system_task, "resume")) is None
+    assert cache.get(settings.cache_key(system_task, "resume", "backup/model")) == "from backup/model"
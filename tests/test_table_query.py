@@ -0,0 +1,96 @@
+"""Query compilation and tool calls in table_query, over a small hand-built dataset."""
+import json
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+from table_query import MAX_DATASETS, QueryError, TableTools
+
+
+def dataset(tmp_path, name="sales"):
+    path = tmp_path / f"{name}.sqlite3"
+    db = sqlite3.connect(path)
+    db.execute(f'CREATE TABLE "{name}" (region TEXT, amount REAL)')
+    db.executemany(f'INSERT INTO "{name}" VALUES (?, ?)', [("north", 3), ("south", 4), ("north", 2)])
+    db.commit()
+    db.close()
+    columns = [{"name": "region", "type": "text"}, {"name": "amount", "type": "number"}]
+    table = SimpleNamespace(name=name, columns=columns, rows=3, label=name)
+    return SimpleNamespace(path=str(path), tables=[table], filename=f"{name}.csv")
+
+
+@pytest.fixture
+def tools(tmp_path):
+    tools = TableTools([dataset(tmp_path)])
+    yield tools
+    tools.close()
+
+
+def call(tools, name, arguments):
+    result, _ = tools.call(name, arguments if isinstance(arguments, str) else json.dumps(arguments))
+    return json.loads(result)
+
+
+def test_group_and_sum(tools):
+    result = call(tools, "query_table", {"table": "sales", "group_by": ["region"],
+                                         "aggregates": [{"fn": "sum", "column": "amount"}],
+                                         "order_by": "sum_amount", "descending": True})
+    assert result["rows"] == [["north", 5.0], ["south", 4.0]]
+    assert result["columns"] == ["region", "sum_amount"]
+
+
+def test_filters_are_parameterised(tools):
+    sql, params = tools.compile({"table": "sales", "filters": [{"column": "region", "op": "=", "value": "x' OR 1=1"}]})
+    assert "?" in sql and params == ["x' OR 1=1"]
+
+
+@pytest.mark.parametrize("arguments", [
+    "[1, 2]",
+    "not json",
+    {"table": "sales", "filters": ["region = north"]},
+    {"table": "sales", "filters": {"column": "region"}},
+    {"table": "sales", "aggregates": ["sum(amount)"]},
+    {"table": "sales", "filters": [{"column": "region", "op": "like", "value": "n"}]},
+    {"table": "sales", "columns": ["nope"]},
+    {"table": "missing"},
+    {"table": "sales", "limit": "many"},
+])
+def test_malformed_query_table_calls_come_back_as_errors(tools, arguments):
+    assert "error" in call(tools, "query_table", arguments)
+
+
+def test_compile_rejects_non_object(tools):
+    with pytest.raises(QueryError):
+        tools.compile(["sales"])
+
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM sales",
+    "PRAGMA table_info(sales)",
+    "SELECT 1; DROP TABLE sales",
+    "ATTACH DATABASE ':memory:' AS x",
+])
+def test_run_sql_is_read_only(tools, sql):
+    assert "error" in call(tools, "run_sql", {"sql": sql})
+
+
+def test_run_sql_caps_rows(tools):
+    result = call(tools, "run_sql", {"sql": "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n "
+                                            "WHERE i < 500) SELECT i FROM n"})
+    assert result["truncated"] and len(result["rows"]) == 50
+
+
+def test_unknown_tool(tools):
+    assert "error" in call(tools, "drop_everything", {})
+
+
+def test_too_many_datasets(tmp_path):
+    with pytest.raises(ValueError):
+        TableTools([dataset(tmp_path, f"t{i}") for i in range(MAX_DATASETS + 1)])
+
+
+def test_max_datasets_attach(tmp_path):
+    tools = TableTools([dataset(tmp_path, f"t{i}") for i in range(MAX_DATASETS)])
+    assert len(tools.tables) == MAX_DATASETS
+    tools.close()
@@ -0,0 +1,35 @@
+"""Eviction of ingested spreadsheet databases in tables."""
+import os
+import time
+
+from tables import trim_tables
+
+
+def db_file(directory, name, size, age):
+    path = directory / f"{name}.sqlite3"
+    path.write_bytes(b"x" * size)
+    then = time.time() - age
+    os.utime(path, (then, then))
+    return path
+
+
+def test_expired_databases_are_removed(tmp_path):
+    old = db_file(tmp_path, "old", 10, age=7200)
+    new = db_file(tmp_path, "new", 10, age=60)
+    assert trim_tables(str(tmp_path), ttl=3600, max_bytes=1000) == 1
+    assert not old.exists() and new.exists()
+
+
+def test_least_recently_used_go_first_when_over_size(tmp_path):
+    paths = [db_file(tmp_path, f"t{i}", 100, age=300 - i * 100) for i in range(3)]
+    assert trim_tables(str(tmp_path), ttl=3600, max_bytes=250) == 1
+    assert [p.exists() for p in paths] == [False, True, True]
+
+
+def test_other_files_and_missing_directory_are_left_alone(tmp_path):
+    other = tmp_path / "notes.txt"
+    other.write_text("keep")
+    os.utime(other, (0, 0))
+    assert trim_tables(str(tmp_path), ttl=0, max_bytes=0) == 0
+    assert other.exists()
+    assert trim_tables(str(tmp_path / "missing")) == 0
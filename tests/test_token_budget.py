@@ -0,0 +1,104 @@
+"""History fitting and the rolling summary in token_budget."""
+from token_budget import (MESSAGE_OVERHEAD, SUMMARY_TOKENS, RollingSummary, extractive_summary, fit_messages,
+                          message_tokens)
+
+
+def turns(n, words=50):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"turn{i} " + "word " * words}
+            for i in range(n)]
+
+
+# ==============================
+# FIT_MESSAGES
+# ==============================
+def test_under_budget_is_unchanged():
+    history = turns(4)
+    kept, report = fit_messages(history, message_tokens(history))
+    assert kept == history and report["dropped"] == 0
+
+
+def test_latest_is_sent_even_over_budget():
+    history = turns(1, words=5000)
+    kept, _ = fit_messages(history, 10)
+    assert kept == history
+    kept, report = fit_messages(turns(3, words=5000), 10)
+    assert kept[-1]["content"].startswith("turn2") and report["dropped"] == 2
+
+
+def test_first_user_turn_is_pinned_and_newest_kept():
+    history = turns(10)
+    one = message_tokens(history[:1])
+    kept, report = fit_messages(history, 4 * one)
+    assert [m["content"].split()[0] for m in kept] == ["turn0", "turn7", "turn8", "turn9"]
+    assert report["dropped"] == 6 and not report["summarised"]
+
+
+def test_pin_that_does_not_fit_is_dropped():
+    history = [{"role": "user", "content": "task " * 4000}] + turns(5)[1:]
+    kept, _ = fit_messages(history, 3 * message_tokens(history[1:2]))
+    assert all(not m["content"].startswith("task") for m in kept)
+
+
+def test_assistant_first_turn_is_not_pinned():
+    history = [{"role": "assistant", "content": "hello " * 50}] + turns(5)[1:]
+    kept, _ = fit_messages(history, 2 * message_tokens(history[1:2]))
+    assert kept[0] is not history[0]
+
+
+def test_summary_goes_before_the_pinned_turn():
+    history = turns(10, words=400)
+    budget = 4 * message_tokens(history[:1]) + SUMMARY_TOKENS + MESSAGE_OVERHEAD
+    kept, report = fit_messages(history, budget, RollingSummary())
+    assert kept[0]["role"] == "system" and "turn1" in kept[0]["content"]
+    assert kept[1] is history[0]
+    assert report["summarised"] and report["tokens"] == message_tokens(kept)
+
+
+def test_empty_summary_adds_no_note():
+    kept, report = fit_messages(turns(10), 400, lambda dropped, offset: "")
+    assert kept[0]["role"] != "system" and not report["summarised"]
+
+
+# ==============================
+# ROLLING SUMMARY
+# ==============================
+def recording():
+    seen = []
+
+    def summarize(previous, messages):
+        seen.append([m["content"].split()[0] for m in messages])
+        return " ".join(filter(None, [previous] + seen[-1]))
+    return summarize, seen
+
+
+def test_only_newly_dropped_turns_are_summarised():
+    summarize, seen = recording()
+    summary, history = RollingSummary(summarize), turns(8)
+    summary(history[1:3], 1)
+    assert summary(history[1:5], 1) == "turn1 turn2 turn3 turn4"
+    assert seen == [["turn1", "turn2"], ["turn3", "turn4"]]
+    summary(history[1:5], 1)
+    assert len(seen) == 2
+
+
+def test_losing_the_pin_does_not_resummarise():
+    summarize, seen = recording()
+    summary, history = RollingSummary(summarize), turns(8)
+    summary(history[1:4], 1)
+    summary(history[0:5], 0)   # the first turn no longer fits and joins the dropped turns
+    assert seen == [["turn1", "turn2", "turn3"], ["turn0", "turn4"]]
+
+
+def test_shorter_history_resets_the_summary():
+    summarize, seen = recording()
+    summary, history = RollingSummary(summarize), turns(8)
+    summary(history[1:6], 1)
+    assert summary(history[1:3], 1) == "turn1 turn2"
+    assert seen[-1] == ["turn1", "turn2"]
+
+
+def test_extractive_summary_strips_reasoning_and_keeps_newest():
+    text = extractive_summary("", [{"role": "assistant", "content": "<think>plan</think> answer " + "x" * 300}])
+    assert text.startswith("- Assistant: answer") and text.endswith("…") and "plan" not in text
+    long = extractive_summary("", turns(40, words=60), max_tokens=100)
+    assert "turn39" in long and "turn0 " not in long
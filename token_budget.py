@@ -0,0 +1,134 @@
+"""Token accounting and history-fitting policy for multi-turn chat.
+
+`fit_messages` keeps a conversation under a model's context limit by pinning the first
+user turn (it carries the task and usually the files), keeping a sliding window of the
+most recent turns, and replacing whatever falls out of the window with a rolling summary.
+
+Counting uses tiktoken when it is installed and a character estimate otherwise — close
+enough for budgeting, since every limit below already leaves headroom.
+"""
+import functools
+
+# Conservative context windows (tokens) for the models the apps route to.
+MODEL_CONTEXT = {
+    "minimax/minimax-m2.5:free":              160_000,
+    "nvidia/nemotron-3-super-120b-a12b:free": 128_000,
+    "openai/gpt-oss-120b:free":               128_000,
+    "meta-llama/llama-3.1-8b-instruct:free":  128_000,
+    "google/gemma-4-31b-it:free":             128_000,
+    "gemini-2.5-flash":                       1_000_000,
+}
+DEFAULT_CONTEXT  = 32_000
+RESERVED_OUTPUT  = 8_000    # room left for the reply
+MESSAGE_OVERHEAD = 4        # role + separators per chat message
+SUMMARY_TOKENS   = 800      # upper bound for the rolling summary
+
+
+@functools.cache
+def _encoding():
+    """tiktoken's encoder, loaded on the first count (it may fetch its BPE file)."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:   # optional dependency
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def message_tokens(messages: list[dict]) -> int:
+    return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages)
+
+
+def prompt_budget(model_id: str | None) -> int:
+    """Tokens available for the prompt once the reply's share is set aside."""
+    return MODEL_CONTEXT.get(model_id, DEFAULT_CONTEXT) - RESERVED_OUTPUT
+
+
+def extractive_summary(previous: str, messages: list[dict], max_tokens: int = SUMMARY_TOKENS) -> str:
+    """Summary without a model call: the opening of each dropped turn, newest kept when over budget."""
+    lines = [previous] if previous else []
+    for m in messages:
+        who  = "User" if m["role"] == "user" else "Assistant"
+        text = " ".join(m["content"].split("</think>")[-1].split())
+        lines.append(f"- {who}: {text[:240]}{'…' if len(text) > 240 else ''}")
+    summary = "\n".join(lines)
+    while count_tokens(summary) > max_tokens and len(lines) > 1:
+        lines.pop(0)
+        summary = "\n".join(lines)
+    return summary
+
+
+class RollingSummary:
+    """Running summary of turns that have left the window, extended only with newly dropped turns.
+
+    Turns are tracked by their position in the whole history, not in the dropped list:
+    whether the first turn is pinned changes where that list starts.
+    """
+
+    def __init__(self, summarize=extractive_summary):
+        self.summarize = summarize
+        self.covered   = set()   # history positions already in the summary
+        self.end       = 0       # end of the last dropped range
+        self.text      = ""
+
+    def __call__(self, dropped: list[dict], offset: int = 0) -> str:
+        """dropped is history[offset:offset + len(dropped)]."""
+        end = offset + len(dropped)
+        if end < self.end:                   # conversation was reset
+            self.covered, self.text = set(), ""
+        self.end = end
+        fresh = [i for i in range(offset, end) if i not in self.covered]
+        if fresh:
+            self.text = self.summarize(self.text, [dropped[i - offset] for i in fresh])
+            self.covered.update(fresh)
+        return self.text
+
+
+def fit_messages(messages: list[dict], budget: int, summarize=None) -> tuple[list[dict], dict]:
+    """Trim messages to budget tokens. Returns (messages to send, report).
+
+    Policy: the latest message is always sent; the first user turn is pinned when it fits;
+    the remaining budget takes the newest turns; anything older is summarised (if a
+    summarizer is given) into a single system note placed before the pinned turn.
+    summarize(dropped, offset) gets the dropped turns and the position of the first one.
+    """
+    total = message_tokens(messages)
+    report = {"tokens": total, "budget": budget, "dropped": 0, "summarised": False}
+    if total <= budget or len(messages) <= 1:
+        return messages, report
+
+    latest  = messages[-1]
+    pinned  = messages[0] if messages[0]["role"] == "user" and len(messages) > 2 else None
+    reserve = SUMMARY_TOKENS + MESSAGE_OVERHEAD if summarize else 0
+    used    = message_tokens([latest]) + reserve
+    if pinned is not None and used + message_tokens([pinned]) <= budget:
+        used += message_tokens([pinned])
+    else:
+        pinned = None
+
+    start = len(messages) - 1
+    lower = 1 if pinned is not None else 0
+    while start > lower:
+        cost = message_tokens([messages[start - 1]])
+        if used + cost > budget:
+            break
+        used  += cost
+        start -= 1
+
+    dropped = messages[lower:start]
+    kept    = ([pinned] if pinned is not None else []) + messages[start:]
+    if dropped and summarize:
+        summary = summarize(dropped, lower)
+        if summary:
+            kept = [{"role": "system",
+                     "content": f"Summary of earlier conversation turns (omitted for length):\n{summary}"}] + kept
+            report["summarised"] = True
+
+    report.update(tokens=message_tokens(kept), dropped=len(dropped))
+    return kept, report